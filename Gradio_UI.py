@@ -3,7 +3,9 @@
 import os
 import re
 import mimetypes
+import queue
 import shutil
+import threading
 from typing import Optional
 
 import gradio as gr
@@ -13,6 +15,8 @@ from smolagents.agents import ActionStep, MultiStepAgent
 from smolagents.memory import MemoryStep
 from smolagents.utils import _is_package_available
 
+from tools import cancellation, resilience, results, usage
+
 def pull_messages_from_step(step_log: MemoryStep):
     if isinstance(step_log, ActionStep):
         step_number = f"Step {step_log.step_number}" if step_log.step_number is not None else ""
@@ -42,23 +46,120 @@ def pull_messages_from_step(step_log: MemoryStep):
         elif step_log.error:
             yield gr.ChatMessage(role="assistant", content=str(step_log.error), metadata={"title": "💥 Error"})
 
-        meta = f"<span style='color:#bbb;font-size:12px;'>Input tokens: {getattr(step_log, 'input_token_count', 0)} | Output tokens: {getattr(step_log, 'output_token_count', 0)} | Duration: {round(getattr(step_log, 'duration', 0), 2)}</span>"
+        cache = ""
+        if hasattr(step_log, "cache_read_tokens"):
+            cache = f" | Cache read: {step_log.cache_read_tokens} | Cache write: {step_log.cache_write_tokens}"
+        session = f" | Session: {step_log.usage_summary}" if getattr(step_log, "usage_summary", "") else ""
+        meta = f"<span style='color:#bbb;font-size:12px;'>Input tokens: {getattr(step_log, 'input_token_count', 0)} | Output tokens: {getattr(step_log, 'output_token_count', 0)}{cache} | Duration: {round(getattr(step_log, 'duration', 0), 2)}{session}</span>"
         yield gr.ChatMessage(role="assistant", content=meta)
         yield gr.ChatMessage(role="assistant", content="-----")
 
-def stream_to_gradio(agent, task: str, reset_agent_memory: bool = False, additional_args: Optional[dict] = None):
-    total_input_tokens = 0
-    total_output_tokens = 0
-    for step_log in agent.run(task, stream=True, reset=reset_agent_memory, additional_args=additional_args):
+def _budget_error(error: BaseException) -> Optional[resilience.BudgetExceededError]:
+    """The BudgetExceededError behind an agent error (smolagents wraps model errors), if any."""
+    while error is not None:
+        if isinstance(error, resilience.BudgetExceededError):
+            return error
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def _run_in_background(agent, task: str, token: cancellation.CancelToken, annotate, reset_agent_memory: bool,
+                      additional_args: Optional[dict], heartbeat: Optional[float], session: Optional[usage.Session] = None):
+    """
+    Runs the agent on its own thread and yields its steps (None every `heartbeat` seconds
+    while a step is in progress). When the consumer goes away before the end of the run
+    (tab closed, stop pressed), `token` is cancelled: the in-flight calls of this run are
+    abandoned and it ends at its next step (cancellation.check_step). The agent itself is
+    shared by every user and is never interrupted. External calls of the run are charged
+    to `session`.
+    """
+    events = queue.Queue()
+
+    def _worker():
+        with cancellation.bound(token), usage.bound(session):
+            try:
+                for step_log in agent.run(task, stream=True, reset=reset_agent_memory, additional_args=additional_args):
+                    annotate(step_log)
+                    events.put(("step", step_log))
+            except (Exception, cancellation.Cancelled) as e:
+                events.put(("error", e))
+            finally:
+                events.put(("done", None))
+
+    worker = threading.Thread(target=_worker, name="agent-run", daemon=True)
+    worker.start()
+    try:
+        while True:
+            try:
+                kind, value = events.get(timeout=heartbeat)
+            except queue.Empty:
+                yield None
+                continue
+            if kind == "done":
+                return
+            if kind == "error":
+                if token.cancelled:
+                    return
+                raise value
+            yield value
+    finally:
+        if worker.is_alive():
+            token.cancel()
+
+
+def stream_to_gradio(agent, task: str, reset_agent_memory: bool = False, additional_args: Optional[dict] = None,
+                     cancel_token: Optional[cancellation.CancelToken] = None, heartbeat: Optional[float] = None,
+                     session: Optional[usage.Session] = None):
+    """
+    Streams the agent's steps as chat messages. With a `heartbeat`, None is yielded
+    periodically during long steps so the UI can notice a disconnect; closing this
+    generator (or cancelling `cancel_token`) stops the run. External calls are charged
+    to `session` (a new one with the default budgets if not given), whose running
+    totals are shown on each step's meta line.
+    """
+    token = cancel_token or cancellation.CancelToken()
+    session = session or usage.Session(label=task)
+    # Prompt cache usage is read from this run's session: the model is shared with other users
+    cache_provider = getattr(agent.model, "usage_provider", None) if hasattr(agent.model, "cache_stats") else None
+    cache_seen = session.cache_tokens(cache_provider) if cache_provider else None
+
+    def annotate(step_log):
+        nonlocal cache_seen
         if hasattr(agent.model, "last_input_token_count"):
-            total_input_tokens += agent.model.last_input_token_count
-            total_output_tokens += agent.model.last_output_token_count
             if isinstance(step_log, ActionStep):
                 step_log.input_token_count = agent.model.last_input_token_count
                 step_log.output_token_count = agent.model.last_output_token_count
-        for message in pull_messages_from_step(step_log):
-            yield message
-    final_answer = handle_agent_output_types(step_log)
+        if cache_provider and isinstance(step_log, ActionStep):
+            # Prompt cache usage since the previous step (planning calls included)
+            read, written = session.cache_tokens(cache_provider)
+            step_log.cache_read_tokens = read - cache_seen[0]
+            step_log.cache_write_tokens = written - cache_seen[1]
+            cache_seen = read, written
+        if isinstance(step_log, ActionStep):
+            step_log.usage_summary = session.summary()
+
+    step_log = None
+    try:
+        for step_log in _run_in_background(agent, task, token, annotate, reset_agent_memory, additional_args,
+                                           heartbeat, session):
+            if step_log is None:
+                yield None
+                continue
+            for message in pull_messages_from_step(step_log):
+                yield message
+    except Exception as e:
+        budget_error = _budget_error(e)
+        if budget_error is None:
+            raise
+        yield gr.ChatMessage(role="assistant", content=f"**Stopped: {budget_error}.**\n\nSession usage: {session.summary()}")
+        return
+    finally:
+        session.close()
+    if token.cancelled:
+        yield gr.ChatMessage(role="assistant", content="**Cancelled.**")
+        return
+    # The run ends with a FinalAnswerStep carrying the answer
+    final_answer = handle_agent_output_types(getattr(step_log, "output", step_log))
     if isinstance(final_answer, AgentText):
         yield gr.ChatMessage(role="assistant", content=f"**Final answer:**\n{final_answer.to_string()}")
     elif isinstance(final_answer, AgentImage):
@@ -66,7 +167,7 @@ def stream_to_gradio(agent, task: str, reset_agent_memory: bool = False, additio
     elif isinstance(final_answer, AgentAudio):
         yield gr.ChatMessage(role="assistant", content={"path": final_answer.to_string(), "mime_type": "audio/wav"})
     else:
-        yield gr.ChatMessage(role="assistant", content=f"**Final answer:** {str(final_answer)}")
+        yield gr.ChatMessage(role="assistant", content=f"**Final answer:** {results.render(final_answer)}")
 
 class GradioUI:
     def __init__(self, agent: MultiStepAgent):
@@ -77,8 +178,9 @@ class GradioUI:
     def interact_with_agent(self, prompt, messages):
         messages.append(gr.ChatMessage(role="user", content=prompt))
         yield messages
-        for msg in stream_to_gradio(self.agent, task=prompt):
-            messages.append(msg)
+        for msg in stream_to_gradio(self.agent, task=prompt, heartbeat=1.0):
+            if msg is not None:
+                messages.append(msg)
             yield messages
         yield messages
 
@@ -96,10 +198,13 @@ class GradioUI:
 
     def launch(self):
         def run_agent_interface(prompt):
+            # Generator: Gradio shows a stop button, and stopping or closing the tab closes
+            # this generator within a heartbeat, which cancels the run (see _run_in_background)
             messages = []
-            for msg in stream_to_gradio(self.agent, task=prompt):
-                messages.append(msg)
-            return "\n".join([m.content if isinstance(m.content, str) else str(m.content) for m in messages])
+            for msg in stream_to_gradio(self.agent, task=prompt, heartbeat=1.0):
+                if msg is not None:
+                    messages.append(msg)
+                yield "\n".join([m.content if isinstance(m.content, str) else str(m.content) for m in messages])
 
 
         demo = gr.Interface(
@@ -118,4 +223,65 @@ class GradioUI:
 
         demo.launch(debug=True, share=True)
 
-__all__ = ["GradioUI", "stream_to_gradio"]
\ No newline at end of file
+class PipelineUI:
+    """Form for the deterministic pipeline mode (tools/pipeline.py): the three inputs are asked explicitly."""
+
+    def __init__(self, pipeline):
+        if not _is_package_available("gradio"):
+            raise ModuleNotFoundError("Please install 'gradio' with: pip install 'smolagents[gradio]'")
+        self.pipeline = pipeline
+
+    def launch(self):
+        def run_pipeline_interface(mood, origin, week):
+            # Generator, like the agent mode: stopping or closing the tab closes it within a
+            # heartbeat, which cancels the pipeline run through its token
+            token = cancellation.CancelToken()
+            session = usage.Session(label=mood)
+            done = threading.Event()
+            outcome = {}
+
+            def _worker():
+                with cancellation.bound(token), usage.bound(session):
+                    try:
+                        outcome["run"] = self.pipeline.run(mood=mood, origin=origin, week=week)
+                    except cancellation.Cancelled:
+                        pass
+                    finally:
+                        done.set()
+
+            threading.Thread(target=_worker, name="pipeline-run", daemon=True).start()
+            try:
+                while not done.wait(1.0):
+                    yield "⏳ Planning your trip..."
+            finally:
+                if not done.is_set():
+                    token.cancel()
+                session.close()
+            run = outcome.get("run")
+            if run is None:
+                yield "**Cancelled.**"
+                return
+            if not run.timings:
+                yield run.message
+                return
+            timings = " | ".join(f"{stage}: {duration}s" for stage, duration in run.timings.items())
+            yield (f"{run.message}\n\n-----\nStages: {timings} | Loop-backs: {run.context.get('loop', 0)}"
+                   f" | Session: {session.summary()}")
+
+        demo = gr.Interface(
+            fn=run_pipeline_interface,
+            inputs=[
+                gr.Textbox(label="Describe your mood", placeholder="e.g., I need a lemon-scented reset by the sea...", lines=1),
+                gr.Textbox(label="Departure airport", placeholder="e.g., CDG", lines=1),
+                gr.Textbox(label="Travel week or date", placeholder="e.g., 2025-07-15 or mid July", lines=1),
+            ],
+            outputs=gr.Textbox(label="Response"),
+            title="Mood-Based Travel Agent",
+            description="Plan your perfect Mediterranean escape, one mood at a time.",
+            theme="default",
+            api_name="predict"
+        )
+
+        demo.launch(debug=True, share=True)
+
+__all__ = ["GradioUI", "PipelineUI", "stream_to_gradio"]
\ No newline at end of file
@@ -1,23 +1,32 @@
-from smolagents import CodeAgent, LiteLLMModel
-from tools.mood_to_need import MoodToNeedTool, claude_mood_to_need_model
-from tools.need_to_destination import NeedToDestinationTool, claude_need_to_destination_model
-from tools.weather_tool import WeatherTool
-from tools.find_flight import FlightsFinderTool
-from tools.final_answer import FinalAnswerTool
-from tools.country_info_tool import CountryInfoTool
-from smolagents import CodeAgent,DuckDuckGoSearchTool, HfApiModel,load_tool,tool
-from smolagents import MultiStepAgent, ActionStep, AgentText, AgentImage, AgentAudio, handle_agent_output_types
-from Gradio_UI import GradioUI
+from tools import cancellation, clients
+# .env is loaded once, before any module reads its settings; tools, SDKs and API clients
+# are then loaded on first use (tools/registry.py)
+clients.load_env()
+from tools.registry import registry, profile
+from tools.country_report_store import CountryReportStore, DEFAULT_STORE_PATH
+from tools.observations import ObservationCompactor
+from tools.memory_manager import MemoryManager
+from tools.prompt_cache import CachingLiteLLMModel
+from tools.pipeline import WanderMindPipeline
+from tools.prefetch import SpeculativePrefetcher
+from smolagents import CodeAgent
+from Gradio_UI import GradioUI, PipelineUI
 import yaml
+import os
+
 # from tools.mock_tools import MoodToNeedTool, NeedToDestinationTool, WeatherTool, FlightsFinderTool, FinalAnswerTool
 
-# Initialize Claude model via Hugging Face
-model = LiteLLMModel(
+# Initialize Claude model via Hugging Face (static system prompt marked for provider-side caching)
+model = CachingLiteLLMModel(
     model_id="claude-3-opus-20240229",
     temperature=0.7,
-    max_tokens=2048
+    max_tokens=2048,
+    cache_prompt=os.getenv("PROMPT_CACHE", "1") != "0"
 )
 
+# Serve country reports from the precomputed store when materialize_country_reports.py has been run
+country_report_store = CountryReportStore() if os.path.exists(DEFAULT_STORE_PATH) else None
+
 # Load prompt templates
 with open("prompts.yaml", "r") as f:
     prompt_templates = yaml.safe_load(f)
@@ -37,20 +46,66 @@ with open("prompts.yaml", "r") as f:
 #     prompt_templates=prompt_templates
 # )
 
+# Oversized tool outputs are compacted in the agent's memory (full text kept out-of-band)
+observation_compactor = ObservationCompactor()
+
+# Older steps are folded into a running summary once the history gets long
+memory_manager = MemoryManager(max_history_tokens=int(os.getenv("AGENT_MAX_HISTORY_TOKENS", 6000)))
+
+weather_tool = registry.create("weather_forecast")
+flights_tool = registry.create("flights_finder")
+country_tool = registry.create(
+    "country_info",
+    report_store=country_report_store,
+    max_section_age=float(os.getenv("COUNTRY_REPORT_MAX_SECTION_AGE", 86400)),
+)
+
+tools = [
+    registry.create("MoodToNeed"),          # Step 1: Mood → Need
+    registry.create("NeedToDestination", geocoder=weather_tool.coordinates),   # Step 2: Need → Destination
+    weather_tool,              # Step 3: Weather for destination
+    registry.create("weather_forecast_batch"),   # Step 3 bis: Weather for several destinations at once
+    flights_tool,              # Step 4: Destination → Flights           # Step 5: Claude wrap
+    registry.create("group_flights_finder"),   # Step 4 bis: Flights for a group leaving from several origins
+    registry.create("final_answer"),      # Required final output
+    country_tool,              # Step 6: Country info
+]
+
+# Weather, country info and flights of every suggested destination are fetched in the
+# background as soon as NeedToDestination answers (PREFETCH=0 disables it)
+if os.getenv("PREFETCH", "1") != "0":
+    SpeculativePrefetcher(weather_tool=weather_tool, country_tool=country_tool, flights_tool=flights_tool).wrap(tools)
+
 agent = CodeAgent(
     model=model,
-    tools=[
-        MoodToNeedTool(model=claude_mood_to_need_model),          # Step 1: Mood → Need
-        NeedToDestinationTool(model=claude_need_to_destination_model),   # Step 2: Need → Destination
-        WeatherTool(),             # Step 3: Weather for destination
-        FlightsFinderTool(),       # Step 4: Destination → Flights           # Step 5: Claude wrap
-        FinalAnswerTool(),      # Required final output
-        CountryInfoTool()           # Step 6: Country info
-    ],
+    tools=observation_compactor.wrap(tools),
     max_steps=10,
     verbosity_level=1,
-    prompt_templates=prompt_templates
+    prompt_templates=prompt_templates,
+    # cancellation.check_step ends a cancelled user's run between steps (the agent is shared)
+    step_callbacks=[cancellation.check_step, observation_compactor, memory_manager]
 )
 
+if os.getenv("STARTUP_PROFILE") == "1":
+    print(profile.report())
+
 # Launch the Gradio interface
-GradioUI(agent).launch()
+# WANDERMIND_MODE=pipeline runs the fixed flow as a DAG over the same tools (no LLM planning turns)
+if os.getenv("WANDERMIND_MODE", "agent") == "pipeline":
+    from tools.mood_to_need import claude_mood_to_need_model
+    pipeline_weather_tool = registry.create("weather_forecast")
+    pipeline = WanderMindPipeline(
+        mood_tool=registry.create("MoodToNeed"),
+        destination_tool=registry.create("NeedToDestination", geocoder=pipeline_weather_tool.coordinates),
+        weather_tool=pipeline_weather_tool,
+        country_tool=registry.create(
+            "country_info",
+            report_store=country_report_store,
+            max_section_age=float(os.getenv("COUNTRY_REPORT_MAX_SECTION_AGE", 86400)),
+        ),
+        flights_tool=registry.create("flights_finder"),
+        model=claude_mood_to_need_model,
+    )
+    PipelineUI(pipeline).launch()
+else:
+    GradioUI(agent).launch()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Offline batch job: precompute CountryInfoTool report sections for every country
+in tools/country_data.py and write them to the local report store.
+
+Usage:
+    python materialize_country_reports.py --concurrency 4 --max-age 43200
+
+Run it from a cron/scheduled job; serving processes then build reports from
+the store and only go live for sections older than their `max_section_age`.
+Provider rate limits are enforced by the shared resilience layer, so the
+concurrency only bounds how many countries are in progress at once.
+
+NewsAPI quota: a full country costs 6 NewsAPI requests (4 security searches,
+events, politics), about 1,100 for every country, while the developer plan
+allows 100 a day. A run therefore stops at `--newsapi-budget` requests
+(default 90, about 15 countries; 0 lifts the cap) and starts with the
+countries whose stored sections are the oldest, so daily runs rotate through
+the whole list. Sections that could not be built (budget spent, outage) are
+not written.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+from tools import country_data, usage
+from tools.country_info_tool import CountryInfoTool
+from tools.country_report_store import DEFAULT_STORE_PATH, CountryReportStore
+
+
+def stalest_first(store: CountryReportStore, countries: list[str]) -> list[str]:
+    """Countries ordered by the age of their oldest stored section (never materialized first)."""
+    sections = (*CountryInfoTool.SECTIONS, "recommendation")
+
+    def oldest(country: str) -> float:
+        records = [store.get(country, section) for section in sections]
+        return min((record[1] if record else 0.0) for record in records)
+
+    return sorted(countries, key=oldest)
+
+
+def materialize(store: CountryReportStore, concurrency: int, max_age: float, countries: list[str],
+                budgets: Optional[dict] = None) -> dict:
+    """
+    Refreshes every section older than `max_age` seconds; returns {country: sections written}.
+    `budgets` caps the provider calls of the whole run (tools/usage.py); once one is spent
+    the remaining countries are skipped.
+    """
+    tool = CountryInfoTool(report_store=store, max_section_age=max_age)
+    session = usage.Session(budgets or {}, label="materialize_country_reports")
+
+    def _run(country: str) -> Optional[int]:
+        with usage.bound(session):
+            if any(session.over_budget(provider) for provider in session.budgets):
+                return None
+            before = {section: store.get(country, section) for section in (*tool.SECTIONS, "recommendation")}
+            tool._build_report(country, "all")
+            return sum(store.get(country, section) != record for section, record in before.items())
+
+    written = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(_run, country): country for country in countries}
+        for future in as_completed(futures):
+            country = futures[future]
+            try:
+                count = future.result()
+                written[country] = count or 0
+                if count is None:
+                    print(f"   ⏭️ {country}: skipped, run budget spent")
+                else:
+                    print(f"   ✅ {country}: {count} section(s) written")
+            except Exception as e:
+                written[country] = 0
+                print(f"   ❌ {country}: {e}")
+    session.close()
+    if session.summary():
+        print(f"\n📊 {session.summary()}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute country report sections into the local store.")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Path of the SQLite report store")
+    parser.add_argument("--concurrency", type=int, default=4, help="Countries processed in parallel")
+    parser.add_argument("--max-age", type=float, default=0, help="Only refresh sections older than this many seconds (0 = refresh all)")
+    parser.add_argument("--countries", nargs="*", help="Restrict to these English country names")
+    parser.add_argument("--newsapi-budget", type=int, default=90,
+                        help="NewsAPI requests allowed for the run (developer plan: 100/day; 0 = no cap)")
+    args = parser.parse_args()
+
+    store = CountryReportStore(args.store)
+    countries = stalest_first(store, args.countries or sorted(country_data.COUNTRIES))
+    budgets = {"newsapi": args.newsapi_budget} if args.newsapi_budget > 0 else {}
+
+    print(f"🌍 Materializing reports for {len(countries)} countries into {args.store}...\n")
+    start = time.time()
+    written = materialize(store, args.concurrency, args.max_age, countries, budgets)
+    print(f"\n📦 {sum(written.values())} section(s) written in {time.time() - start:.0f}s")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
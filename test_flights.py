@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Offline check of airport code validation (tools/airports.py) and of the
+flight tools (tools/find_flight.py) over a stub SerpApi query.
+"""
+from contextlib import contextmanager
+
+from tools import airports, find_flight
+from tools.find_flight import FlightsFinderTool, GroupFlightsFinderTool
+from tools.flight_search import FlightSearchPlanner
+
+# Real airports with scheduled flights that the bundled dataset lacks
+MISSING_FROM_DATASET = ("CFR", "ETZ", "RDZ", "DNR", "AVN", "LRT", "BVE", "LGG", "OST", "GRQ", "MST", "HHN", "DTM", "CZM", "TAB")
+
+
+class StubQuery:
+    """SerpApi stand-in: one direct flight for every search, Lisbon being the dearest destination."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, params: dict) -> dict:
+        self.calls.append(params)
+        origin, destination = params["departure_id"], params["arrival_id"]
+        flight = {
+            "flights": [{"departure_airport": {"id": origin, "time": "2030-06-01 08:00"},
+                         "arrival_airport": {"id": destination, "time": "2030-06-01 10:00"},
+                         "duration": 120, "airline": "Stub Air"}],
+            "price": 300 if destination == "LIS" else 100,
+        }
+        return {"other_flights": [flight]}
+
+    def routes(self) -> list:
+        return [(params["departure_id"], params["arrival_id"]) for params in self.calls]
+
+
+@contextmanager
+def stub_serpapi():
+    saved, query = find_flight.planner, StubQuery()
+    find_flight.planner = FlightSearchPlanner(query, base_params=dict(saved.base_params))
+    try:
+        yield query
+    finally:
+        find_flight.planner = saved
+
+
+def test_airport_status():
+    print("🧪 Testing airport code status...\n")
+    assert airports.status("CDG") == airports.status(" lis ") == airports.KNOWN
+    for code in MISSING_FROM_DATASET:
+        assert airports.status(code) == airports.UNVERIFIED, code
+        assert airports.is_searchable(code) and not airports.is_valid(code)
+    for code in ("TXL", "SXF", "THF"):
+        assert airports.status(code) == airports.CLOSED and "BER" in airports.closed_reason(code), code
+    for code in ("", None, "PARIS", "C1G", "ÉTÉ", "LI"):
+        assert airports.status(code) == airports.MALFORMED and not airports.is_searchable(code), code
+    print("   ✅ Known, unverified, closed and malformed codes\n")
+
+    assert airports.code_for("Paris") == "CDG" and airports.code_for("rdz") == "RDZ"
+    assert airports.code_for("TXL") is None and airports.code_for("Atlantis") is None
+    print("   ✅ Unverified codes kept as departures, closed ones refused\n")
+
+    def airport(code, scheduled=True, name=""):
+        return airports.Airport(code, name, "", "FR", 45.0, 5.0, scheduled)
+
+    index = airports.AirportIndex([airport("AAA"), airport("BBB", False, "Old field"), airport("AAA", False),
+                                   airport("TXL", True, "Reopened")], retired={"TXL": "closed", "CCC": "closed"})
+    assert set(index.by_code) == {"AAA", "TXL"} and index.unscheduled == {"BBB": "Old field", "CCC": "closed"}, \
+        "a scheduled definition wins over closed rows and retired codes"
+    print("   ✅ Closed and non-scheduled rows of extra datasets\n")
+
+
+def test_flight_tools_codes():
+    print("🧪 Testing flight searches from unverified airports...\n")
+    tool, group = FlightsFinderTool(), GroupFlightsFinderTool()
+    with stub_serpapi() as query:
+        result = tool.forward("CDG", "RDZ", "2030-06-01", "2030-06-08")
+        assert result.ok and result.found, result.error
+        assert FlightsFinderTool.search_flight("OST", "CFR", "2030-06-01").outbound.destination == "CFR"
+        ranking = group.forward(["LGG", "Paris"], ["ETZ", "LIS"], "2030-06-01", "2030-06-08").ranking
+        assert [option.destination for option in ranking] == ["ETZ", "LIS"] and not ranking[0].missing
+        assert query.routes()[:2] == [("CDG", "RDZ"), ("OST", "CFR")]
+        assert {route for route in query.routes()[2:]} == {("LGG", "ETZ"), ("CDG", "ETZ"), ("LGG", "LIS"), ("CDG", "LIS")}
+        print("   ✅ Codes missing from the dataset are searched\n")
+
+        searched = len(query.calls)
+        result = tool.forward("TXL", "LIS", "2030-06-01", "2030-06-08")
+        assert not result.ok and "no scheduled flights" in result.error and "Tegel" in result.error
+        assert "not an airport code" in FlightsFinderTool.search_flight("CDG", "Lisbon", "2030-06-01").error
+        assert "not an airport code" in group.forward(["Atlantis"], ["LIS"], "2030-06-01", "2030-06-08").error
+        assert len(query.calls) == searched, "no query for malformed codes or closed airports"
+    print("   ✅ Malformed codes and closed airports refused before any query\n")
+
+
+def test_one_way_results():
+    print("🧪 Testing one-way search results...\n")
+    with stub_serpapi():
+        result = FlightsFinderTool.search_flight("CDG", "LIS", "2030-06-01")
+    assert result.ok and result.price == 300 and result.outbound_date == "2030-06-01" and result.inbound is None
+    assert str(result).startswith("CDG→LIS 2030-06-01, one way, total $300 | out: CDG 08:00")
+    rendered = result.render()
+    assert "✈️ Outbound Flight:" in rendered and "Inbound" not in rendered and "Total price (one way): $300" in rendered
+    print("   ✅ Result record with the one-way price, no return leg shown\n")
+
+    def failing(params):
+        raise RuntimeError("serpapi temporarily unavailable: circuit open after repeated failures")
+
+    saved = find_flight.planner
+    find_flight.planner = FlightSearchPlanner(failing)
+    try:
+        result = FlightsFinderTool.search_flight("CDG", "LIS", "2030-06-01")
+    finally:
+        find_flight.planner = saved
+    assert not result.ok and result.error == "serpapi temporarily unavailable: circuit open after repeated failures"
+    assert result.render() == f"❌ {result.error}" and "Error occurred" not in str(result)
+    print("   ✅ Failures reported in `error`, without a prefix\n")
+
+
+def test_group_adults():
+    print("🧪 Testing group adult counts...\n")
+    group = GroupFlightsFinderTool()
+    with stub_serpapi() as query:
+        result = group.forward(["CDG", "LYS"], ["LIS"], "2030-06-01", "2030-06-08", adults=[2, "3"])
+        assert result.ok and {(params["departure_id"], params["adults"]) for params in query.calls} == {("CDG", 2), ("LYS", 3)}
+        query.calls.clear()
+        assert group.forward(["CDG", "LYS"], ["LIS"], "2030-06-01", "2030-06-08", adults=[None, 2.0]).ok
+        assert sorted(params["adults"] for params in query.calls) == [1, 2], "missing counts default to 1"
+        query.calls.clear()
+        assert group.forward(["CDG"], ["LIS"], "2030-06-01", "2030-06-08", adults=4).ok and query.calls[0]["adults"] == 4
+        print("   ✅ Numbers, numeric strings and defaults\n")
+
+        query.calls.clear()
+        for adults in (["two", 1], [1, 0], [-1, 1], [1.5, 1], [True, 1], [1, 10], [[2], 1]):
+            result = group.forward(["CDG", "LYS"], ["LIS"], "2030-06-01", "2030-06-08", adults=adults)
+            assert not result.ok and "Invalid number of adults for" in result.error, adults
+        assert "for CDG: 'two'" in group.forward(["CDG", "LYS"], ["LIS"], "2030-06-01", "2030-06-08", adults=["two", 1]).error
+        assert "one number of adults per departure" in group.forward(["CDG", "LYS"], ["LIS"], "2030-06-01", "2030-06-08",
+                                                                    adults=[2]).error
+        assert query.calls == [], "nothing searched for invalid counts"
+    print("   ✅ Invalid counts reported in `error`\n")
+
+    print("✅ Flight tools tested!")
+
+
+if __name__ == "__main__":
+    test_airport_status()
+    test_flight_tools_codes()
+    test_one_way_results()
+    test_group_adults()
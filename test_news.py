@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Offline check of the security news pipeline: near-duplicate clustering
+(tools/news_dedup.py) and relevance ranking (tools/news_ranking.py).
+"""
+from datetime import datetime, timedelta, timezone
+
+from tools.news_dedup import article_text, cluster_articles, hamming, simhash
+from tools.news_ranking import NewsScorer
+
+NAIROBI_WIRE = {
+    "title": "Protests turn violent in Nairobi as police fire tear gas at demonstrators",
+    "description": "Police in the Kenyan capital fired tear gas at thousands of demonstrators protesting "
+                   "against new tax increases on Tuesday.",
+    "source": {"name": "Reuters"},
+}
+NAIROBI_REPUBLISHED = {
+    "title": "Kenya: police fire tear gas as protests turn violent in Nairobi",
+    "description": "Police in the Kenyan capital fired tear gas at thousands of demonstrators protesting "
+                   "against the new tax increases on Tuesday, witnesses said.",
+    "source": {"name": "Daily Aggregator"},
+}
+DANUBE = {
+    "title": "Flooding forces evacuations along the Danube in Hungary",
+    "description": "Authorities in Budapest evacuated riverside districts as the Danube reached record levels "
+                   "after days of heavy rain.",
+}
+KENYA_RATES = {
+    "title": "Kenya central bank holds rates steady amid inflation concerns",
+    "description": "The Central Bank of Kenya kept its benchmark rate unchanged on Tuesday, citing easing "
+                   "inflation and a stable shilling.",
+}
+
+
+def test_simhash():
+    print("🧪 Testing SimHash fingerprints...\n")
+    assert simhash(article_text(NAIROBI_WIRE)) == simhash(article_text(NAIROBI_WIRE)), "fingerprints are stable"
+    assert simhash("The war in the north") == simhash("war north"), "stopwords, case and punctuation are ignored"
+    syndicated = hamming(simhash(article_text(NAIROBI_WIRE)), simhash(article_text(NAIROBI_REPUBLISHED)))
+    distinct = hamming(simhash(article_text(NAIROBI_WIRE)), simhash(article_text(KENYA_RATES)))
+    assert syndicated <= 18 < distinct, (syndicated, distinct)
+    print(f"   ✅ Syndicated copy at distance {syndicated}, other story at {distinct}\n")
+
+
+def test_clustering():
+    print("🧪 Testing near-duplicate clustering...\n")
+    clusters = cluster_articles([NAIROBI_WIRE, DANUBE, NAIROBI_REPUBLISHED, KENYA_RATES], max_distance=18)
+    assert [(article["title"], size) for article, size in clusters] == [
+        (NAIROBI_WIRE["title"], 2), (DANUBE["title"], 1), (KENYA_RATES["title"], 1)
+    ], clusters
+    print("   ✅ Syndicated pair merged, first article kept as representative\n")
+
+    same_title = dict(DANUBE, description="Completely different wording of the same dispatch.")
+    assert [size for _, size in cluster_articles([DANUBE, same_title])] == [2], "identical titles always cluster"
+    assert cluster_articles([{"title": "", "description": None}, DANUBE]) == [(DANUBE, 1)], "empty articles are skipped"
+    assert len(cluster_articles([NAIROBI_WIRE, NAIROBI_REPUBLISHED], max_distance=0)) == 2
+    print("   ✅ Identical titles, empty articles and distance threshold\n")
+
+    print("✅ News deduplication tested!")
+
+
+NOW = datetime(2026, 5, 1, 12, tzinfo=timezone.utc)
+
+
+def _published(days_ago: float) -> str:
+    return (NOW - timedelta(days=days_ago)).isoformat().replace("+00:00", "Z")
+
+
+def test_term_weights():
+    print("🧪 Testing security term weights...\n")
+    scorer = NewsScorer(terms={"attack": 2.5, "curfew": 2.0, "protest": 1.0, "travel advisory": 3.0})
+    assert scorer.term_score({"description": "A curfew after the attack"}) == 4.5
+    assert scorer.term_score({"title": "Curfew declared", "description": "curfew extended"}) == 4.0, \
+        "a term counts once, at its best (title-boosted) weight"
+    assert scorer.term_score({"description": "New travel advisory issued"}) == 3.0, "multi-word terms"
+    assert scorer.term_score({"description": "Counterattack: protestant festival"}) == 0.0, "whole words only"
+    print("   ✅ Distinct terms summed, titles boosted, whole words only\n")
+
+
+def test_inflected_forms():
+    print("🧪 Testing inflected forms...\n")
+    scorer = NewsScorer()
+    for text in ("Hotels attacked overnight", "Two bombings downtown", "Tourists kidnapped near the border",
+                 "Protesters clashed with police", "Residents evacuated", "Rebels threaten the capital"):
+        assert scorer.term_score({"description": text}) > 0, text
+    assert scorer.term_score({"description": "Sunny weekend at the beach"}) == 0.0
+    print("   ✅ Plurals, past tenses and agent nouns match\n")
+
+
+def test_recency_and_sources():
+    print("🧪 Testing recency decay and source weights...\n")
+    scorer = NewsScorer(terms={"riot": 2.0}, half_life_days=7.0)
+    assert scorer.recency_factor({"publishedAt": _published(0)}, NOW) == 1.0
+    assert abs(scorer.recency_factor({"publishedAt": _published(7)}, NOW) - 0.5) < 1e-9
+    assert abs(scorer.recency_factor({"publishedAt": _published(14)}, NOW) - 0.25) < 1e-9
+    assert scorer.recency_factor({"publishedAt": "yesterday"}, NOW) == 0.5 == scorer.recency_factor({}, NOW)
+    assert scorer.recency_factor({"publishedAt": "2026-05-01T12:00:00"}, NOW) == 1.0, "naive dates are UTC"
+
+    assert scorer.source_factor({"source": {"name": "Reuters"}}) == 1.4
+    assert scorer.source_factor({"source": {"name": "BBC  News"}}) == 1.3, "source names are normalised"
+    assert scorer.source_factor({"source": {"name": "Unknown Blog"}}) == 1.0 == scorer.source_factor({})
+
+    article = {"description": "riot", "publishedAt": _published(7), "source": {"name": "Reuters"}}
+    assert abs(scorer.score(article, NOW) - 2.0 * 0.5 * 1.4) < 1e-9
+    assert scorer.score({"description": "calm", "source": {"name": "Reuters"}}, NOW) == 0.0
+    print("   ✅ Terms × recency × source\n")
+
+
+def test_top_k():
+    print("🧪 Testing top-k selection...\n")
+    scorer = NewsScorer(terms={"riot": 2.0, "war": 3.0})
+    today = datetime.now(timezone.utc).isoformat()
+    articles = [
+        {"title": "Local election results", "publishedAt": today},
+        {"description": "riot", "publishedAt": today},
+        {"description": "war", "publishedAt": today},
+        {"description": "riot", "publishedAt": today, "source": {"name": "Reuters"}},
+        {"description": "riot", "publishedAt": today},
+    ]
+    top = scorer.top_k(articles, k=3)
+    assert [article["description"] for article in top] == ["war", "riot", "riot"]
+    assert top[1]["source"]["name"] == "Reuters" and "source" not in top[2], "ties keep the original order"
+    assert all(article["relevance"] > 0 for article in top) and "relevance" not in articles[2], \
+        "results are annotated copies"
+    assert len(scorer.top_k(articles, k=10)) == 4, "irrelevant articles are dropped"
+    print("   ✅ Best first, ties by original order, zero scores dropped\n")
+
+    print("✅ News ranking tested!")
+
+
+if __name__ == "__main__":
+    test_simhash()
+    test_clustering()
+    test_term_weights()
+    test_inflected_forms()
+    test_recency_and_sources()
+    test_top_k()
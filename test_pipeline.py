@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Offline check of the deterministic pipeline (tools/pipeline.py): DAG waves,
+loop-backs, and the WanderMind flow over stub tools.
+"""
+import threading
+import time
+
+from tools.pipeline import DagExecutor, LoopBack, Stage, WanderMindPipeline
+from tools.results import CountryResult, FlightsResult, WeatherResult
+from tools.weather_rules import CHANGEZ, IDEAL
+
+
+class Recorder:
+    """Stage functions that log when they start and end, and how many run at once."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.events = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, value=None):
+        def run(context):
+            with self._lock:
+                self.events.append(("start", name))
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(self.delay)
+            with self._lock:
+                self.active -= 1
+                self.events.append(("end", name))
+            return value if value is not None else name
+        return run
+
+    def started(self, name: str) -> int:
+        return self.events.index(("start", name))
+
+    def ended(self, name: str) -> int:
+        return self.events.index(("end", name))
+
+
+def test_waves():
+    print("🧪 Testing dependency waves...\n")
+    recorder = Recorder()
+    executor = DagExecutor([
+        Stage("a", recorder.stage("a")),
+        Stage("b", recorder.stage("b"), ("a",)),
+        Stage("c", recorder.stage("c"), ("a",)),
+        Stage("d", recorder.stage("d"), ("b", "c")),
+    ])
+    context = executor.run({})
+    assert [context[name] for name in "abcd"] == ["a", "b", "c", "d"]
+    assert set(context["timings"]) == set("abcd") and context["loop"] == 0
+    assert recorder.ended("a") < recorder.started("b") and recorder.ended("a") < recorder.started("c")
+    assert max(recorder.ended("b"), recorder.ended("c")) < recorder.started("d"), "a stage waits for all its dependencies"
+    assert recorder.peak == 2, "independent stages of a wave run concurrently"
+    print("   ✅ Stages run in waves, a wave in parallel\n")
+
+    try:
+        DagExecutor([Stage("b", recorder.stage("b"), ("a",)), Stage("a", recorder.stage("a"))])
+        raise AssertionError("dependencies must be declared first")
+    except ValueError as e:
+        assert "'b'" in str(e) and "a" in str(e)
+    assert executor.descendants("b") == {"b", "d"} and executor.descendants("a") == set("abcd")
+    print("   ✅ Undeclared dependencies rejected, descendants found\n")
+
+
+def test_loop_back():
+    print("🧪 Testing loop-backs...\n")
+    runs = {"source": 0, "side": 0, "check": 0, "final": 0}
+
+    def counted(name, fn=None):
+        def run(context):
+            runs[name] += 1
+            return fn(context) if fn else runs[name]
+        return run
+
+    def check(context):
+        if context["source"] < 2:
+            raise LoopBack("source", "try again")
+        return "accepted"
+
+    executor = DagExecutor([
+        Stage("source", counted("source")),
+        Stage("side", counted("side")),
+        Stage("check", counted("check", check), ("source", "side")),
+        Stage("final", counted("final"), ("check",)),
+    ])
+    context = executor.run({})
+    assert context["check"] == "accepted" and context["loop"] == 1 and context["source"] == 2
+    assert runs == {"source": 2, "side": 1, "check": 2, "final": 1}, f"only the looped stage and its descendants re-run: {runs}"
+    print("   ✅ Looped stage and its descendants re-run, the rest is kept\n")
+
+    def never(context):
+        raise LoopBack("source", "never good enough")
+
+    executor = DagExecutor([Stage("source", counted("source")), Stage("check", never, ("source",))], max_loops=2)
+    try:
+        executor.run({})
+        raise AssertionError("loop-backs are capped")
+    except RuntimeError as e:
+        assert "2 loop-backs" in str(e) and "never good enough" in str(e)
+    print("   ✅ Gives up after max_loops\n")
+
+
+class StubMood:
+    def forward(self, mood):
+        return "rest by the sea"
+
+
+class StubDestinations:
+    """First suggests Reykjavik (bad weather), then Lisbon once Reykjavik is rejected."""
+
+    def __init__(self):
+        self.needs = []
+
+    def forward(self, need):
+        self.needs.append(need)
+        if "Reykjavik" in need:
+            return [{"destination": "Lisbon, Portugal", "departure": {"to_airport": "LIS"}}]
+        return [{"destination": "Reykjavik, Iceland", "departure": {"to_airport": "KEF"}}]
+
+
+class StubWeather:
+    def collect(self, location, date=None, activity_type=None, api_key=None):
+        verdict = CHANGEZ if location.startswith("Reykjavik") else IDEAL
+        return WeatherResult(location=location, date=date, conditions="ciel", temp_min=15, temp_max=24,
+                             verdict=verdict, report=f"Météo {location}")
+
+
+class StubCountry:
+    def forward(self, country, info_type):
+        return CountryResult(country=country, safety="safe")
+
+
+class StubFlights:
+    def __init__(self):
+        self.searches = []
+
+    def forward(self, departure_airport, arrival_airport, outbound_date, return_date):
+        self.searches.append((departure_airport, arrival_airport, outbound_date, return_date))
+        return FlightsResult(origin=departure_airport, destination=arrival_airport, outbound_date=outbound_date,
+                             return_date=return_date)
+
+
+def test_wandermind_flow():
+    print("🧪 Testing the WanderMind flow...\n")
+    destinations, flights = StubDestinations(), StubFlights()
+    pipeline = WanderMindPipeline(StubMood(), destinations, StubWeather(), StubCountry(), flights,
+                                  model=lambda prompt: "Bon voyage!")
+    assert "departure airport" in WanderMindPipeline.check_inputs("tired", "", "2030-06-01")
+    assert pipeline.run("tired", "", "2030-06-01").context == {}
+
+    run = pipeline.run("tired", "CDG", "2030-06-01")
+    assert run.context["loop"] == 1 and run.context["rejected"] == ["Reykjavik, Iceland"]
+    assert "Do not suggest: Reykjavik, Iceland" in destinations.needs[-1]
+    assert run.context["flights"]["candidate"]["destination"] == "Lisbon, Portugal"
+    assert flights.searches == [("CDG", "LIS", "2030-06-01", "2030-06-08")], "exact dates from the user, trip_days later"
+    assert run.message.startswith("Bon voyage!") and "📍 **Lisbon, Portugal**" in run.message
+    assert "No flights found for the suggested destinations." in run.message
+    print("   ✅ Bad weather loops back to new destinations\n")
+
+    print("✅ Pipeline tested!")
+
+
+if __name__ == "__main__":
+    test_waves()
+    test_loop_back()
+    test_wandermind_flow()
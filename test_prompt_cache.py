@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Offline check of prompt caching: CachingLiteLLMModel runs against a stub
+LiteLLM client that records the request and answers with a canned usage block.
+"""
+from types import SimpleNamespace
+
+from smolagents.models import ChatMessage, MessageRole
+
+from tools import usage
+from tools.prompt_cache import CACHE_CONTROL, CachingLiteLLMModel
+from tools.resilience import BudgetExceededError
+
+
+class StubLiteLLM:
+    """Stands in for the `litellm` module: records calls, replays a cache hit after the first one."""
+
+    def __init__(self):
+        self.requests = []
+
+    def completion(self, **kwargs):
+        self.requests.append(kwargs)
+        first = len(self.requests) == 1
+        usage = SimpleNamespace(
+            prompt_tokens=3200,
+            completion_tokens=50,
+            cache_creation_input_tokens=3000 if first else 0,
+            cache_read_input_tokens=0 if first else 3000,
+        )
+        message = SimpleNamespace(role="assistant", content="Thought: ok", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class StubbedModel(CachingLiteLLMModel):
+    def create_client(self):
+        return StubLiteLLM()
+
+
+def test_prompt_cache():
+    print("🧪 Testing prompt cache markers...\n")
+    model = StubbedModel(model_id="claude-3-opus-20240229")
+    messages = [
+        ChatMessage(role=MessageRole.SYSTEM, content=[{"type": "text", "text": "You are WanderMind..."}]),
+        ChatMessage(role=MessageRole.USER, content=[{"type": "text", "text": "New task: I feel tired"}]),
+    ]
+
+    for _ in range(2):
+        model.generate(messages)
+
+    for request in model.client.requests:
+        system, user = request["messages"]
+        assert system["content"][-1].get("cache_control") == CACHE_CONTROL, system
+        assert all("cache_control" not in block for block in user["content"]), user
+    assert "cache_control" not in messages[0].content[-1], "caller's messages must not be modified"
+    print("   ✅ Cache marker emitted on the system prefix only")
+
+    totals = model.cache_stats.totals()
+    assert totals["cache_write_tokens"] == 3000 and totals["cache_read_tokens"] == 3000, totals
+    assert model.last_cache_read_tokens == 3000 and model.last_cache_write_tokens == 0
+    print(f"   ✅ Cache usage recorded: {totals} (hit ratio {model.cache_stats.hit_ratio:.0%})\n")
+
+    model.cache_prompt = False
+    model.generate(messages)
+    assert "cache_control" not in model.client.requests[-1]["messages"][0]["content"][-1]
+    print("   ✅ No marker when caching is disabled\n")
+
+    session = usage.Session(budgets={"anthropic": 1})
+    with usage.bound(session):
+        model.generate(messages)
+        try:
+            model.generate(messages)
+            raise AssertionError("the session allows one model call")
+        except BudgetExceededError:
+            pass
+    totals = session.totals()["anthropic"]
+    assert totals["calls"] == 1 and totals["input_tokens"] == 3200 and totals["output_tokens"] == 50, totals
+    assert totals["denied"] == 1 and len(model.client.requests) == 4
+    assert session.cache_tokens("anthropic") == (3000, 0), "cache usage is also kept per session"
+    print("   ✅ Model calls go through the provider budget of the session\n")
+
+    print("✅ Prompt cache tested!")
+
+
+if __name__ == "__main__":
+    test_prompt_cache()
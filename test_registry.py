@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Offline check of lazy loading: the tool registry (tools/registry.py), its
+startup profile and the shared API clients (tools/clients.py).
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from tools import clients
+from tools.registry import StartupProfile, ToolRegistry
+
+HEAVY_SDKS = ("anthropic", "litellm", "duckduckgo_search")
+
+
+def test_startup_profile():
+    print("🧪 Testing startup profile...\n")
+    profile = StartupProfile()
+    assert "nothing loaded yet" in profile.report()
+    with profile.timed("fast"):
+        pass
+    try:
+        with profile.timed("failing"):
+            time.sleep(0.02)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert [label for label, _ in profile.entries()] == ["fast", "failing"], "failed steps are timed too"
+    report = profile.report().splitlines()
+    assert report[0].startswith("⏱️ Startup profile (") and "failing" in report[1], "slowest first"
+    print("   ✅ Timings recorded, slowest first\n")
+
+
+def test_lazy_registry():
+    print("🧪 Testing lazy tool registry...\n")
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "lazy_stub_tool.py"), "w") as f:
+            f.write("import time\n"
+                    "created = []\n"
+                    "class StubTool:\n"
+                    "    def __init__(self, label='stub'):\n"
+                    "        time.sleep(0.05)\n"
+                    "        created.append(label)\n"
+                    "        self.label = label\n")
+        sys.path.insert(0, directory)
+        try:
+            profile = StartupProfile()
+            registry = ToolRegistry(profile)
+            registry.register("stub", "lazy_stub_tool:StubTool")
+            registry.register("stub_factory", "lazy_stub_tool:StubTool",
+                              lambda module, **kwargs: module.StubTool(label="from factory", **kwargs))
+            assert "lazy_stub_tool" not in sys.modules, "registering imports nothing"
+
+            tool = registry.create("stub", label="first")
+            assert tool.label == "first" and "lazy_stub_tool" in sys.modules
+            assert registry.create("stub_factory").label == "from factory"
+            labels = [label for label, _ in profile.entries()]
+            assert labels[:2] == ["import lazy_stub_tool", "create stub"] and "create stub_factory" in labels
+
+            shared = []
+            threads = [threading.Thread(target=lambda: shared.append(registry.get("stub"))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len({id(tool) for tool in shared}) == 1, "concurrent get() builds one shared instance"
+            assert sys.modules["lazy_stub_tool"].created == ["first", "from factory", "stub"]
+
+            try:
+                registry.create("missing")
+                raise AssertionError("unknown tools are reported")
+            except KeyError as e:
+                assert "stub" in str(e)
+        finally:
+            sys.path.remove(directory)
+            sys.modules.pop("lazy_stub_tool", None)
+    print("   ✅ Imported and built on first use, shared once\n")
+
+
+def test_no_heavy_import_at_startup():
+    print("🧪 Testing that tools load without their SDKs...\n")
+    script = ("import sys\n"
+              "from tools.registry import registry\n"
+              "tools = [registry.create(name) for name in registry.names()]\n"
+              f"print(','.join(m for m in {HEAVY_SDKS!r} if m in sys.modules))\n")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True)
+    assert output.stdout.strip() == "", f"imported while building the tools: {output.stdout.strip()}"
+    print("   ✅ No SDK imported until a tool calls out\n")
+
+
+def test_shared_anthropic_client():
+    print("🧪 Testing the shared Anthropic client...\n")
+    saved, saved_key = clients._anthropic, os.environ.get("ANTROPIC_KEY")
+    clients._anthropic = None
+    try:
+        os.environ.setdefault("ANTROPIC_KEY", "test-key")
+        clients_seen = []
+        threads = [threading.Thread(target=lambda: clients_seen.append(clients.anthropic_client())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client = clients_seen[0]
+        assert all(other is client for other in clients_seen), "one client for every tool and session"
+        assert client.max_retries == 0, "retries are left to tools/resilience.py"
+        assert client.timeout == float(os.getenv("ANTHROPIC_TIMEOUT", 60))
+    finally:
+        clients._anthropic = saved
+        if saved_key is None:
+            os.environ.pop("ANTROPIC_KEY", None)
+    print("   ✅ Built once, no SDK retries, bounded timeout\n")
+
+    print("✅ Lazy loading tested!")
+
+
+if __name__ == "__main__":
+    test_startup_profile()
+    test_lazy_registry()
+    test_no_heavy_import_at_startup()
+    test_shared_anthropic_client()
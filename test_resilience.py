@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Offline check of the resilience layer: token bucket, circuit breaker and the
+half-open probe of Provider.call, with a stub upstream function.
+"""
+import threading
+import time
+
+import requests
+
+from tools import cancellation
+
+from tools.resilience import (CircuitBreaker, Provider, ProviderPolicy, ProviderUnavailableError, TokenBucket,
+                              request_key)
+
+
+def test_token_bucket():
+    print("🧪 Testing token bucket...\n")
+    bucket = TokenBucket(rate=20.0, capacity=2)
+    assert bucket.try_acquire() == 0.0 and bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() > 0, "an empty bucket must ask the caller to wait"
+    assert not bucket.acquire(timeout=0.0)
+    assert bucket.acquire(timeout=0.5), "the bucket refills over time"
+    bucket.deposit(10)
+    assert bucket.try_acquire() == 0.0 and bucket.try_acquire() == 0.0 and bucket.try_acquire() > 0, \
+        "deposits are capped at capacity"
+    print("   ✅ Acquire, refill and capacity\n")
+
+    slow = TokenBucket(rate=0.1, capacity=1, initial=0)
+    token = cancellation.CancelToken()
+    threading.Timer(0.05, token.cancel).start()
+    start = time.monotonic()
+    try:
+        with cancellation.bound(token):
+            slow.acquire(timeout=30)
+        raise AssertionError("the wait must be cancelled")
+    except cancellation.Cancelled:
+        pass
+    assert time.monotonic() - start < 1, "a cancelled request stops waiting for a token"
+    print("   ✅ Waiting for a token is cancellable\n")
+
+
+def test_circuit_breaker():
+    print("🧪 Testing circuit breaker...\n")
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow(), "one failure keeps the circuit closed"
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow(), "a single probe at a time while half-open"
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN, "a failed probe reopens the circuit"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    print("   ✅ Opens, half-opens with one probe, closes on success\n")
+
+
+def test_probe_released_when_rate_limited():
+    print("🧪 Testing half-open probe and local rate limit...\n")
+    provider = Provider("stub", ProviderPolicy(rate=0.01, burst=1, max_attempts=1, max_wait=0.0,
+                                               failure_threshold=1, reset_timeout=0.05))
+
+    def down():
+        raise requests.exceptions.ConnectionError("down")
+
+    try:
+        provider.call(down)
+    except requests.exceptions.ConnectionError:
+        pass
+    assert provider.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    # The probe is granted, then the (empty) bucket refuses the call
+    try:
+        provider.call(lambda: "ok")
+        raise AssertionError("the bucket is empty")
+    except ProviderUnavailableError as exc:
+        assert "rate limit" in exc.reason, exc.reason
+    assert provider.breaker.allow(), "the probe must be given back when the call was never sent"
+    provider.breaker.release()
+
+    provider.bucket.deposit(1)
+    assert provider.call(lambda: "ok") == "ok"
+    assert provider.breaker.state == CircuitBreaker.CLOSED
+    print("   ✅ Probe released, next call closes the circuit\n")
+
+
+def test_non_retryable_errors():
+    print("🧪 Testing non-retryable errors and the half-open probe...\n")
+    provider = Provider("stub", ProviderPolicy(rate=100.0, burst=10, max_attempts=1, max_wait=0.0,
+                                               failure_threshold=1, reset_timeout=0.05))
+
+    def down():
+        raise requests.exceptions.ConnectionError("down")
+
+    def broken():
+        raise ValueError("cannot parse the reply")
+
+    def not_found():
+        response = requests.Response()
+        response.status_code = 404
+        raise requests.exceptions.HTTPError("404 Not Found", response=response)
+
+    for fn, expected in ((down, requests.exceptions.ConnectionError), (broken, ValueError)):
+        try:
+            provider.call(fn)
+        except expected:
+            pass
+        if fn is down:
+            time.sleep(0.06)
+    assert provider.breaker.state == CircuitBreaker.HALF_OPEN, "a local error is not a provider success"
+    assert provider.breaker.allow(), "the probe is given back"
+    provider.breaker.release()
+
+    try:
+        provider.call(not_found)
+    except requests.exceptions.HTTPError:
+        pass
+    assert provider.breaker.state == CircuitBreaker.CLOSED, "an HTTP 4xx reply shows the provider is up"
+    print("   ✅ Only real 4xx replies close the circuit\n")
+
+
+def test_request_key():
+    print("🧪 Testing coalescing keys...\n")
+    url = "http://api.openweathermap.org/geo/1.0/direct"
+    key = request_key("openweathermap", url, {"q": "Nice", "appid": "key-a"})
+    assert key == request_key("openweathermap", url.upper(), {"Q": " nice ", "APPID": "key-a"}), "case and spacing ignored"
+    assert key != request_key("openweathermap", url, {"q": "Nice", "appid": "key-b"}), "different keys never share a call"
+    assert key != request_key("openweathermap", url, {"q": "Nice"})
+    assert "key-a" not in repr(key), "secrets only appear as a digest"
+    print("   ✅ Normalised parameters, secrets hashed\n")
+
+    print("✅ Resilience layer tested!")
+
+
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_circuit_breaker()
+    test_probe_released_when_rate_limited()
+    test_non_retryable_errors()
+    test_request_key()
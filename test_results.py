@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Offline check of the structured tool results (tools/results.py): the
+summary the agent sees, the markdown rendered for the user, and country
+reports rebuilt from the JSON sections of the SQLite store.
+"""
+import json
+import os
+import tempfile
+import time
+
+from tools.country_info_tool import CountryInfoTool
+from tools.country_report_cache import CountryReportCache
+from tools.country_report_store import CountryReportStore
+from tools.flight_search import ONE_WAY, ROUND_TRIP, Itinerary, Layover, Segment
+from tools.results import (CountryResult, FlightsResult, GroupFlightsResult, GroupLeg, GroupOption, WeatherComparison,
+                           WeatherResult, render)
+
+
+def _flight(origin, destination, departure, arrival, price=None, via=None, duration=150):
+    """Itinerary departing and arriving on 2030-06-01 (one connection when `via` is given)."""
+    if via:
+        segments = [Segment(origin, f"2030-06-01 {departure}", via, "2030-06-01 12:00", 60, "TAP", "TP 441"),
+                    Segment(via, "2030-06-01 13:00", destination, f"2030-06-01 {arrival}", 60, "TAP", "TP 1234")]
+        return Itinerary(segments, [Layover(via, duration=60)], total_duration=duration, price=price)
+    return Itinerary([Segment(origin, f"2030-06-01 {departure}", destination, f"2030-06-01 {arrival}", duration,
+                              "TAP", "TP 433")], total_duration=duration, price=price)
+
+
+LISBON = WeatherResult(location="Lisbon", date="2030-06-01", conditions="ciel dégagé", temp_min=17.6, temp_max=24.2,
+                       humidity=60, wind_max=4.4, rain_mm=0.0, activity="plage", verdict="IDÉAL",
+                       recommendation="🎯 **Recommandation plage**\nIDÉAL — soleil et mer calme, **crème solaire** conseillée.",
+                       report="🌤️ **Météo à Lisbon**")
+
+
+def test_weather_results():
+    print("🧪 Testing weather results...\n")
+    assert LISBON.temperatures == "18–24" and LISBON.ok
+    assert str(LISBON) == ("Lisbon (2030-06-01): ciel dégagé, 18–24°C, humidity 60 %, wind 4 m/s, rain 0.0 mm"
+                           " | plage: IDÉAL — soleil et mer calme, crème solaire conseillée."), str(LISBON)
+    assert LISBON.render() == LISBON.report and repr(LISBON) == str(LISBON)
+
+    today = WeatherResult(location="Oslo", conditions="pluie", temp_min=12.2, temp_max=11.8)
+    assert str(today) == "Oslo (today): pluie, 12°C, humidity ?, wind ?, rain ?", "missing measures and same temperatures"
+    failed = WeatherResult(location="Atlantis", error="Location not found")
+    assert not failed.ok and str(failed) == "Atlantis: Location not found" and failed.render() == "❌ Location not found"
+    print("   ✅ Summary, report and errors\n")
+
+    comparison = WeatherComparison([LISBON, failed])
+    assert len(comparison) == 2 and comparison[0] is LISBON and list(comparison) == [LISBON, failed]
+    assert str(comparison) == f"- {LISBON}\n- Atlantis: Location not found"
+    table = comparison.render().splitlines()
+    assert table[0] == "🌤️ **Comparaison météo**" and table[2].startswith("| Destination | Date |")
+    assert table[4] == "| Lisbon | 2030-06-01 | Ciel Dégagé | 18–24 | 4 m/s | 0.0 mm | IDÉAL |"
+    assert table[5] == "| Atlantis | aujourd'hui | ❌ Location not found | – | – | – | – |"
+    assert comparison.render().endswith(f"**Lisbon**\n{LISBON.recommendation}"), "recommendations follow the table"
+    assert WeatherComparison([], error="No location given").render() == "❌ No location given"
+    print("   ✅ Comparison table, one row per destination\n")
+
+
+def test_flight_results():
+    print("🧪 Testing flight results...\n")
+    outbound = _flight("CDG", "LIS", "09:00", "14:00", price=420, via="OPO", duration=300)
+    inbound = _flight("LIS", "CDG", "18:00", "21:30", price=420, duration=150)
+    alternative = _flight("CDG", "LIS", "07:00", "08:30", price=510)
+    trip = FlightsResult("CDG", "LIS", "2030-06-01", "2030-06-08", ROUND_TRIP, 420, outbound=outbound, inbound=inbound,
+                         alternatives=[alternative])
+    assert trip.found and str(trip) == (
+        "CDG→LIS 2030-06-01/2030-06-08, round trip, total $420 | out: CDG 09:00 → LIS 14:00, 5h 0m, 1 stop, TAP"
+        " | back: LIS 18:00 → CDG 21:30, 2h 30m, direct, TAP | 1 other outbound options"), str(trip)
+    rendered = trip.render()
+    assert "✈️ Outbound Flight:\nFrom CDG at 2030-06-01 09:00 → LIS at 2030-06-01 14:00 | Duration: 5h 0m, 1 stop (OPO 1h 0m)" in rendered
+    assert "  • OPO 13:00 → LIS 14:00 · TAP TP 1234 · 1h 0m" in rendered, "connections list their segments"
+    assert "Price:" not in rendered.split("💶")[0], "round-trip fares are only shown as the total"
+    assert "💶 Total price (round trip): $420" in rendered
+    assert "🔁 Other outbound options (round-trip price):\n- CDG 07:00 → LIS 08:30, 2h 30m, direct, TAP — $510" in rendered
+
+    legs = FlightsResult("CDG", "LIS", "2030-06-01", "2030-06-08", ONE_WAY, 350, outbound=outbound, inbound=None)
+    assert ", one-way legs, total $350 |" in str(legs) and str(legs).endswith("| back: no flight")
+    assert "🛬 Inbound Flight:\nNo flights found." in legs.render() and "Price: $420" in legs.render()
+    assert "Total price (both one-way legs): $350" in legs.render()
+
+    none = FlightsResult("CDG", "LIS", "2030-06-01", "2030-06-08")
+    assert not none.found and none.ok and str(none) == "CDG→LIS 2030-06-01/2030-06-08: no flights found"
+    failed = FlightsResult("CDG", "XXX", "2030-06-01", error="serpapi temporarily unavailable: circuit open")
+    assert str(failed) == "CDG→XXX 2030-06-01: serpapi temporarily unavailable: circuit open"
+    assert failed.render() == "❌ serpapi temporarily unavailable: circuit open"
+    print("   ✅ Round trips, one-way legs, no flights and errors\n")
+
+    lisbon = GroupOption("LIS", [GroupLeg("CDG", outbound, 420), GroupLeg("BRU", _flight("BRU", "LIS", "10:00", "12:40"), 380)],
+                         total_cost=800, spread=80, worst_duration=300)
+    porto = GroupOption("OPO", [GroupLeg("CDG", _flight("CDG", "OPO", "09:00", "11:00"), 300)], missing=["BRU"],
+                        total_cost=300, spread=0, worst_duration=120)
+    group = GroupFlightsResult(["CDG", "BRU"], [lisbon, porto])
+    assert group.best is lisbon and str(group) == (
+        "Group from CDG, BRU, best first:\n"
+        "1. LIS: total $800, arrival spread 1h 20m, worst duration 5h 0m\n"
+        "2. OPO: total $300, arrival spread 0h 0m, worst duration 2h 0m, missing BRU"), str(group)
+    rendered = group.render()
+    assert "| 1 | LIS | $800 | 1h 20m | 5h 0m | – |" in rendered and "| 2 | OPO | $300 | 0h 0m | 2h 0m | BRU |" in rendered
+    assert "**OPO**\n- CDG 09:00 → OPO 11:00, 2h 30m, direct, TAP — $300\n- BRU: No flights found." in rendered
+    assert rendered.endswith("all its travellers included.")
+    empty = GroupFlightsResult(["CDG"], error="At least one departure airport and one arrival airport are required.")
+    assert empty.best is None and str(empty) == empty.error and empty.render() == f"❌ {empty.error}"
+    print("   ✅ Group ranking table and legs\n")
+
+
+FRANCE = CountryResult(
+    country="France", updated="06/01/2030 09:00", safety="caution",
+    safety_description="Strikes expected in Paris", safety_advice="Stay informed, avoid demonstrations",
+    events=["Transport strike on Tuesday", "Heatwave in the south"],
+    holidays=[("Bastille Day", "2030-07-14"), ("Assumption", "2030-08-15")],
+    currency="EUR", languages=["French"], region="Europe",
+    politics=["Parliament debates pension reform"],
+    recommendation="🎯 **Final recommendation**\nGo, but plan around the strikes.",
+)
+
+
+def test_country_results():
+    print("🧪 Testing country results...\n")
+    assert str(FRANCE) == (
+        "France | safety: caution (Stay informed, avoid demonstrations) | currency EUR, languages French"
+        " | holidays: Bastille Day (2030-07-14), Assumption (2030-08-15) | 2 current events | 1 political headlines"
+        " | advice: Go, but plan around the strikes."), str(FRANCE)
+    rendered = FRANCE.render()
+    assert rendered.startswith("🌍 **Contextual Information for France**\n*Updated: 06/01/2030 09:00*\n\n🛡️ **Security")
+    for text in ("🟡 **Level determined by real-time analysis**", "🎯 **Recommendation: Stay informed, avoid demonstrations**",
+                 "📅 **Current Events and Context**\n• Transport strike on Tuesday\n• Heatwave in the south",
+                 "• Bastille Day (2030-07-14)", "💰 Currency: EUR", "🏛️ **Political Context**\n• Parliament debates"):
+        assert text in rendered, text
+    assert rendered.endswith("\n\n" + FRANCE.recommendation)
+    print("   ✅ Every section, then the recommendation\n")
+
+    sparse = CountryResult(country="Nauru", info_type="all", updated="today", safety="safe", holidays=None,
+                           missing=["events"], change_destination=True)
+    assert str(sparse) == "Nauru — CHANGE DESTINATION | safety: safe | unavailable: events"
+    rendered = sparse.render()
+    for text in ("📅 **Events**: Error during retrieval", "🎉 **Holidays**: Information not available for Nauru",
+                 "✈️ **Travel**: Information not available for Nauru", "🏛️ **Politics**: Stable situation for Nauru"):
+        assert text in rendered, text
+    no_holidays = CountryResult(country="Nauru", info_type="holidays", updated="today")
+    assert no_holidays.sections == ("holidays",)
+    assert no_holidays.render().endswith("🎉 **Holidays and Seasonal Events**\n**No major holidays scheduled in the coming months**")
+    failed = CountryResult("Atlantis", error="Country not recognized: 'Atlantis'")
+    assert str(failed) == failed.error and failed.render() == f"❌ {failed.error}" and not failed.ok
+    print("   ✅ Missing, empty and single sections\n")
+
+    assert render(FRANCE) == FRANCE.render() and render([LISBON, failed]) == f"{LISBON.report}\n\n❌ {failed.error}"
+    assert render("plain text") == "plain text" and render([]) == "[]"
+    assert FRANCE.to_dict()["holidays"] == [("Bastille Day", "2030-07-14"), ("Assumption", "2030-08-15")]
+    print("   ✅ render() helper and to_dict()\n")
+
+
+class StoredCountryInfo(CountryInfoTool):
+    """CountryInfoTool serving sections from the store only: live sections are reported as failed."""
+
+    def __init__(self, store: CountryReportStore):
+        super().__init__(report_cache=CountryReportCache(refresh_interval=3600), report_store=store)
+        self.fetched = []
+
+    @property
+    def claude_client(self):
+        return object()
+
+    def _fetch_section(self, country, section, *args):
+        self.fetched.append(section)
+        return None
+
+
+def _stored_sections(report: CountryResult) -> dict:
+    """The JSON fields CountryInfoTool stores for each section of `report`."""
+    fields = report.to_dict()
+    return {
+        "security": {name: fields[name] for name in ("safety", "safety_description", "safety_advice")},
+        "events": {"events": fields["events"]},
+        "holidays": {"holidays": fields["holidays"]},
+        "travel": {name: fields[name] for name in ("currency", "languages", "region")},
+        "politics": {"politics": fields["politics"]},
+        "recommendation": {"recommendation": fields["recommendation"]},
+    }
+
+
+def test_rebuild_from_store():
+    print("🧪 Testing country reports rebuilt from the store...\n")
+    with tempfile.TemporaryDirectory() as directory:
+        store = CountryReportStore(os.path.join(directory, "reports.sqlite"))
+        fetched_at = time.time() - 600
+        for section, fields in _stored_sections(FRANCE).items():
+            store.put("France", section, json.dumps(fields, ensure_ascii=False), fetched_at)
+        tool = StoredCountryInfo(store)
+        try:
+            report = tool.forward("france")
+            assert tool.fetched == [], "every section comes from the store"
+            assert report.ok and not report.missing and report.holidays == FRANCE.holidays, "holidays are tuples again"
+            assert {**report.to_dict(), "updated": None} == {**FRANCE.to_dict(), "updated": None}
+            assert report.render().split("\n", 2)[2] == FRANCE.render().split("\n", 2)[2]
+            assert str(report) == str(FRANCE) and not report.change_destination
+            print("   ✅ Same fields, summary and markdown as the original report\n")
+
+            store.put("Spain", "security", json.dumps({"safety": "danger", "safety_description": "Wildfires",
+                                                       "safety_advice": "CHANGE DESTINATION"}), time.time())
+            store.put("Spain", "events", "📅 **Events**: legacy markdown section", time.time())
+            store.put("Spain", "politics", json.dumps({"politics": []}), time.time() - 2 * 86400)
+            spain = tool.forward("Spain", "all")
+            assert spain.change_destination and spain.safety == "danger"
+            assert "events" in tool.fetched and "politics" in tool.fetched, "legacy and stale sections are fetched live"
+            assert spain.missing == ["events", "holidays", "travel", "politics", "recommendation"]
+            assert "📅 **Events**: Error during retrieval" in spain.render()
+            print("   ✅ Legacy markdown and stale sections are not reused\n")
+        finally:
+            tool.report_cache.stop()
+            store.close()
+
+    print("✅ Tool results tested!")
+
+
+if __name__ == "__main__":
+    test_weather_results()
+    test_flight_results()
+    test_country_results()
+    test_rebuild_from_store()
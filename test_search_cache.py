@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Offline check of the web search cache (tools/search_cache.py) and of the
+batch search merging (tools/web_search.py), over a stub DuckDuckGo client.
+"""
+import threading
+import time
+
+from tools.search_cache import SearchCache
+from tools.web_search import DuckDuckGoSearchTool, WebSearchBatchTool
+
+RESULTS = {
+    "lisbon": [
+        {"title": "Visit Lisbon", "href": "https://visitlisbon.com/", "body": "Official guide"},
+        {"title": "Lisbon trams", "href": "https://example.com/trams", "body": "Tram 28"},
+        {"title": "Alfama", "href": "https://example.com/alfama", "body": "Old town"},
+    ],
+    "porto": [
+        {"title": "Visit Porto", "href": "https://visitporto.travel", "body": "Official guide"},
+        {"title": "Lisbon or Porto?", "href": "https://VISITLISBON.com#compare", "body": "Comparison"},
+    ],
+}
+
+
+class StubDDGS:
+    def __init__(self):
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def text(self, query, max_results=10):
+        with self._lock:
+            self.queries.append(query)
+        if query == "broken":
+            raise RuntimeError("ratelimit")
+        return RESULTS.get(query.casefold(), [])[:max_results]
+
+
+class StubBatchSearch(WebSearchBatchTool):
+    def __init__(self, client: StubDDGS, **kwargs):
+        super().__init__(cache=SearchCache(), **kwargs)
+        self.client = client
+
+    @property
+    def ddgs(self):
+        return self.client
+
+
+def test_ttl():
+    print("🧪 Testing search cache TTL...\n")
+    cache, calls = SearchCache(ttl=0.1), []
+
+    def search():
+        calls.append(1)
+        return ["result"]
+
+    assert cache.get("Lisbon trams", 5, search) == ["result"]
+    assert cache.get("  lisbon   TRAMS ", 5, search) == ["result"], "case and whitespace are folded"
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (1, 1)
+    cache.get("Lisbon trams", 10, search)
+    assert len(calls) == 2, "the number of results is part of the key"
+    time.sleep(0.12)
+    cache.get("Lisbon trams", 5, search)
+    assert len(calls) == 3, "expired results are fetched again"
+    print("   ✅ Normalized keys, reused within the TTL\n")
+
+    assert cache.get("nothing", 5, lambda: []) == [] and cache.get("nothing", 5, search) == ["result"], \
+        "empty results are not cached"
+    cache.get("Lisbon trams", 5, search, options={"region": "pt-pt"})
+    cache.get("Lisbon trams", 5, search, options={"region": "fr-fr"})
+    assert len(calls) == 6, "client options are part of the key"
+    cache.get("Lisbon trams", 5, search, options={"region": "pt-pt"})
+    assert len(calls) == 6
+
+    small = SearchCache(max_entries=2)
+    for query in ("a", "b", "a", "c"):
+        small.get(query, 5, search)
+    calls.clear()
+    small.get("a", 5, search)
+    small.get("b", 5, search)
+    assert len(calls) == 1, "the least recently used search is dropped"
+    print("   ✅ Empty results, client options and size bound\n")
+
+
+def test_singleflight():
+    print("🧪 Testing concurrent identical searches...\n")
+    cache, calls = SearchCache(), []
+
+    def slow_search():
+        calls.append(1)
+        time.sleep(0.1)
+        return ["shared"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("Porto", 5, slow_search))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [["shared"]] * 6 and len(calls) == 1, f"{len(calls)} upstream searches"
+    print("   ✅ One upstream search for concurrent callers\n")
+
+
+def test_tool_options():
+    print("🧪 Testing DDGS options in the tool cache key...\n")
+    cache = SearchCache()
+    tools = [DuckDuckGoSearchTool(cache=cache, region=region) for region in ("pt-pt", "fr-fr", "pt-pt")]
+    clients = [StubDDGS() for _ in tools]
+    for tool, client in zip(tools, clients):
+        tool._local.ddgs = client
+        tool.search("Lisbon")
+    assert [len(client.queries) for client in clients] == [1, 1, 0], "only identical settings share results"
+    print("   ✅ Tools with other settings search for themselves\n")
+
+
+def test_batch_merging():
+    print("🧪 Testing batch search merging...\n")
+    client = StubDDGS()
+    tool = StubBatchSearch(client)
+    output = tool.forward(["Lisbon", " Porto ", "lisbon ", "Lisbon", "", "broken"])
+    assert sorted(query.casefold() for query in client.queries) == ["broken", "lisbon", "porto"], \
+        "duplicate queries are searched once"
+
+    hrefs = [line.split("](")[1].rstrip(")") for line in output.splitlines() if line.startswith("[")]
+    assert hrefs == ["https://visitlisbon.com/", "https://visitporto.travel", "https://example.com/trams",
+                     "https://example.com/alfama"], f"rankings are interleaved: {hrefs}"
+    assert "_Queries: Lisbon, lisbon, Porto_" in output, "a URL found by several queries is listed once"
+    assert "Lisbon or Porto?" not in output, "the first (best ranked) copy is kept"
+    assert output.endswith("_Failed queries: broken_")
+    print("   ✅ Interleaved, URLs merged, failures listed\n")
+
+    try:
+        tool.forward(["broken", "nowhere"])
+        raise AssertionError("no results is an error")
+    except Exception as e:
+        assert "No results found" in str(e) and "broken: ratelimit" in str(e)
+    try:
+        tool.forward(["  ", ""])
+        raise AssertionError("empty queries are rejected")
+    except Exception as e:
+        assert "At least one query" in str(e)
+    print("   ✅ Errors when nothing is found\n")
+
+    print("✅ Search cache tested!")
+
+
+if __name__ == "__main__":
+    test_ttl()
+    test_singleflight()
+    test_tool_options()
+    test_batch_merging()
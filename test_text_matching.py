@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Offline check of the keyword automaton (tools/text_matcher.py) and of the
+activity gazetteer built on it (tools/activity_gazetteer.py).
+"""
+import os
+import tempfile
+
+from tools import activity_gazetteer
+from tools.text_matcher import KeywordAutomaton, normalize_text
+
+
+def test_normalize_text():
+    print("🧪 Testing text normalisation...\n")
+    assert normalize_text("Val-d'Isère") == "val d isere"
+    assert normalize_text("  Saint–Tropez,  FRANCE ") == "saint–tropez france"
+    assert normalize_text("São Paulo (SP)") == "sao paulo sp"
+    print("   ✅ Case, accents and separators\n")
+
+
+def test_word_boundaries():
+    print("🧪 Testing whole-word matching...\n")
+    automaton = KeywordAutomaton([("nice", "nice"), ("bali", "bali"), ("new york", "ny"), ("york", "york")]).compile()
+
+    def payloads(text):
+        return [payload for _, _, payload in automaton.iter_matches(text)]
+
+    assert payloads("Venice") == [], "no match inside a longer word"
+    assert payloads("Balinese food") == []
+    assert payloads("Nice, France") == ["nice"]
+    assert payloads("Bali.") == ["bali"]
+    assert payloads("New-York") == ["ny", "york"], "suffix patterns are reported through failure links"
+    assert payloads("Newyork") == []
+    assert automaton.longest_match("a week in new york")[2] == "ny", "the longest match wins"
+    assert automaton.longest_match("Venice") is None
+
+    try:
+        automaton.add("paris", "paris")
+        raise AssertionError("a compiled automaton is frozen")
+    except RuntimeError:
+        pass
+    print("   ✅ Boundaries, overlapping patterns and longest match\n")
+
+
+def test_first_definition_wins():
+    print("🧪 Testing duplicate patterns...\n")
+    automaton = KeywordAutomaton([("Nice", "plage"), ("nice", "ville")]).compile()
+    assert automaton.size == 1 and automaton.longest_match("Nice")[2] == "plage"
+    print("   ✅ Earlier definitions take priority\n")
+
+
+def test_gazetteer():
+    print("🧪 Testing activity gazetteer...\n")
+    cases = {
+        "Nice": "plage",
+        "Nice, France": "plage",
+        "Chamonix": "ski",
+        "Chamonix-Mont-Blanc": "ski",
+        "Val d'Isere": "ski",
+        "Paris": "ville",
+        "Venice": "ville",
+        "Venice Beach": "plage",
+        "Venise": "ville",
+        "Bali": "plage",
+        "Balinese village": None,
+        "Nicely done": None,
+        "Atlantis": None,
+    }
+    for location, activity in cases.items():
+        assert activity_gazetteer.detect_activity(location) == activity, \
+            f"{location}: {activity_gazetteer.detect_activity(location)} instead of {activity}"
+    print(f"   ✅ {len(cases)} locations\n")
+
+    # Extra gazetteers are read first and override the bundled one
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+        f.write("# test\n[ville]\nnice\n\n[ski]\nAtlantis\n")
+    try:
+        automaton = activity_gazetteer.build_automaton([f.name, activity_gazetteer.DEFAULT_GAZETTEER_PATH])
+        assert automaton.longest_match("Nice")[2] == "ville"
+        assert automaton.longest_match("Atlantis")[2] == "ski"
+        assert automaton.longest_match("Chamonix")[2] == "ski"
+    finally:
+        os.unlink(f.name)
+    print("   ✅ Extra gazetteers take priority\n")
+
+    print("✅ Text matching tested!")
+
+
+if __name__ == "__main__":
+    test_normalize_text()
+    test_word_boundaries()
+    test_first_definition_wins()
+    test_gazetteer()
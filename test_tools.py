@@ -27,7 +27,7 @@ def test_tools():
     if destinations and len(destinations) > 0:
         first_dest = destinations[0]["destination"]
         weather = weather_tool.forward(location=first_dest)
-        print(f"   Input: '{first_dest}' → Output: {weather[:200]}...\n")
+        print(f"   Input: '{first_dest}' → Output: {str(weather)[:200]}...\n")
     
     # Test 4: CountryInfoTool
     print("4️⃣ Testing CountryInfoTool...")
@@ -38,7 +38,7 @@ def test_tools():
         if len(dest_parts) > 1:
             country = dest_parts[1]
             safety = country_tool.forward(country=country, info_type="security")
-            print(f"   Input: '{country}' → Output: {safety[:200]}...\n")
+            print(f"   Input: '{country}' → Output: {str(safety)[:200]}...\n")
     
     # Test 5: FlightsFinderTool
     print("5️⃣ Testing FlightsFinderTool...")
@@ -51,7 +51,7 @@ def test_tools():
             outbound_date="2025-06-15",
             return_date="2025-06-22"
         )
-        print(f"   Input: CDG → {dest_airport} → Output: {flights[:200]}...\n")
+        print(f"   Input: CDG → {dest_airport} → Output: {str(flights)[:200]}...\n")
     
     print("✅ All tools tested!")
 
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Offline check of per-session accounting and budgets (tools/usage.py) as
+enforced by Provider.call and Provider.get (tools/resilience.py).
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import requests
+
+from tools import cancellation, singleflight, usage
+from tools.resilience import BudgetExceededError, CircuitBreaker, Provider, ProviderPolicy
+
+
+def _provider(name: str = "stub") -> Provider:
+    return Provider(name, ProviderPolicy(rate=100.0, burst=100, max_attempts=1))
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size=1):
+        yield self._body
+
+    @property
+    def content(self) -> bytes:
+        return self._content  # set by Provider.get once the body is read
+
+
+@contextmanager
+def fake_http(delay: float = 0.0):
+    """requests.get answering every URL with its own address; the URLs fetched are listed."""
+    fetched, saved = [], requests.get
+
+    def get(url, **kwargs):
+        fetched.append(url)
+        time.sleep(delay)
+        return FakeResponse(url.encode())
+
+    requests.get = get
+    try:
+        yield fetched
+    finally:
+        requests.get = saved
+
+
+def test_parse_budgets():
+    print("🧪 Testing budget parsing...\n")
+    assert usage.parse_budgets("serpapi=20, NewsAPI = 5,anthropic_tokens=none,bad,weather=x,openweathermap=7.9") == {
+        "serpapi": 20, "newsapi": 5, "anthropic_tokens": None, "openweathermap": 7}
+    saved = os.environ.get("USAGE_BUDGETS")
+    os.environ["USAGE_BUDGETS"] = "serpapi=3,newsapi=off"
+    try:
+        budgets = usage.Session().budgets
+    finally:
+        if saved is None:
+            os.environ.pop("USAGE_BUDGETS", None)
+        else:
+            os.environ["USAGE_BUDGETS"] = saved
+    assert budgets == {**usage.DEFAULT_BUDGETS, "serpapi": 3, "newsapi": None}
+    print("   ✅ USAGE_BUDGETS overrides the defaults, bad entries skipped\n")
+
+
+def test_call_budgets():
+    print("🧪 Testing call and token budgets...\n")
+    provider, calls = _provider(), []
+
+    def upstream():
+        calls.append(1)
+        return SimpleNamespace(usage=SimpleNamespace(input_tokens=60, cache_read_input_tokens=20, output_tokens=30))
+
+    session = usage.Session(budgets={"stub": 2})
+    with usage.bound(session):
+        provider.call(upstream)
+        provider.call(upstream)
+        try:
+            provider.call(upstream)
+            raise AssertionError("the third call is over budget")
+        except BudgetExceededError as exc:
+            assert exc.provider == "stub" and exc.reason == "session budget of 2 calls spent"
+    assert len(calls) == 2 and session.totals() == {"stub": {"calls": 2, "input_tokens": 160, "output_tokens": 60, "denied": 1}}
+    assert provider.breaker.state == CircuitBreaker.CLOSED and provider.breaker.allow(), "a spent budget is not an outage"
+    assert session.summary() == "stub: 2 calls, 220 tokens (budget reached)"
+    print("   ✅ Calls capped, the upstream function is not run once spent\n")
+
+    session = usage.Session(budgets={"stub_tokens": 200})
+    with usage.bound(session):
+        provider.call(upstream)
+        provider.call(upstream)
+        try:
+            provider.call(upstream)
+            raise AssertionError("the token budget is spent")
+        except BudgetExceededError as exc:
+            assert exc.reason == "session budget of 200 tokens spent"
+    assert session.tokens("stub") == 220 and session.summary() == "stub: 2 calls, 220/200 tokens (budget reached)"
+
+    provider.call(upstream)
+    assert len(calls) == 5 and session.calls["stub"] == 2, "calls outside a session are charged to nobody"
+    print("   ✅ Tokens capped, unbound calls unlimited\n")
+
+
+def test_thread_pools():
+    print("🧪 Testing sessions in thread pools...\n")
+    provider = _provider()
+    session = usage.Session(budgets={"stub": 3})
+    with usage.bound(session), ThreadPoolExecutor(max_workers=4) as executor:
+        outcomes = list(executor.map(cancellation.wrap(lambda i: _outcome(provider)), range(6)))
+    assert sorted(outcomes) == ["denied"] * 3 + ["ok"] * 3 and session.calls["stub"] == 3 and session.denied["stub"] == 3
+    print("   ✅ Worker threads charge the session that started them\n")
+
+
+def _outcome(provider: Provider) -> str:
+    try:
+        provider.call(lambda: "ok")
+        return "ok"
+    except BudgetExceededError:
+        return "denied"
+
+
+class GatedSession(usage.Session):
+    """Session whose first budget check waits for `release`, so its call stays in flight meanwhile."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.checking = threading.Event()
+        self.release = threading.Event()
+
+    def over_budget(self, provider):
+        if not self.checking.is_set():
+            self.checking.set()
+            self.release.wait(5)
+        return super().over_budget(provider)
+
+
+def _coalesced_get(provider: Provider, url: str, follower_spent: bool):
+    """Runs a GET led by a session over budget and joined by a second one; returns both outcomes."""
+    leader = GatedSession(budgets={provider.name: 0})
+    follower = usage.Session(budgets={provider.name: 0 if follower_spent else 5})
+    outcomes = {}
+
+    def run(name, session):
+        with usage.bound(session):
+            try:
+                outcomes[name] = provider.get(url).content
+            except BudgetExceededError as exc:
+                outcomes[name] = exc
+
+    coalesced = singleflight.shared.coalesced
+    threads = [threading.Thread(target=run, args=("leader", leader))]
+    threads[0].start()
+    assert leader.checking.wait(5)
+    threads.append(threading.Thread(target=run, args=("follower", follower)))
+    threads[1].start()
+    deadline = time.monotonic() + 5
+    while singleflight.shared.coalesced == coalesced and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert singleflight.shared.coalesced == coalesced + 1, "the second GET joins the one in flight"
+    leader.release.set()
+    for thread in threads:
+        thread.join()
+    return outcomes, leader, follower
+
+
+def test_budget_isolation():
+    print("🧪 Testing budget errors across coalesced sessions...\n")
+    provider = _provider("stub_http")
+    url = "https://example.com/isolation"
+    with fake_http() as fetched:
+        outcomes, leader, follower = _coalesced_get(provider, url, follower_spent=False)
+    assert isinstance(outcomes["leader"], BudgetExceededError), "the session over budget gets its error"
+    assert outcomes["follower"] == url.encode(), "the other session makes its own call"
+    assert fetched == [url] and (leader.denied["stub_http"], follower.calls["stub_http"]) == (1, 1)
+    assert leader.calls["stub_http"] == 0 and follower.denied["stub_http"] == 0
+    print("   ✅ Another session's spent budget is not raised to the caller\n")
+
+    with fake_http() as fetched:
+        outcomes, _, follower = _coalesced_get(provider, url, follower_spent=True)
+    assert all(isinstance(outcome, BudgetExceededError) for outcome in outcomes.values()) and fetched == []
+    assert follower.calls["stub_http"] == 0
+    print("   ✅ A session over budget itself still gets the error\n")
+
+    shared_session, other = usage.Session(), usage.Session()
+    results = {}
+
+    def fetch(name, session):
+        with usage.bound(session):
+            results[name] = provider.get(url).content
+
+    with fake_http(delay=0.1) as fetched:
+        threads = [threading.Thread(target=fetch, args=(name, session))
+                   for name, session in (("first", shared_session), ("second", other))]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+    assert fetched == [url] and results["first"] == results["second"] == url.encode()
+    assert shared_session.calls["stub_http"] + other.calls["stub_http"] == 1, "a shared call is charged once"
+    print("   ✅ Coalesced calls within budget are shared and charged once\n")
+
+    print("✅ Usage budgets tested!")
+
+
+if __name__ == "__main__":
+    test_parse_budgets()
+    test_call_budgets()
+    test_thread_pools()
+    test_budget_isolation()
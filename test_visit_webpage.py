@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Offline check of streamed page conversion: the markdown built chunk by chunk
+must match the one-shot conversion of the same page. Also checks that the
+page cache (tools/page_cache.py) follows Cache-Control.
+"""
+import re
+import time
+
+import markdownify
+
+from tools.page_cache import PageCache, freshness
+from tools.visit_webpage import _SKIPPED, _StreamingMarkdown
+
+PAGE = """<html><head><title>Lisbon</title><style>body { color: red; }</style></head><body>
+<nav><a href="/">Home</a></nav>
+<h1>Lisbon in spring</h1>
+<p>Mild weather, <b>long days</b> and few crowds.</p>
+<table>
+<tr><th>Month</th><th>Max (°C)</th><th>Rain days</th></tr>
+<tr><td>March</td><td>19</td><td>10</td></tr>
+<tr><td>April</td><td>20</td><td>9</td></tr>
+<tr><td>May</td><td>22</td><td>7</td></tr>
+</table>
+<h2>What to pack</h2>
+<ul>
+<li>Light jacket</li>
+<li>Walking shoes
+<ul><li>with grip: the pavements are slippery</li></ul></li>
+<li>Sunscreen</li>
+</ul>
+<ol><li>Alfama</li><li>Belém</li></ol>
+<pre>tram 28: 06:00 – 23:00
+every 10 min</pre>
+<script>var tracking = "</p></div>";</script>
+<div><p>Trams fill up by 10am.</p></div>
+</body></html>"""
+
+
+def _normalize(markdown: str) -> str:
+    return re.sub(r"\n{3,}", "\n\n", markdown.strip())
+
+
+def _one_shot(html: str) -> str:
+    """What a non-streamed conversion gives once skipped elements are removed."""
+    return markdownify.markdownify(_SKIPPED.sub("", html))
+
+
+def test_streamed_matches_one_shot():
+    print("🧪 Testing streamed page conversion...\n")
+    expected = _normalize(_one_shot(PAGE))
+    assert "| Month | Max (°C) | Rain days |" in expected, expected
+    for chunk_size in (1, 7, 64, 512, len(PAGE)):
+        converter = _StreamingMarkdown(max_chars=100_000)
+        for start in range(0, len(PAGE), chunk_size):
+            converter.feed(PAGE[start:start + chunk_size])
+        streamed = _normalize(converter.close())
+        assert streamed == expected, f"chunk size {chunk_size}:\n{streamed}\n---\n{expected}"
+    print("   ✅ Tables, nested lists and <pre> blocks are converted whole\n")
+
+    assert "tracking" not in expected and "Home" not in expected, "skipped elements must not reach the markdown"
+    print("✅ Streamed conversion tested!")
+
+
+def test_page_cache():
+    print("🧪 Testing page cache freshness...\n")
+    cases = [
+        ({}, 300),
+        ({"Cache-Control": "public, max-age=60"}, 60),
+        ({"Cache-Control": "max-age=86400"}, 300),
+        ({"Cache-Control": "max-age=60", "Age": "45"}, 15),
+        ({"Cache-Control": "max-age=60", "Age": "90"}, 0),
+        ({"Cache-Control": "max-age=600, s-maxage=30"}, 30),
+        ({"Cache-Control": "max-age=0"}, 0),
+        ({"Cache-Control": "no-cache"}, 0),
+        ({"Cache-Control": "private, max-age=600"}, 0),
+        ({"Cache-Control": "No-Store"}, None),
+        ({"Cache-Control": "max-age=soon"}, 300),
+    ]
+    for headers, expected in cases:
+        assert freshness(headers, 300) == expected, f"{headers}: {freshness(headers, 300)} instead of {expected}"
+    print(f"   ✅ {len(cases)} Cache-Control headers\n")
+
+    cache = PageCache(fresh_ttl=300)
+    cache.store("https://a", "kept", {"Cache-Control": "max-age=60", "ETag": '"a1"'})
+    page, fresh = cache.lookup("https://a")
+    assert fresh and page.markdown == "kept"
+    page.checked_at -= 61
+    page, fresh = cache.lookup("https://a")
+    assert not fresh and page.conditional_headers() == {"If-None-Match": '"a1"'}, "stale after max-age: revalidate"
+    cache.not_modified("https://a", {"Cache-Control": "no-cache"})
+    assert cache.lookup("https://a") == (page, False), "a 304 updates the freshness"
+
+    cache.store("https://b", "always checked", {"Cache-Control": "no-cache", "Last-Modified": "Mon, 01 Jun 2026"})
+    page, fresh = cache.lookup("https://b")
+    assert not fresh and page.conditional_headers() == {"If-Modified-Since": "Mon, 01 Jun 2026"}
+
+    cache.store("https://c", "useless", {"Cache-Control": "private"})
+    cache.store("https://d", "secret", {"Cache-Control": "no-store", "ETag": '"d1"'})
+    assert cache.lookup("https://c") == (None, False) == cache.lookup("https://d"), \
+        "pages that can neither be served nor revalidated are not kept"
+    cache.store("https://a", "now private", {"Cache-Control": "no-store"})
+    assert cache.lookup("https://a") == (None, False), "no-store drops an older copy"
+
+    cache.store("https://e", "no validator", {})
+    cache.lookup("https://e")[0].checked_at = time.monotonic() - 301
+    assert cache.lookup("https://e") == (None, False), "stale pages without validators are dropped"
+    print("   ✅ Served while fresh, revalidated with ETag / Last-Modified otherwise\n")
+
+    print("✅ Page cache tested!")
+
+
+if __name__ == "__main__":
+    test_streamed_matches_one_shot()
+    test_page_cache()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Offline check of the weather tools: WeatherBatchTool with stubbed geocoding
+and forecasts, and the weather_rules verdict table.
+"""
+import threading
+import time
+
+from tools import weather_rules, weather_tool
+from tools.weather_rules import ACCEPTABLE, CHANGEZ, DECONSEILLE, IDEAL
+from tools.weather_tool import WeatherBatchTool
+
+GEO = {
+    "nice": {"name": "Nice", "country": "FR", "lat": 43.70, "lon": 7.27},
+    "lisbon": {"name": "Lisbon", "country": "PT", "lat": 38.72, "lon": -9.14},
+    "split": {"name": "Split", "country": "HR", "lat": 43.51, "lon": 16.44},
+}
+
+SUNNY = {'conditions': "ciel dégagé", 'condition_ids': [800], 'temp_min': 22.0, 'temp_max': 28.0,
+         'feels_like': 27.0, 'humidity': 50, 'wind_max': 4.0, 'rain_mm': 0.0}
+
+
+class StubWeather(WeatherBatchTool):
+    """WeatherBatchTool whose geocoding and forecast calls never leave the process."""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(api_key="test-key")
+        self.delay = delay
+        self.geocode_calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _geocode_api(self, location, api_key):
+        self.geocode_calls.append(location)
+        return GEO.get(location.lower())
+
+    def _get_weather(self, lat, lon, city_name, country, target_date, api_key):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return f"Météo à {city_name}", dict(SUNNY)
+
+
+def _reset_geocode_cache():
+    with weather_tool._geocoded_lock:
+        weather_tool._geocoded.clear()
+
+
+def test_batch_order_and_partial_failure():
+    print("🧪 Testing weather batch...\n")
+    _reset_geocode_cache()
+    tool = StubWeather(delay=0.05)
+    comparison = tool.forward(["Nice", "Atlantis", "Lisbon", "Split"], activity_type="plage")
+
+    assert [report.location for report in comparison] == ["Nice, FR", "Atlantis", "Lisbon, PT", "Split, HR"], \
+        "reports keep the requested order"
+    assert comparison[1].error and "Atlantis" in comparison[1].error, "an unknown location fails on its own"
+    assert all(report.ok for i, report in enumerate(comparison) if i != 1), "the other locations still succeed"
+    assert comparison[0].verdict == "IDÉAL" and comparison[0].temp_max == 28.0
+    assert tool.peak > 1, "locations are fetched in parallel"
+
+    table = comparison.render()
+    assert "| Nice, FR |" in table and "| Atlantis |" in table and "❌" in table
+    print("   ✅ Order kept, one failure does not sink the batch\n")
+
+
+def test_batch_dates():
+    print("🧪 Testing weather batch dates...\n")
+    _reset_geocode_cache()
+    tool = StubWeather()
+    assert tool.forward([]).error == "Au moins une localisation est requise."
+    assert tool.forward(["Nice", "Lisbon"], dates=["2030-01-01", "2030-01-02", "2030-01-03"]).error, \
+        "one date per location or a single date"
+
+    comparison = tool.forward(["Nice", "Lisbon"], dates=["2030-01-01"])
+    assert [report.date for report in comparison] == ["2030-01-01", "2030-01-01"], "a single date applies to all"
+    comparison = tool.forward(["Nice"], dates=["01/02/2030"])
+    assert "YYYY-MM-DD" in comparison[0].error
+    print("   ✅ Dates broadcast and validated\n")
+
+
+def test_geocode_cache():
+    print("🧪 Testing geocode cache...\n")
+    _reset_geocode_cache()
+    tool = StubWeather()
+    tool.forward(["Nice", "Atlantis"])
+    tool.forward(["nice ", "NICE", "Atlantis"])
+    assert tool.geocode_calls.count("Nice") + tool.geocode_calls.count("nice ") + tool.geocode_calls.count("NICE") == 1, \
+        f"one geocoding per normalised location: {tool.geocode_calls}"
+    assert tool.geocode_calls.count("Atlantis") == 2, "failed lookups are not cached"
+
+    other = StubWeather()
+    assert other.coordinates("Nice") == (43.70, 7.27) and not other.geocode_calls, "the cache is shared between instances"
+    print("   ✅ Successful lookups shared, failures retried\n")
+
+    print("✅ Weather batch tested!")
+
+
+def _weather(ids, temp_min, temp_max, wind=3.0, rain_mm=0.0):
+    return {'condition_ids': ids, 'temp_min': temp_min, 'temp_max': temp_max, 'wind_max': wind, 'rain_mm': rain_mm}
+
+
+# (activity, summary, expected verdict or None when the case goes to Claude)
+RULE_CASES = [
+    ("plage", _weather([211], 24, 30), CHANGEZ),
+    ("plage", _weather([502], 24, 30), CHANGEZ),
+    ("plage", _weather([500], 22, 27, rain_mm=12), CHANGEZ),
+    ("plage", _weather([800], 12, 16), DECONSEILLE),
+    ("plage", _weather([800], 22, 28, wind=14), DECONSEILLE),
+    ("plage", _weather([500], 19, 23, rain_mm=2), ACCEPTABLE),
+    ("plage", _weather([500], 14, 19, rain_mm=2), None),
+    ("plage", _weather([800], 22, 28), IDEAL),
+    ("plage", _weather([801], 18, 22), ACCEPTABLE),
+    ("ski", _weather([800], 6, 12), DECONSEILLE),
+    ("ski", _weather([211], -5, 0), DECONSEILLE),
+    ("ski", _weather([800], -8, -2, wind=16), DECONSEILLE),
+    ("ski", _weather([500], 0, 4), DECONSEILLE),
+    ("ski", _weather([601], -6, -1), IDEAL),
+    ("ski", _weather([800], -10, -3), IDEAL),
+    ("ski", _weather([800], -2, 4), ACCEPTABLE),
+    ("randonnee", _weather([202], 12, 20), CHANGEZ),
+    ("randonnee", _weather([503], 12, 20), DECONSEILLE),
+    ("randonnee", _weather([800], 12, 20, wind=15), DECONSEILLE),
+    ("randonnee", _weather([800], 25, 37), DECONSEILLE),
+    ("randonnee", _weather([800], 10, 22), IDEAL),
+    ("randonnee", _weather([300], 8, 14), ACCEPTABLE),
+    ("ville", _weather([200], 15, 22), DECONSEILLE),
+    ("ville", _weather([803], 14, 24), IDEAL),
+    ("ville", _weather([500], 10, 16), ACCEPTABLE),
+    ("ville", _weather([800], 2, 8), ACCEPTABLE),
+    ("ville", _weather([502], 10, 16), None),
+    ("camping", _weather([211], 15, 25), CHANGEZ),
+    ("camping", _weather([504], 15, 25), DECONSEILLE),
+    ("camping", _weather([800], 3, 18), DECONSEILLE),
+    ("camping", _weather([800], 12, 24, wind=13), DECONSEILLE),
+    ("camping", _weather([800], 12, 26), IDEAL),
+    ("camping", _weather([500], 12, 20), ACCEPTABLE),
+    ("festival", _weather([201], 18, 26), DECONSEILLE),
+    ("festival", _weather([502], 18, 26), DECONSEILLE),
+    ("festival", _weather([800], 18, 26), IDEAL),
+    ("festival", _weather([300], 12, 14), ACCEPTABLE),
+    ("beach", _weather([800], 22, 28), IDEAL),
+    ("Randonnée", _weather([800], 10, 22), IDEAL),
+    ("safari", _weather([800], 22, 28), None),
+]
+
+
+def test_rule_table():
+    print("🧪 Testing weather rules...\n")
+    for activity, summary, expected in RULE_CASES:
+        result = weather_rules.evaluate(activity, summary)
+        verdict = result[0] if result else None
+        assert verdict == expected, f"{activity} {summary}: {verdict} instead of {expected}"
+    assert weather_rules.evaluate("plage", None) is None and weather_rules.evaluate(None, dict(SUNNY)) is None
+    print(f"   ✅ {len(RULE_CASES)} activity/weather cases\n")
+
+
+def test_beach_light_rain():
+    print("🧪 Testing beach with passing showers...\n")
+    verdict, advice = weather_rules.evaluate("plage", _weather([500], 19, 23, rain_mm=2))
+    assert verdict == ACCEPTABLE and "Averses" in advice
+    verdict, _ = weather_rules.evaluate("plage", _weather([500, 211], 19, 23, rain_mm=2))
+    assert verdict == CHANGEZ, "thunder is never light rain"
+    print("   ✅ Light rain on a warm day stays acceptable\n")
+
+
+def test_verdict_of():
+    print("🧪 Testing verdict extraction...\n")
+    for verdict in (IDEAL, ACCEPTABLE, DECONSEILLE, CHANGEZ):
+        assert weather_rules.verdict_of(weather_rules.format_recommendation(verdict, "conseil")) == verdict
+    assert weather_rules.verdict_of("Plutôt déconseillé, mais acceptable avec un parapluie") == DECONSEILLE, \
+        "the most severe verdict cited wins"
+    assert weather_rules.verdict_of("Idéal pour la plage") == IDEAL
+    assert weather_rules.verdict_of("Aucune idée") is None and weather_rules.verdict_of(None) is None
+    print("   ✅ Verdicts read from rule and Claude recommendations\n")
+
+    print("✅ Weather rules tested!")
+
+
+if __name__ == "__main__":
+    test_batch_order_and_partial_failure()
+    test_batch_dates()
+    test_geocode_cache()
+    test_rule_table()
+    test_beach_light_rain()
+    test_verdict_of()
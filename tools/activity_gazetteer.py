@@ -0,0 +1,62 @@
+"""
+Gazetteer des destinations (plage, ski, randonnée, ville) compilé en automate
+multi-motifs pour détecter le type d'activité d'une localisation.
+"""
+import os
+import threading
+from typing import Iterable, Optional
+
+from tools.text_matcher import KeywordAutomaton
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "activity_gazetteer.txt")
+
+_automaton: Optional[KeywordAutomaton] = None
+_lock = threading.Lock()
+
+
+def load_gazetteer(path: str) -> list[tuple[str, str]]:
+    """Lit un fichier gazetteer et renvoie les paires (destination, activité)"""
+    entries = []
+    activity = None
+    with open(path, encoding="utf-8") as f:
+        for raw_line in f:
+            line = raw_line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                activity = line[1:-1].strip()
+                continue
+            if activity:
+                entries.append((line, activity))
+    return entries
+
+
+def build_automaton(paths: Iterable[str]) -> KeywordAutomaton:
+    """Compile un ou plusieurs gazetteers en un seul automate (le premier fichier est prioritaire)"""
+    automaton = KeywordAutomaton()
+    for path in paths:
+        for name, activity in load_gazetteer(path):
+            automaton.add(name, activity)
+    return automaton.compile()
+
+
+def _gazetteer_paths() -> list[str]:
+    """Gazetteers supplémentaires via ACTIVITY_GAZETTEER_PATH (séparés par os.pathsep), puis celui fourni"""
+    extra = os.getenv("ACTIVITY_GAZETTEER_PATH", "")
+    return [p for p in extra.split(os.pathsep) if p] + [DEFAULT_GAZETTEER_PATH]
+
+
+def get_automaton() -> KeywordAutomaton:
+    """Renvoie l'automate partagé, compilé une seule fois au premier appel"""
+    global _automaton
+    if _automaton is None:
+        with _lock:
+            if _automaton is None:
+                _automaton = build_automaton(_gazetteer_paths())
+    return _automaton
+
+
+def detect_activity(location: str) -> Optional[str]:
+    """Détecte le type d'activité d'une localisation (correspondance la plus longue), ou None"""
+    match = get_automaton().longest_match(location)
+    return match[2] if match else None
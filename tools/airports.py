@@ -0,0 +1,309 @@
+"""
+Bundled airport reference data: IATA validation, lookup by city or country,
+and nearest-airport search over latitude/longitude.
+
+NeedToDestination asks the LLM for airport codes, which are sometimes made up;
+a made-up code costs a SerpApi call returning "No flights found". Codes are now
+checked against this dataset, and a destination whose code is unknown (or in
+the wrong country) is mapped to a real airport by city name, then by the
+destination's coordinates (geocoded by WeatherTool), then by country.
+
+The dataset is not exhaustive, so `status()` only treats a code as unusable
+when it is malformed or known to have no scheduled flights (closed or retired
+airports, non-scheduled rows of the extra datasets). Other codes missing from
+the data are "unverified": flight searches still accept them.
+
+The bundled `data/airports.csv` lists airports with scheduled service and
+uses the OurAirports column names, so the full OurAirports `airports.csv` can
+be added through AIRPORTS_PATH (paths separated by os.pathsep); rows without
+an IATA code are skipped, closed or non-scheduled ones only mark their code as
+unusable, and the first scheduled definition of a code wins. The bundled file is loaded first: its rows are ordered main airport
+first, which `by_country()` and `code_for()` rely on, and the extra datasets
+only add the airports it lacks.
+"""
+import csv
+import math
+import os
+import sys
+import threading
+import unicodedata
+from typing import Callable, Iterable, Optional
+
+from tools import country_data
+
+DEFAULT_AIRPORTS_PATH = os.path.join(os.path.dirname(__file__), "data", "airports.csv")
+
+EARTH_RADIUS_KM = 6371.0
+_CELL_DEGREES = 2.0
+
+_ISO_TO_ENGLISH = {iso: name for name, iso in country_data.ENGLISH_TO_ISO.items()}
+
+# Codes of closed airports still suggested by LLMs, missing from current datasets
+RETIRED_CODES = {
+    "TXL": "Berlin Tegel, closed in 2020 (use BER)",
+    "SXF": "Berlin Schönefeld, merged into BER in 2020",
+    "THF": "Berlin Tempelhof, closed in 2008 (use BER)",
+    "ISL": "Istanbul Atatürk, closed to passenger flights in 2019 (use IST)",
+    "FBU": "Oslo Fornebu, closed in 1998 (use OSL)",
+}
+
+KNOWN, UNVERIFIED, CLOSED, MALFORMED = "known", "unverified", "closed", "malformed"
+
+
+def _fold(text: str) -> str:
+    """Case-, accent- and punctuation-insensitive form used for city lookups."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Airport:
+    __slots__ = ("iata", "name", "city", "country_iso", "lat", "lon", "scheduled")
+
+    def __init__(self, iata: str, name: str, city: str, country_iso: str, lat: float, lon: float,
+                 scheduled: bool = True):
+        self.iata = iata
+        self.name = name
+        self.city = city
+        self.country_iso = country_iso
+        self.lat = lat
+        self.lon = lon
+        self.scheduled = scheduled
+
+    @property
+    def country(self) -> str:
+        """English country name (the ISO code for territories missing from country_data)."""
+        return _ISO_TO_ENGLISH.get(self.country_iso, self.country_iso)
+
+    def __repr__(self) -> str:
+        return f"Airport({self.iata}, {self.city}, {self.country_iso})"
+
+
+def load_airports(path: str) -> list[Airport]:
+    """Reads an airport CSV (bundled or OurAirports format). Closed and non-scheduled rows are flagged."""
+    found = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            code = (row.get("iata_code") or "").strip().upper()
+            if len(code) != 3:
+                continue
+            try:
+                lat, lon = float(row["latitude_deg"]), float(row["longitude_deg"])
+            except (KeyError, ValueError):
+                continue
+            scheduled = row.get("scheduled_service", "yes") == "yes" and row.get("type") != "closed"
+            found.append(Airport(sys.intern(code), row.get("name", "").strip(), row.get("municipality", "").strip(),
+                                 sys.intern(row.get("iso_country", "").strip().upper()), lat, lon, scheduled))
+    return found
+
+
+class AirportIndex:
+    """In-memory indexes over a list of airports (earlier entries are preferred)."""
+
+    def __init__(self, entries: Iterable[Airport], retired: Optional[dict[str, str]] = None):
+        self.by_code: dict[str, Airport] = {}
+        # Codes without scheduled flights → description, unless an airport in service uses them
+        self.unscheduled: dict[str, str] = dict(retired or {})
+        self._by_city: dict[str, list[Airport]] = {}
+        self._by_country: dict[str, list[Airport]] = {}
+        self._grid: dict[tuple[int, int], list[Airport]] = {}
+        for airport in entries:
+            if airport.iata in self.by_code:
+                continue
+            if not airport.scheduled:
+                self.unscheduled.setdefault(airport.iata, airport.name or airport.iata)
+                continue
+            self.unscheduled.pop(airport.iata, None)
+            self.by_code[airport.iata] = airport
+            self._by_city.setdefault(_fold(airport.city), []).append(airport)
+            self._by_country.setdefault(airport.country_iso, []).append(airport)
+            self._grid.setdefault(self._cell(airport.lat, airport.lon), []).append(airport)
+
+    def __len__(self) -> int:
+        return len(self.by_code)
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> tuple[int, int]:
+        return int((lat + 90) // _CELL_DEGREES), int(((lon + 180) % 360) // _CELL_DEGREES)
+
+    def get(self, code: Optional[str]) -> Optional[Airport]:
+        return self.by_code.get((code or "").strip().upper())
+
+    def by_city(self, city: str, country: Optional[str] = None) -> list[Airport]:
+        """Airports serving `city`, optionally restricted to a country (name in French/English, or ISO code)."""
+        found = self._by_city.get(_fold(city), [])
+        iso = _country_iso(country) if country else None
+        return [airport for airport in found if airport.country_iso == iso] if iso else list(found)
+
+    def by_country(self, country: str) -> list[Airport]:
+        """Airports of a country (name in French/English, or ISO code), main airports first."""
+        iso = _country_iso(country)
+        return list(self._by_country.get(iso, [])) if iso else []
+
+    def nearest(self, lat: float, lon: float, limit: int = 1, max_km: Optional[float] = None) -> list[tuple[Airport, float]]:
+        """
+        The `limit` airports closest to (lat, lon) as (airport, km) pairs, nearest first.
+
+        Grid cells are scanned in growing rings around the point, and the scan stops
+        once no unscanned cell can hold anything closer than the results found.
+        """
+        row, column = self._cell(lat, lon)
+        columns = int(360 // _CELL_DEGREES)
+        found: list[tuple[float, Airport]] = []
+        for ring in range(int(180 // _CELL_DEGREES) + 1):
+            for cell in self._ring(row, column, ring, columns):
+                for airport in self._grid.get(cell, ()):
+                    found.append((distance_km(lat, lon, airport.lat, airport.lon), airport))
+            found.sort(key=lambda pair: pair[0])
+            del found[limit:]
+            # Anything outside this ring is at least `ring` cells away in latitude, or in
+            # longitude (worth less the closer to a pole) until the ring wraps the globe
+            reach = math.radians(ring * _CELL_DEGREES) * EARTH_RADIUS_KM
+            if 2 * ring + 1 < columns:
+                reach *= max(math.cos(math.radians(min(abs(lat) + ring * _CELL_DEGREES, 90))), 0)
+            if len(found) == limit and found[-1][0] <= reach:
+                break
+            if max_km is not None and reach > max_km:
+                break
+        return [(airport, km) for km, airport in found if max_km is None or km <= max_km]
+
+
+    @staticmethod
+    def _ring(row: int, column: int, ring: int, columns: int):
+        """Cells on the perimeter of the square of half-side `ring` around (row, column)."""
+        if ring == 0:
+            yield row, column
+            return
+        seen = set()
+        for dc in range(-ring, ring + 1):
+            for dr in (-ring, ring):
+                seen.add((row + dr, (column + dc) % columns))
+        for dr in range(-ring + 1, ring):
+            for dc in (-ring, ring):
+                seen.add((row + dr, (column + dc) % columns))
+        yield from seen
+
+
+def _country_iso(country: str) -> Optional[str]:
+    country = (country or "").strip()
+    if len(country) == 2 and country.isalpha():
+        return country.upper()
+    english = country_data.normalize(country)
+    return country_data.iso_code(english) if english else None
+
+
+def _airport_paths() -> list[str]:
+    """The bundled dataset, then the extra ones from AIRPORTS_PATH (separated by os.pathsep)"""
+    extra = os.getenv("AIRPORTS_PATH", "")
+    return [DEFAULT_AIRPORTS_PATH] + [p for p in extra.split(os.pathsep) if p]
+
+
+_index: Optional[AirportIndex] = None
+_lock = threading.Lock()
+
+
+def get_index() -> AirportIndex:
+    """Shared index, built once on first use."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = AirportIndex((airport for path in _airport_paths() for airport in load_airports(path)),
+                                      retired=RETIRED_CODES)
+    return _index
+
+
+def lookup(code: Optional[str]) -> Optional[Airport]:
+    return get_index().get(code)
+
+
+def is_valid(code: Optional[str]) -> bool:
+    """Whether `code` is the IATA code of a known airport with scheduled service."""
+    return lookup(code) is not None
+
+
+def status(code: Optional[str]) -> str:
+    """
+    KNOWN (scheduled airport of the dataset), CLOSED (known to have no scheduled
+    flights), MALFORMED (not three letters) or UNVERIFIED (missing from the data).
+    """
+    code = code.strip().upper() if isinstance(code, str) else ""
+    if len(code) != 3 or not (code.isascii() and code.isalpha()):
+        return MALFORMED
+    index = get_index()
+    if code in index.by_code:
+        return KNOWN
+    return CLOSED if code in index.unscheduled else UNVERIFIED
+
+
+def is_searchable(code: Optional[str]) -> bool:
+    """Whether flights may be searched for `code`: known, or well-formed and not known to be closed."""
+    return status(code) in (KNOWN, UNVERIFIED)
+
+
+def closed_reason(code: Optional[str]) -> Optional[str]:
+    """Why a CLOSED code has no flights (airport name or retirement note), None otherwise."""
+    return get_index().unscheduled.get(code.strip().upper()) if isinstance(code, str) else None
+
+
+def code_for(place: str) -> Optional[str]:
+    """
+    IATA code for a departure given as a code or a city name (the city's main
+    airport). Well-formed codes missing from the data are kept as they are.
+    """
+    place = (place or "").strip()
+    if is_valid(place):
+        return place.upper()
+    by_city = get_index().by_city(place)
+    if by_city:
+        return by_city[0].iata
+    return place.upper() if status(place) == UNVERIFIED else None
+
+
+def split_destination(destination: str) -> tuple[str, Optional[str]]:
+    """'Lisbon, Portugal' → ('Lisbon', 'Portugal'); 'Lisbon' → ('Lisbon', None)."""
+    parts = [part.strip() for part in (destination or "").split(",") if part.strip()]
+    if not parts:
+        return "", None
+    return parts[0], (parts[-1] if len(parts) > 1 else None)
+
+
+def resolve(destination: str, code: Optional[str] = None, coordinates: Optional[tuple] = None,
+            locate: Optional[Callable[[str], Optional[tuple]]] = None, max_km: float = 300) -> Optional[Airport]:
+    """
+    Best real airport for `destination` ('City, Country'):
+    `code` if it is known, in the destination's country and (when the city has
+    airports) one of the city's airports, else an airport of the city, else the nearest one to `coordinates` (within `max_km`), else the main
+    airport of the country. None when nothing matches.
+
+    `locate(destination) -> (lat, lon)` is only called when the coordinates are
+    needed and were not given (e.g. WeatherTool.coordinates, which costs an API call).
+    """
+    index = get_index()
+    city, country = split_destination(destination)
+    iso = _country_iso(country) if country else None
+
+    airport = index.get(code)
+    by_city = index.by_city(city, country) or (index.by_city(city) if iso is None else [])
+    if airport and (airport in by_city or (not by_city and (iso is None or airport.country_iso == iso))):
+        return airport
+    if by_city:
+        return by_city[0]
+
+    if coordinates is None and locate is not None:
+        coordinates = locate(destination)
+    if coordinates:
+        for candidate, _ in index.nearest(coordinates[0], coordinates[1], limit=5, max_km=max_km):
+            if iso is None or candidate.country_iso == iso:
+                return candidate
+
+    by_country = index.by_country(country or city)
+    return by_country[0] if by_country else None
@@ -0,0 +1,177 @@
+"""
+Cooperative cancellation of a user request.
+
+A `CancelToken` is bound to the thread running an agent (or pipeline) with
+`bound(token)`. The resilience layer and the agent model run their blocking
+calls through `run()`: the call executes on a helper thread while the caller
+waits on either its completion or the token, so cancelling the token returns
+control immediately (raising `Cancelled`) instead of waiting for an HTTP or
+LLM call nobody will read.
+
+Abandoning is not aborting. What is actually stopped on cancellation:
+- waits and backoff sleeps (`sleep`, `wait`), including callers waiting on a
+  coalesced call led by another request (tools/singleflight.py) or for a
+  rate-limit token (tools/resilience.py);
+- HTTP bodies read through the resilience layer or visit_webpage, which check
+  the token between chunks.
+What is not: the connection and the wait for response headers of an HTTP
+request, and an in-flight Anthropic/LiteLLM call, which no API lets us
+interrupt from another thread. Those finish on the helper thread, bounded by
+their own timeouts (requests' `timeout`, the Anthropic client's timeout in
+tools/clients.py), and their result is dropped.
+
+`Cancelled` derives from BaseException, like asyncio.CancelledError, so the
+`except Exception` fallbacks of the tools (which turn errors into "no news" or
+a degraded answer) let it through instead of producing a result that could be
+cached for other requests.
+
+Thread pools do not inherit the binding: submit `wrap(fn)` instead of `fn`. It
+carries the caller's whole context, so other per-request state (e.g. the usage
+session of tools/usage.py) follows the token.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+
+class Cancelled(BaseException):
+    """Raised in a cancelled request where it was waiting or about to call out."""
+
+
+class CancelToken:
+    """Thread-safe, one-way cancellation flag that wakes up every waiter."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._waiters: set[threading.Event] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._event.set()
+            waiters = list(self._waiters)
+        for waiter in waiters:
+            waiter.set()
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise Cancelled("request cancelled")
+
+    def wait_any(self, event: threading.Event, timeout: Optional[float] = None) -> None:
+        """Waits until `event` is set, the token is cancelled or `timeout` elapses."""
+        with self._lock:
+            self._waiters.add(event)
+            if self._event.is_set():
+                event.set()
+        try:
+            event.wait(timeout)
+        finally:
+            with self._lock:
+                self._waiters.discard(event)
+
+
+_current: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar("cancel_token", default=None)
+_local = threading.local()
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="cancellable")
+
+
+def current() -> Optional[CancelToken]:
+    return _current.get()
+
+
+@contextmanager
+def bound(token: Optional[CancelToken]):
+    """Binds `token` to the current thread/context for the duration of the block."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def check() -> None:
+    """Raises Cancelled if the current request has been cancelled."""
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+def cancelled() -> bool:
+    """True if the current request has been cancelled (for code that must not raise, e.g. before caching)."""
+    token = _current.get()
+    return token is not None and token.cancelled
+
+
+def sleep(seconds: float) -> None:
+    """`time.sleep` that wakes up (raising Cancelled) when the current request is cancelled."""
+    token = _current.get()
+    if token is None:
+        time.sleep(seconds)
+        return
+    token.wait_any(threading.Event(), seconds)
+    token.check()
+
+
+def wait(future: Future, timeout: Optional[float] = None) -> Any:
+    """`future.result()` that gives up (raising Cancelled) when the current request is cancelled."""
+    token = _current.get()
+    if token is None:
+        return future.result(timeout)
+    done = threading.Event()
+    future.add_done_callback(lambda _: done.set())
+    token.wait_any(done, timeout)
+    if not future.done():
+        token.check()
+        raise TimeoutError()
+    return future.result()
+
+
+def check_step(memory_step=None, agent=None) -> None:
+    """
+    Agent step callback: ends the run of the current request between steps once
+    it is cancelled. Only that run stops; the agent, shared by every user, is
+    never interrupted as a whole (agent.interrupt()).
+    """
+    check()
+
+
+def run(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking call so that cancelling the current request abandons it.
+    Without a bound token (or when already on a helper thread) `fn` runs inline.
+    """
+    token = _current.get()
+    if token is None or getattr(_local, "helper", False):
+        return fn(*args, **kwargs)
+    token.check()
+    future = _executor.submit(contextvars.copy_context().run, _as_helper, fn, args, kwargs)
+    try:
+        return wait(future)
+    except Cancelled:
+        future.cancel()
+        raise
+
+
+def _as_helper(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    _local.helper = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.helper = False
+
+
+def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Binds the caller's context (token included) to `fn`, for functions submitted to thread pools."""
+    context = contextvars.copy_context()
+
+    def bound_fn(*args, **kwargs):
+        # One copy per call: a context cannot be entered by two threads at once
+        return context.copy().run(fn, *args, **kwargs)
+    return bound_fn
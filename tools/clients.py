@@ -0,0 +1,54 @@
+"""
+Process-wide API clients, built on first use.
+
+Importing the Anthropic SDK alone takes over a second, and every tool module
+used to build its own client (and reload `.env`) at import or construction
+time. Tools now ask here when they actually call out: `.env` is loaded once,
+and a single Anthropic client is shared by every tool and session.
+"""
+import os
+import threading
+from typing import Any, Optional
+
+from tools.registry import profile
+
+_lock = threading.Lock()
+_env_loaded = False
+_anthropic: Optional[Any] = None
+
+
+def load_env() -> None:
+    """Loads `.env` into the environment once per process."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            with profile.timed("load .env"):
+                load_dotenv()
+            _env_loaded = True
+
+
+def env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """`os.getenv` after `.env` has been loaded."""
+    load_env()
+    return os.getenv(name, default)
+
+
+def anthropic_client():
+    """
+    Shared Anthropic client (retries are handled by tools/resilience.py). Its timeout
+    (ANTHROPIC_TIMEOUT, 60 s) also bounds calls abandoned on cancellation, which keep
+    running on their helper thread (cf. tools/cancellation.py).
+    """
+    global _anthropic
+    if _anthropic is None:
+        load_env()
+        with _lock:
+            if _anthropic is None:
+                with profile.timed("client anthropic"):
+                    import anthropic
+                    _anthropic = anthropic.Anthropic(api_key=os.getenv("ANTROPIC_KEY"), max_retries=0,
+                                                     timeout=float(os.getenv("ANTHROPIC_TIMEOUT", 60)))
+    return _anthropic
@@ -0,0 +1,242 @@
+"""
+Shared, read-only country reference data.
+
+Built once at import and shared by every CountryInfoTool instance (and every
+session) instead of being rebuilt in each constructor: one compact record per
+country, French aliases → English name, English name → ISO 3166-1 alpha-2.
+All mappings are read-only views and all strings are interned.
+"""
+import sys
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+
+class CountryRecord:
+    """Immutable country entry: English name, ISO alpha-2 code and French aliases."""
+    __slots__ = ("name", "iso2", "aliases")
+
+    def __init__(self, name: str, iso2: str, aliases: tuple):
+        object.__setattr__(self, "name", sys.intern(name))
+        object.__setattr__(self, "iso2", sys.intern(iso2))
+        object.__setattr__(self, "aliases", tuple(sys.intern(alias) for alias in aliases))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CountryRecord is read-only")
+
+    def __repr__(self) -> str:
+        return f"CountryRecord({self.name!r}, {self.iso2!r}, {self.aliases!r})"
+
+
+# (nom anglais utilisé par les APIs, code ISO 3166-1 alpha-2, alias français)
+_COUNTRIES = (
+    # Europe
+    ('France', 'FR', ('france',)),
+    ('Germany', 'DE', ('allemagne',)),
+    ('Italy', 'IT', ('italie',)),
+    ('Spain', 'ES', ('espagne',)),
+    ('United Kingdom', 'GB', ('royaume-uni', 'angleterre', 'écosse')),
+    ('Netherlands', 'NL', ('pays-bas', 'hollande')),
+    ('Belgium', 'BE', ('belgique',)),
+    ('Switzerland', 'CH', ('suisse',)),
+    ('Austria', 'AT', ('autriche',)),
+    ('Portugal', 'PT', ('portugal',)),
+    ('Sweden', 'SE', ('suède',)),
+    ('Norway', 'NO', ('norvège',)),
+    ('Denmark', 'DK', ('danemark',)),
+    ('Finland', 'FI', ('finlande',)),
+    ('Poland', 'PL', ('pologne',)),
+    ('Czech Republic', 'CZ', ('république tchèque', 'tchéquie')),
+    ('Hungary', 'HU', ('hongrie',)),
+    ('Romania', 'RO', ('roumanie',)),
+    ('Bulgaria', 'BG', ('bulgarie',)),
+    ('Greece', 'GR', ('grèce',)),
+    ('Croatia', 'HR', ('croatie',)),
+    ('Slovenia', 'SI', ('slovénie',)),
+    ('Slovakia', 'SK', ('slovaquie',)),
+    ('Estonia', 'EE', ('estonie',)),
+    ('Latvia', 'LV', ('lettonie',)),
+    ('Lithuania', 'LT', ('lituanie',)),
+    ('Ireland', 'IE', ('irlande',)),
+    ('Iceland', 'IS', ('islande',)),
+    ('Malta', 'MT', ('malte',)),
+    ('Cyprus', 'CY', ('chypre',)),
+    ('Serbia', 'RS', ('serbie',)),
+    ('Bosnia and Herzegovina', 'BA', ('bosnie',)),
+    ('Montenegro', 'ME', ('monténégro',)),
+    ('North Macedonia', 'MK', ('macédoine',)),
+    ('Albania', 'AL', ('albanie',)),
+    ('Moldova', 'MD', ('moldavie',)),
+    ('Ukraine', 'UA', ('ukraine',)),
+    ('Belarus', 'BY', ('biélorussie',)),
+    ('Russia', 'RU', ('russie',)),
+
+    # Amériques
+    ('United States', 'US', ('états-unis', 'usa', 'amérique')),
+    ('Canada', 'CA', ('canada',)),
+    ('Mexico', 'MX', ('mexique',)),
+    ('Brazil', 'BR', ('brésil',)),
+    ('Argentina', 'AR', ('argentine',)),
+    ('Chile', 'CL', ('chili',)),
+    ('Peru', 'PE', ('pérou',)),
+    ('Colombia', 'CO', ('colombie',)),
+    ('Venezuela', 'VE', ('venezuela',)),
+    ('Ecuador', 'EC', ('équateur',)),
+    ('Bolivia', 'BO', ('bolivie',)),
+    ('Paraguay', 'PY', ('paraguay',)),
+    ('Uruguay', 'UY', ('uruguay',)),
+    ('Guatemala', 'GT', ('guatemala',)),
+    ('Costa Rica', 'CR', ('costa rica',)),
+    ('Panama', 'PA', ('panama',)),
+    ('Cuba', 'CU', ('cuba',)),
+    ('Jamaica', 'JM', ('jamaïque',)),
+    ('Haiti', 'HT', ('haïti',)),
+    ('Dominican Republic', 'DO', ('république dominicaine',)),
+
+    # Asie
+    ('China', 'CN', ('chine',)),
+    ('Japan', 'JP', ('japon',)),
+    ('South Korea', 'KR', ('corée du sud',)),
+    ('North Korea', 'KP', ('corée du nord',)),
+    ('India', 'IN', ('inde',)),
+    ('Pakistan', 'PK', ('pakistan',)),
+    ('Bangladesh', 'BD', ('bangladesh',)),
+    ('Sri Lanka', 'LK', ('sri lanka',)),
+    ('Thailand', 'TH', ('thaïlande',)),
+    ('Vietnam', 'VN', ('vietnam',)),
+    ('Cambodia', 'KH', ('cambodge',)),
+    ('Laos', 'LA', ('laos',)),
+    ('Myanmar', 'MM', ('myanmar', 'birmanie')),
+    ('Malaysia', 'MY', ('malaisie',)),
+    ('Singapore', 'SG', ('singapour',)),
+    ('Indonesia', 'ID', ('indonésie',)),
+    ('Philippines', 'PH', ('philippines',)),
+    ('Brunei', 'BN', ('brunei',)),
+    ('Mongolia', 'MN', ('mongolie',)),
+    ('Kazakhstan', 'KZ', ('kazakhstan',)),
+    ('Uzbekistan', 'UZ', ('ouzbékistan',)),
+    ('Kyrgyzstan', 'KG', ('kirghizistan',)),
+    ('Tajikistan', 'TJ', ('tadjikistan',)),
+    ('Turkmenistan', 'TM', ('turkménistan',)),
+    ('Afghanistan', 'AF', ('afghanistan',)),
+    ('Iran', 'IR', ('iran',)),
+    ('Iraq', 'IQ', ('irak',)),
+    ('Syria', 'SY', ('syrie',)),
+    ('Turkey', 'TR', ('turquie',)),
+    ('Israel', 'IL', ('israël',)),
+    ('Palestine', 'PS', ('palestine',)),
+    ('Lebanon', 'LB', ('liban',)),
+    ('Jordan', 'JO', ('jordanie',)),
+    ('Saudi Arabia', 'SA', ('arabie saoudite',)),
+    ('United Arab Emirates', 'AE', ('émirats arabes unis',)),
+    ('Qatar', 'QA', ('qatar',)),
+    ('Kuwait', 'KW', ('koweït',)),
+    ('Bahrain', 'BH', ('bahreïn',)),
+    ('Oman', 'OM', ('oman',)),
+    ('Yemen', 'YE', ('yémen',)),
+
+    # Afrique
+    ('Morocco', 'MA', ('maroc',)),
+    ('Algeria', 'DZ', ('algérie',)),
+    ('Tunisia', 'TN', ('tunisie',)),
+    ('Libya', 'LY', ('libye',)),
+    ('Egypt', 'EG', ('égypte',)),
+    ('Sudan', 'SD', ('soudan',)),
+    ('Ethiopia', 'ET', ('éthiopie',)),
+    ('Kenya', 'KE', ('kenya',)),
+    ('Tanzania', 'TZ', ('tanzanie',)),
+    ('Uganda', 'UG', ('ouganda',)),
+    ('Rwanda', 'RW', ('rwanda',)),
+    ('Burundi', 'BI', ('burundi',)),
+    ('Democratic Republic of the Congo', 'CD', ('congo', 'république démocratique du congo', 'rdc')),
+    ('Republic of the Congo', 'CG', ('république du congo',)),
+    ('Cameroon', 'CM', ('cameroun',)),
+    ('Nigeria', 'NG', ('nigeria',)),
+    ('Ghana', 'GH', ('ghana',)),
+    ('Ivory Coast', 'CI', ("côte d'ivoire",)),
+    ('Senegal', 'SN', ('sénégal',)),
+    ('Mali', 'ML', ('mali',)),
+    ('Burkina Faso', 'BF', ('burkina faso',)),
+    ('Niger', 'NE', ('niger',)),
+    ('Chad', 'TD', ('tchad',)),
+    ('Central African Republic', 'CF', ('centrafrique',)),
+    ('Gabon', 'GA', ('gabon',)),
+    ('Equatorial Guinea', 'GQ', ('guinée équatoriale',)),
+    ('Sao Tome and Principe', 'ST', ('sao tomé',)),
+    ('Cape Verde', 'CV', ('cap-vert',)),
+    ('Guinea-Bissau', 'GW', ('guinée-bissau',)),
+    ('Guinea', 'GN', ('guinée',)),
+    ('Sierra Leone', 'SL', ('sierra leone',)),
+    ('Liberia', 'LR', ('liberia',)),
+    ('Togo', 'TG', ('togo',)),
+    ('Benin', 'BJ', ('bénin',)),
+    ('Mauritania', 'MR', ('mauritanie',)),
+    ('Gambia', 'GM', ('gambie',)),
+    ('South Africa', 'ZA', ('afrique du sud',)),
+    ('Namibia', 'NA', ('namibie',)),
+    ('Botswana', 'BW', ('botswana',)),
+    ('Zimbabwe', 'ZW', ('zimbabwe',)),
+    ('Zambia', 'ZM', ('zambie',)),
+    ('Malawi', 'MW', ('malawi',)),
+    ('Mozambique', 'MZ', ('mozambique',)),
+    ('Madagascar', 'MG', ('madagascar',)),
+    ('Mauritius', 'MU', ('maurice',)),
+    ('Seychelles', 'SC', ('seychelles',)),
+    ('Comoros', 'KM', ('comores',)),
+    ('Djibouti', 'DJ', ('djibouti',)),
+    ('Eritrea', 'ER', ('érythrée',)),
+    ('Somalia', 'SO', ('somalie',)),
+    ('Lesotho', 'LS', ('lesotho',)),
+    ('Eswatini', 'SZ', ('eswatini', 'swaziland')),
+
+    # Océanie
+    ('Australia', 'AU', ('australie',)),
+    ('New Zealand', 'NZ', ('nouvelle-zélande',)),
+    ('Fiji', 'FJ', ('fidji',)),
+    ('Papua New Guinea', 'PG', ('papouasie-nouvelle-guinée',)),
+    ('Vanuatu', 'VU', ('vanuatu',)),
+    ('Samoa', 'WS', ('samoa',)),
+    ('Tonga', 'TO', ('tonga',)),
+    ('Solomon Islands', 'SB', ('îles salomon',)),
+    ('Micronesia', 'FM', ('micronésie',)),
+    ('Palau', 'PW', ('palau',)),
+    ('Nauru', 'NR', ('nauru',)),
+    ('Kiribati', 'KI', ('kiribati',)),
+    ('Tuvalu', 'TV', ('tuvalu',)),
+)
+
+COUNTRIES: Mapping[str, CountryRecord] = MappingProxyType({
+    record.name: record for record in (CountryRecord(*entry) for entry in _COUNTRIES)
+})
+
+# Alias français (en minuscules) → nom anglais, dans l'ordre de la table
+FRENCH_TO_ENGLISH: Mapping[str, str] = MappingProxyType({
+    alias: record.name for record in COUNTRIES.values() for alias in record.aliases
+})
+
+# Index inverse : nom anglais → code ISO
+ENGLISH_TO_ISO: Mapping[str, str] = MappingProxyType({name: record.iso2 for name, record in COUNTRIES.items()})
+
+_ENGLISH_BY_LOWER: Mapping[str, str] = MappingProxyType({name.lower(): name for name in COUNTRIES})
+_ALIAS_ITEMS = tuple(FRENCH_TO_ENGLISH.items())
+
+
+def normalize(country: str) -> Optional[str]:
+    """
+    English name of `country` (French alias, English name, or partial match on an
+    alias), None if unknown.
+    """
+    country_lower = country.lower().strip()
+    if not country_lower:
+        return None
+    english = FRENCH_TO_ENGLISH.get(country_lower) or _ENGLISH_BY_LOWER.get(country_lower)
+    if english:
+        return english
+    for alias, english in _ALIAS_ITEMS:
+        if country_lower in alias or alias in country_lower:
+            return english
+    return None
+
+
+def iso_code(country: str) -> Optional[str]:
+    """ISO alpha-2 code of an English country name."""
+    return ENGLISH_TO_ISO.get(country)
@@ -1,12 +1,16 @@
-from typing import Any
+from typing import Any, Optional
 from smolagents.tools import Tool
+import copy
 import requests
 from datetime import datetime, timedelta
 import json
 import os
-from dotenv import load_dotenv
 import re
-import anthropic
+import time
+from tools import cancellation, clients, country_data, country_report_cache, news_dedup, news_ranking, resilience, results
+from tools.country_report_cache import CountryReportCache
+from tools.country_report_store import CountryReportStore
+from tools.results import CountryResult
 
 class CountryInfoTool(Tool):
     name = "country_info"
@@ -15,161 +19,149 @@ class CountryInfoTool(Tool):
         'country': {'type': 'string', 'description': 'Country name in French or English (e.g., "France", "United States", "Japan")'},
         'info_type': {'type': 'string', 'description': 'Type of information requested: "all" (recommended), "security", "events", "holidays", "travel", "politics"', 'nullable': True}
     }
-    output_type = "string"
-
-    def __init__(self):
+    output_type = "object"
+    observation_budget = 600
+
+    # Sections du rapport, dans l'ordre d'affichage (cf. CountryResult.render)
+    SECTIONS = results.COUNTRY_SECTIONS
+
+    # Marqueurs d'une destination déconseillée (analyse de sécurité ou recommandation finale)
+    CHANGE_MARKERS = ("CHANGE DESTINATION", "CHANGE_DESTINATION")
+
+    # Niveau de sécurité selon la pastille de l'analyse
+    SAFETY_LEVELS = {icon: level for level, icon in results.SAFETY_ICONS.items()}
+
+    # Données pays partagées en lecture seule (cf. tools/country_data.py)
+    country_mapping = country_data.FRENCH_TO_ENGLISH
+    country_codes = country_data.ENGLISH_TO_ISO
+
+    def __init__(self, report_cache: Optional[CountryReportCache] = None, report_store: Optional[CountryReportStore] = None, max_section_age: float = 86400):
+        """
+        Args:
+            report_cache: cache stale-while-revalidate (par défaut le cache partagé du processus).
+            report_store: store local de sections précalculées (cf. materialize_country_reports.py).
+                Si fourni, les sections plus récentes que `max_section_age` secondes sont servies
+                depuis le store et seules les sections plus anciennes sont récupérées en direct.
+            max_section_age: âge maximal (secondes) d'une section servie depuis le store.
+        """
         super().__init__()
-        load_dotenv()
-        
-        # Initialiser le client Claude (Anthropic)
-        self.claude_client = anthropic.Anthropic(api_key=os.getenv('ANTROPIC_KEY'))
         
-        # Mapping étendu des pays français vers anglais pour les APIs
-        self.country_mapping = {
-            # Europe
-            'france': 'France', 'allemagne': 'Germany', 'italie': 'Italy', 'espagne': 'Spain',
-            'royaume-uni': 'United Kingdom', 'angleterre': 'United Kingdom', 'écosse': 'United Kingdom',
-            'pays-bas': 'Netherlands', 'hollande': 'Netherlands', 'belgique': 'Belgium', 
-            'suisse': 'Switzerland', 'autriche': 'Austria', 'portugal': 'Portugal',
-            'suède': 'Sweden', 'norvège': 'Norway', 'danemark': 'Denmark', 'finlande': 'Finland',
-            'pologne': 'Poland', 'république tchèque': 'Czech Republic', 'tchéquie': 'Czech Republic',
-            'hongrie': 'Hungary', 'roumanie': 'Romania', 'bulgarie': 'Bulgaria',
-            'grèce': 'Greece', 'croatie': 'Croatia', 'slovénie': 'Slovenia', 'slovaquie': 'Slovakia',
-            'estonie': 'Estonia', 'lettonie': 'Latvia', 'lituanie': 'Lithuania',
-            'irlande': 'Ireland', 'islande': 'Iceland', 'malte': 'Malta', 'chypre': 'Cyprus',
-            'serbie': 'Serbia', 'bosnie': 'Bosnia and Herzegovina', 'monténégro': 'Montenegro',
-            'macédoine': 'North Macedonia', 'albanie': 'Albania', 'moldavie': 'Moldova',
-            'ukraine': 'Ukraine', 'biélorussie': 'Belarus', 'russie': 'Russia',
-            
-            # Amériques
-            'états-unis': 'United States', 'usa': 'United States', 'amérique': 'United States',
-            'canada': 'Canada', 'mexique': 'Mexico',
-            'brésil': 'Brazil', 'argentine': 'Argentina', 'chili': 'Chile', 'pérou': 'Peru',
-            'colombie': 'Colombia', 'venezuela': 'Venezuela', 'équateur': 'Ecuador',
-            'bolivie': 'Bolivia', 'paraguay': 'Paraguay', 'uruguay': 'Uruguay',
-            'guatemala': 'Guatemala', 'costa rica': 'Costa Rica', 'panama': 'Panama',
-            'cuba': 'Cuba', 'jamaïque': 'Jamaica', 'haïti': 'Haiti', 'république dominicaine': 'Dominican Republic',
-            
-            # Asie
-            'chine': 'China', 'japon': 'Japan', 'corée du sud': 'South Korea', 'corée du nord': 'North Korea',
-            'inde': 'India', 'pakistan': 'Pakistan', 'bangladesh': 'Bangladesh', 'sri lanka': 'Sri Lanka',
-            'thaïlande': 'Thailand', 'vietnam': 'Vietnam', 'cambodge': 'Cambodia', 'laos': 'Laos',
-            'myanmar': 'Myanmar', 'birmanie': 'Myanmar', 'malaisie': 'Malaysia', 'singapour': 'Singapore',
-            'indonésie': 'Indonesia', 'philippines': 'Philippines', 'brunei': 'Brunei',
-            'mongolie': 'Mongolia', 'kazakhstan': 'Kazakhstan', 'ouzbékistan': 'Uzbekistan',
-            'kirghizistan': 'Kyrgyzstan', 'tadjikistan': 'Tajikistan', 'turkménistan': 'Turkmenistan',
-            'afghanistan': 'Afghanistan', 'iran': 'Iran', 'irak': 'Iraq', 'syrie': 'Syria',
-            'turquie': 'Turkey', 'israël': 'Israel', 'palestine': 'Palestine', 'liban': 'Lebanon',
-            'jordanie': 'Jordan', 'arabie saoudite': 'Saudi Arabia', 'émirats arabes unis': 'United Arab Emirates',
-            'qatar': 'Qatar', 'koweït': 'Kuwait', 'bahreïn': 'Bahrain', 'oman': 'Oman', 'yémen': 'Yemen',
-            
-            # Afrique
-            'maroc': 'Morocco', 'algérie': 'Algeria', 'tunisie': 'Tunisia', 'libye': 'Libya', 'égypte': 'Egypt',
-            'soudan': 'Sudan', 'éthiopie': 'Ethiopia', 'kenya': 'Kenya', 'tanzanie': 'Tanzania',
-            'ouganda': 'Uganda', 'rwanda': 'Rwanda', 'burundi': 'Burundi', 'congo': 'Democratic Republic of the Congo',
-            'république démocratique du congo': 'Democratic Republic of the Congo', 'rdc': 'Democratic Republic of the Congo',
-            'république du congo': 'Republic of the Congo', 'cameroun': 'Cameroon', 'nigeria': 'Nigeria',
-            'ghana': 'Ghana', 'côte d\'ivoire': 'Ivory Coast', 'sénégal': 'Senegal', 'mali': 'Mali',
-            'burkina faso': 'Burkina Faso', 'niger': 'Niger', 'tchad': 'Chad', 'centrafrique': 'Central African Republic',
-            'gabon': 'Gabon', 'guinée équatoriale': 'Equatorial Guinea', 'sao tomé': 'Sao Tome and Principe',
-            'cap-vert': 'Cape Verde', 'guinée-bissau': 'Guinea-Bissau', 'guinée': 'Guinea',
-            'sierra leone': 'Sierra Leone', 'liberia': 'Liberia', 'togo': 'Togo', 'bénin': 'Benin',
-            'mauritanie': 'Mauritania', 'gambie': 'Gambia', 'afrique du sud': 'South Africa',
-            'namibie': 'Namibia', 'botswana': 'Botswana', 'zimbabwe': 'Zimbabwe', 'zambie': 'Zambia',
-            'malawi': 'Malawi', 'mozambique': 'Mozambique', 'madagascar': 'Madagascar', 'maurice': 'Mauritius',
-            'seychelles': 'Seychelles', 'comores': 'Comoros', 'djibouti': 'Djibouti', 'érythrée': 'Eritrea',
-            'somalie': 'Somalia', 'lesotho': 'Lesotho', 'eswatini': 'Eswatini', 'swaziland': 'Eswatini',
-            
-            # Océanie
-            'australie': 'Australia', 'nouvelle-zélande': 'New Zealand', 'fidji': 'Fiji',
-            'papouasie-nouvelle-guinée': 'Papua New Guinea', 'vanuatu': 'Vanuatu', 'samoa': 'Samoa',
-            'tonga': 'Tonga', 'îles salomon': 'Solomon Islands', 'micronésie': 'Micronesia',
-            'palau': 'Palau', 'nauru': 'Nauru', 'kiribati': 'Kiribati', 'tuvalu': 'Tuvalu'
-        }
-        
-        # Codes ISO pour certaines APIs
-        self.country_codes = {
-            'France': 'FR', 'United States': 'US', 'United Kingdom': 'GB',
-            'Germany': 'DE', 'Italy': 'IT', 'Spain': 'ES', 'Japan': 'JP',
-            'China': 'CN', 'India': 'IN', 'Brazil': 'BR', 'Canada': 'CA',
-            'Australia': 'AU', 'Russia': 'RU', 'Mexico': 'MX', 'South Korea': 'KR',
-            'Netherlands': 'NL', 'Belgium': 'BE', 'Switzerland': 'CH',
-            'Sweden': 'SE', 'Norway': 'NO', 'Denmark': 'DK', 'Turkey': 'TR',
-            'Egypt': 'EG', 'Thailand': 'TH', 'Iran': 'IR'
-        }
-
-    def forward(self, country: str, info_type: str = "all") -> str:
+        # Cache partagé stale-while-revalidate des rapports par pays
+        self.report_cache = report_cache or country_report_cache.shared
+        self.report_store = report_store
+        self.max_section_age = max_section_age
+
+    @property
+    def claude_client(self):
+        """Client Claude partagé, créé au premier appel (cf. tools/clients.py)"""
+        return clients.anthropic_client()
+
+    def forward(self, country: str, info_type: str = "all") -> CountryResult:
         try:
             # Normaliser le nom du pays
             country_normalized = self._normalize_country_name(country)
             
             if not country_normalized:
-                return f"❌ Country not recognized: '{country}'. Try with the full name (e.g., 'France', 'United States', 'United Kingdom')"
-            
-            # Collecter les informations selon le type demandé
-            info_sections = []
-            
-            if info_type in ["all", "security"]:
-                security_info = self._get_security_info(country_normalized)
-                if security_info:
-                    info_sections.append(security_info)
-            
-            if info_type in ["all", "events"]:
-                events_info = self._get_current_events_info(country_normalized)
-                if events_info:
-                    info_sections.append(events_info)
-            
-            if info_type in ["all", "holidays"]:
-                holidays_info = self._get_holidays_info(country_normalized)
-                if holidays_info:
-                    info_sections.append(holidays_info)
-            
-            if info_type in ["all", "travel"]:
-                travel_info = self._get_travel_info(country_normalized)
-                if travel_info:
-                    info_sections.append(travel_info)
-            
-            if info_type in ["all", "politics"]:
-                politics_info = self._get_political_info(country_normalized)
-                if politics_info:
-                    info_sections.append(politics_info)
-            
-            if not info_sections:
-                return f"❌ No information available for {country_normalized} currently."
-            
-            # Assembler le rapport final
-            result = f"🌍 **Contextual Information for {country_normalized}**\n"
-            result += f"*Updated: {datetime.now().strftime('%m/%d/%Y %H:%M')}*\n\n"
-            result += "\n\n".join(info_sections)
-            
-            # Ajouter une recommandation finale intelligente si Claude est disponible et qu'on demande toutes les infos
-            if info_type == "all" and self.claude_client:
-                final_recommendation = self._get_llm_final_recommendation(country_normalized, "\n\n".join(info_sections))
-                if final_recommendation:
-                    result += f"\n\n{final_recommendation}"
-            
-            return result
+                return CountryResult(country, info_type, error=f"Country not recognized: '{country}'. Try with the full name (e.g., 'France', 'United States', 'United Kingdom')")
+            
+            # Servir depuis le cache (même légèrement périmé) ; rafraîchissement en arrière-plan.
+            # Seuls les rapports complets, construits hors d'une requête annulée, sont gardés en cache
+            report = self.report_cache.get(
+                (country_normalized, info_type),
+                lambda: self._build_report(country_normalized, info_type),
+                should_cache=lambda built: built.ok and not built.missing and not cancellation.cancelled(),
+            )
+            # Copie : le rapport en cache est partagé entre les sessions
+            return copy.deepcopy(report)
             
         except Exception as e:
-            return f"❌ Error retrieving information: {str(e)}"
-
-    def _normalize_country_name(self, country: str):
-        """Normalise le nom du pays"""
-        country_lower = country.lower().strip()
+            return CountryResult(country, info_type, error=f"Could not retrieve information: {str(e)}")
+
+    def _build_report(self, country_normalized: str, info_type: str) -> CountryResult:
+        """
+        Construit le rapport (sections stockées si assez récentes, sinon appels NewsAPI,
+        REST Countries, Nager.Date et Claude). Les sections qui n'ont pas pu être
+        construites (panne, budget de session, Claude absent) sont listées dans `missing`.
+        """
+        sections = [section for section in self.SECTIONS if info_type in ("all", section)]
+        if not sections:
+            return CountryResult(country_normalized, info_type, error=f"No information available for {country_normalized} currently.")
         
-        # Vérifier dans le mapping français -> anglais
-        if country_lower in self.country_mapping:
-            return self.country_mapping[country_lower]
+        # Collecter les champs de chaque section demandée
+        report = CountryResult(country_normalized, info_type)
+        oldest = time.time()
+        for section in sections:
+            fields, fetched_at = self._get_section(country_normalized, section)
+            if fields is None:
+                report.missing.append(section)
+                continue
+            self._apply(report, fields)
+            oldest = min(oldest, fetched_at)
+        report.updated = datetime.fromtimestamp(oldest).strftime('%m/%d/%Y %H:%M')
         
-        # Vérifier si c'est déjà un nom anglais valide
-        for french, english in self.country_mapping.items():
-            if country_lower == english.lower():
-                return english
+        # Ajouter une recommandation finale intelligente si Claude est disponible et qu'on demande toutes les infos
+        if info_type == "all" and self.claude_client:
+            # Une recommandation tirée d'un rapport incomplet n'est pas stockée
+            fields, _ = self._get_section(country_normalized, "recommendation", report.render(), store=not report.missing)
+            if fields is None:
+                report.missing.append("recommendation")
+            else:
+                self._apply(report, fields)
         
-        # Essayer une correspondance partielle
-        for french, english in self.country_mapping.items():
-            if country_lower in french or french in country_lower:
-                return english
+        report.change_destination = any(
+            marker in (text or "").upper()
+            for text in (report.safety_advice, report.recommendation)
+            for marker in self.CHANGE_MARKERS
+        )
+        return report
+
+    @staticmethod
+    def _apply(report: CountryResult, fields: dict) -> None:
+        """Recopie les champs d'une section dans le rapport"""
+        for name, value in fields.items():
+            if name == "holidays" and value is not None:
+                value = [tuple(holiday) for holiday in value]
+            setattr(report, name, value)
+
+    def _get_section(self, country: str, section: str, *args, store: bool = True) -> tuple:
+        """
+        Renvoie (champs, horodatage) d'une section : depuis le store si assez récente,
+        sinon en direct. Les champs sont None si la section n'a pas pu être construite ;
+        seules les sections réussies sont stockées (et seulement si `store`).
+        """
+        if self.report_store is not None:
+            stored = self.report_store.get_fresh(country, section, self.max_section_age)
+            if stored:
+                try:
+                    fields = json.loads(stored[0])
+                except ValueError:
+                    fields = None  # section stockée avant le passage aux champs structurés
+                if isinstance(fields, dict):
+                    return fields, stored[1]
+        
+        fields = self._fetch_section(country, section, *args)
+        if fields is not None and store and self.report_store is not None and not cancellation.cancelled():
+            self.report_store.put(country, section, json.dumps(fields, ensure_ascii=False))
+        return fields, time.time()
+
+    def _fetch_section(self, country: str, section: str, *args) -> Optional[dict]:
+        """Génère les champs d'une section en direct (None en cas d'échec)"""
+        builder = {
+            'security': self._get_security_info,
+            'events': self._get_current_events_info,
+            'holidays': self._get_holidays_info,
+            'travel': self._get_travel_info,
+            'politics': self._get_political_info,
+            'recommendation': self._get_llm_final_recommendation,
+        }[section]
+        return builder(country, *args)
+
+    def _normalize_country_name(self, country: str):
+        """Normalise le nom du pays"""
+        # Alias français, nom anglais ou correspondance partielle (table partagée)
+        english = country_data.normalize(country)
+        if english:
+            return english
         
         # Si pas trouvé dans le mapping, essayer de valider via l'API REST Countries
         validated_country = self._validate_country_via_api(country)
@@ -183,7 +175,7 @@ class CountryInfoTool(Tool):
         try:
             # Essayer d'abord avec le nom exact
             url = f"https://restcountries.com/v3.1/name/{country}"
-            response = requests.get(url, timeout=5)
+            response = resilience.get_provider("restcountries").get(url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -193,7 +185,7 @@ class CountryInfoTool(Tool):
             
             # Si échec, essayer avec une recherche partielle
             url = f"https://restcountries.com/v3.1/name/{country}?fullText=false"
-            response = requests.get(url, timeout=5)
+            response = resilience.get_provider("restcountries").get(url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -211,7 +203,7 @@ class CountryInfoTool(Tool):
         """Récupère le code ISO du pays via l'API REST Countries"""
         try:
             url = f"https://restcountries.com/v3.1/name/{country}"
-            response = requests.get(url, timeout=5)
+            response = resilience.get_provider("restcountries").get(url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -224,8 +216,8 @@ class CountryInfoTool(Tool):
         except Exception:
             return None
 
-    def _get_security_info(self, country: str) -> str:
-        """Récupère les informations de sécurité avec recherche exhaustive"""
+    def _get_security_info(self, country: str) -> Optional[dict]:
+        """Récupère les informations de sécurité avec recherche exhaustive (None si l'analyse a échoué)"""
         try:
             # Vérifier d'abord si c'est un pays à risque connu
             risk_level = self._check_known_risk_countries(country)
@@ -253,27 +245,29 @@ class CountryInfoTool(Tool):
             news_data4 = self._search_security_news(travel_keywords)
             all_news_data.extend(news_data4)
             
-            # Supprimer les doublons
+            # Trier par pertinence pour que chaque groupe soit représenté par l'article le plus pertinent
+            all_news_data.sort(key=lambda article: article.get('relevance', 0), reverse=True)
+            
+            # Regrouper les quasi-doublons (dépêches reprises avec des titres proches) :
+            # un représentant par histoire, avec le nombre de sources qui la rapportent
             unique_news = []
-            seen_titles = set()
-            for article in all_news_data:
-                title = article.get('title', '')
-                if title and title not in seen_titles:
-                    unique_news.append(article)
-                    seen_titles.add(title)
+            for article, cluster_size in news_dedup.cluster_articles(all_news_data):
+                unique_news.append(dict(article, cluster_size=cluster_size))
             
             # Analyser les résultats pour déterminer le niveau de sécurité
-            security_level, description, recommendation = self._analyze_security_data(country, unique_news, risk_level)
-            
-            result = f"🛡️ **Security and Travel Advice**\n"
-            result += f"{security_level} **Level determined by real-time analysis**\n"
-            result += f"📋 {description}\n"
-            result += f"🎯 **Recommendation: {recommendation}**"
+            analysis = self._analyze_security_data(country, unique_news, risk_level)
+            if analysis is None:
+                return None
+            security_level, description, recommendation = analysis
             
-            return result
+            return {
+                'safety': self.SAFETY_LEVELS.get(security_level, 'unknown'),
+                'safety_description': description,
+                'safety_advice': recommendation,
+            }
             
-        except Exception as e:
-            return f"🛡️ **Security**: Error during retrieval - {str(e)}"
+        except Exception:
+            return None
 
     def _check_known_risk_countries(self, country: str) -> str:
         """Vérifie si le pays est dans la liste des pays à risque connus"""
@@ -319,7 +313,7 @@ class CountryInfoTool(Tool):
         """Recherche d'actualités de sécurité avec période étendue"""
         try:
             # Utiliser NewsAPI si disponible
-            api_key = os.getenv('NEWSAPI_KEY')
+            api_key = clients.env('NEWSAPI_KEY')
             if api_key:
                 url = "https://newsapi.org/v2/everything"
                 params = {
@@ -331,30 +325,20 @@ class CountryInfoTool(Tool):
                     'apiKey': api_key
                 }
                 
-                response = requests.get(url, params=params, timeout=10)
+                response = resilience.get_provider("newsapi").get(url, params=params, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     articles = data.get('articles', [])
                     
-                    # Filtrer les articles pertinents
-                    relevant_articles = []
-                    for article in articles:
-                        title = article.get('title', '').lower()
-                        description = article.get('description', '').lower()
-                        
-                        # Mots-clés critiques pour filtrer
-                        critical_keywords = ['war', 'conflict', 'attack', 'bombing', 'terrorism', 
-                                           'violence', 'crisis', 'coup', 'sanctions', 'advisory',
-                                           'warning', 'danger', 'risk', 'threat', 'security']
-                        
-                        if any(keyword in title or keyword in description for keyword in critical_keywords):
-                            relevant_articles.append(article)
-                    
-                    return relevant_articles
+                    # Classer les articles pertinents (termes pondérés, fraîcheur, source) et garder les meilleurs
+                    return news_ranking.default_scorer().top_k(articles, k=10)
             
             # Fallback: recherche via une API publique alternative
             return self._search_alternative_news(keywords)
             
+        except resilience.ProviderUnavailableError:
+            # Ne pas confondre une panne du fournisseur avec "aucune actualité"
+            raise
         except Exception:
             return []
 
@@ -377,21 +361,21 @@ class CountryInfoTool(Tool):
         except Exception:
             return []
 
-    def _analyze_security_data(self, country: str, news_data: list, risk_level: str = "UNKNOWN") -> tuple:
-        """Analyse les données de sécurité avec Claude uniquement"""
+    def _analyze_security_data(self, country: str, news_data: list, risk_level: str = "UNKNOWN") -> Optional[tuple]:
+        """Analyse les données de sécurité avec Claude uniquement (None si Claude est absent ou l'analyse impossible)"""
         try:
             if not self.claude_client:
-                return ("⚪", 
-                       "Claude not available", 
-                       "❓ Anthropic API key required for security analysis")
+                return None
             
             # Préparer le contenu des actualités pour l'analyse
             news_content = ""
             for i, article in enumerate(news_data[:10], 1):  # Limiter à 10 articles
-                title = article.get('title', '')
-                description = article.get('description', '')
+                title = article.get('title') or ''
+                description = article.get('description') or ''
                 if title or description:
-                    news_content += f"{i}. {title}\n{description}\n\n"
+                    sources = article.get('cluster_size', 1)
+                    reported_by = f" [reported by {sources} sources]" if sources > 1 else ""
+                    news_content += f"{i}. {title}{reported_by}\n{description}\n\n"
             
             # Si pas d'actualités mais pays à haut risque connu, forcer l'analyse
             if not news_content.strip():
@@ -409,17 +393,10 @@ class CountryInfoTool(Tool):
                            "✅ Destination considered safe")
             
             # Utiliser Claude pour analyser
-            analysis = self._llm_security_analysis(country, news_content, risk_level)
-            
-            if analysis:
-                return analysis
-            else:
-                return ("⚪", 
-                       "Claude analysis error", 
-                       "❓ Unable to analyze security currently")
+            return self._llm_security_analysis(country, news_content, risk_level)
                        
         except Exception:
-            return ("⚪", "Analysis impossible", "❓ Consult official sources")
+            return None
 
     def _llm_security_analysis(self, country: str, news_content: str, risk_level: str = "UNKNOWN"):
         """Utilise Claude pour analyser la sécurité du pays"""
@@ -460,7 +437,8 @@ STRICT Criteria:
 
 ABSOLUTE PRIORITY: Protect travelers - when in doubt, choose the strictest security level."""
 
-            response = self.claude_client.messages.create(
+            response = resilience.get_provider("anthropic").call(
+                self.claude_client.messages.create,
                 model="claude-3-opus-20240229",
                 max_tokens=300,
                 temperature=0.1,
@@ -500,31 +478,23 @@ ABSOLUTE PRIORITY: Protect travelers - when in doubt, choose the strictest secur
 
 
 
-    def _get_current_events_info(self, country: str) -> str:
+    def _get_current_events_info(self, country: str) -> Optional[dict]:
         """Retrieves current events via web search"""
         try:
             # Search for recent events
             events_keywords = f"{country} current events news today recent"
             events_data = self._search_current_events(events_keywords)
             
-            if not events_data:
-                return f"📅 **Events**: No major events detected for {country}"
-            
-            result = f"📅 **Current Events and Context**\n"
-            for i, event in enumerate(events_data[:5], 1):
-                title = event.get('title', 'Event not specified')
-                result += f"• {title}\n"
-            
-            return result.rstrip()
+            return {'events': [event.get('title') or 'Event not specified' for event in events_data[:5]]}
             
         except Exception:
-            return "📅 **Events**: Error during retrieval"
+            return None
 
     def _search_current_events(self, keywords: str) -> list:
         """Recherche d'événements actuels"""
         try:
             # Utiliser NewsAPI si disponible
-            api_key = os.getenv('NEWSAPI_KEY')
+            api_key = clients.env('NEWSAPI_KEY')
             if api_key:
                 url = "https://newsapi.org/v2/everything"
                 params = {
@@ -536,17 +506,19 @@ ABSOLUTE PRIORITY: Protect travelers - when in doubt, choose the strictest secur
                     'apiKey': api_key
                 }
                 
-                response = requests.get(url, params=params, timeout=10)
+                response = resilience.get_provider("newsapi").get(url, params=params, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     return data.get('articles', [])
             
             return []
             
+        except resilience.ProviderUnavailableError:
+            raise
         except Exception:
             return []
 
-    def _get_holidays_info(self, country: str) -> str:
+    def _get_holidays_info(self, country: str) -> Optional[dict]:
         """Retrieves national holidays via API"""
         try:
             country_code = self.country_codes.get(country, '')
@@ -555,20 +527,20 @@ ABSOLUTE PRIORITY: Protect travelers - when in doubt, choose the strictest secur
             if not country_code:
                 country_code = self._get_country_code_from_api(country)
             
+            # No holiday data for this country (holidays=None), as opposed to no holiday coming up ([])
             if not country_code:
-                return f"🎉 **Holidays**: Country code not found for {country}"
+                return {'holidays': None}
             
             # Use Calendarific API or similar
             holidays_data = self._fetch_holidays_api(country_code)
             
             if not holidays_data:
-                return f"🎉 **Holidays**: Information not available for {country}"
+                return {'holidays': None}
             
             current_month = datetime.now().month
             current_year = datetime.now().year
             
-            result = f"🎉 **Holidays and Seasonal Events**\n"
-            
+
             # Filter holidays from current month and upcoming months
             upcoming_holidays = []
             for holiday in holidays_data:
@@ -579,19 +551,10 @@ ABSOLUTE PRIORITY: Protect travelers - when in doubt, choose the strictest secur
                 except:
                     continue
             
-            if upcoming_holidays:
-                result += f"**Upcoming holidays:**\n"
-                for holiday in upcoming_holidays[:5]:
-                    name = holiday.get('name', 'Unknown holiday')
-                    date = holiday.get('date', '')
-                    result += f"• {name} ({date})\n"
-            else:
-                result += f"**No major holidays scheduled in the coming months**\n"
-            
-            return result.rstrip()
+            return {'holidays': [(holiday.get('name', 'Unknown holiday'), holiday.get('date', '')) for holiday in upcoming_holidays[:5]]}
             
         except Exception:
-            return "🎉 **Holidays**: Error during retrieval"
+            return None
 
     def _fetch_holidays_api(self, country_code: str) -> list:
         """Récupère les fêtes via API publique"""
@@ -600,75 +563,65 @@ ABSOLUTE PRIORITY: Protect travelers - when in doubt, choose the strictest secur
             year = datetime.now().year
             url = f"https://date.nager.at/api/v3/PublicHolidays/{year}/{country_code}"
             
-            response = requests.get(url, timeout=10)
+            response = resilience.get_provider("nager_date").get(url, timeout=10)
             if response.status_code == 200:
                 return response.json()
             
             return []
             
+        except resilience.ProviderUnavailableError:
+            raise
         except Exception:
             return []
 
-    def _get_travel_info(self, country: str) -> str:
+    def _get_travel_info(self, country: str) -> Optional[dict]:
         """Retrieves travel information via REST Countries API"""
         try:
             # Use REST Countries API
             url = f"https://restcountries.com/v3.1/name/{country}"
-            response = requests.get(url, timeout=10)
+            response = resilience.get_provider("restcountries").get(url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if data:
-                    country_data = data[0]
+                    info = data[0]
                     
                     # Extract information
-                    currencies = country_data.get('currencies', {})
-                    languages = country_data.get('languages', {})
-                    region = country_data.get('region', 'Unknown')
+                    currencies = info.get('currencies', {})
+                    languages = info.get('languages', {})
+                    region = info.get('region', 'Unknown')
                     
-                    currency_name = list(currencies.keys())[0] if currencies else 'Unknown'
-                    language_list = list(languages.values()) if languages else ['Unknown']
-                    
-                    result = f"✈️ **Practical Travel Information**\n"
-                    result += f"💰 Currency: {currency_name}\n"
-                    result += f"🗣️ Languages: {', '.join(language_list[:3])}\n"
-                    result += f"🌍 Region: {region}\n"
-                    result += f"📋 Check visa requirements on the country's official website"
-                    
-                    return result
+                    return {
+                        'currency': list(currencies.keys())[0] if currencies else 'Unknown',
+                        'languages': list(languages.values())[:3] if languages else ['Unknown'],
+                        'region': region,
+                    }
             
-            return f"✈️ **Travel**: Information not available for {country}"
+            if response.status_code in resilience.RETRYABLE_STATUS_CODES:
+                return None
+            
+            # Country unknown to REST Countries: nothing to show
+            return {'currency': None, 'languages': [], 'region': None}
             
         except Exception:
-            return "✈️ **Travel**: Error during retrieval"
+            return None
 
-    def _get_political_info(self, country: str) -> str:
+    def _get_political_info(self, country: str) -> Optional[dict]:
         """Retrieves political context via news search"""
         try:
             # Search for recent political news
             political_keywords = f"{country} politics government election democracy"
             political_data = self._search_political_news(political_keywords)
             
-            if not political_data:
-                return f"🏛️ **Politics**: Stable situation for {country}"
-            
-            result = f"🏛️ **Political Context**\n"
-            
-            # Analyze political news
-            for article in political_data[:3]:
-                title = article.get('title', '')
-                if title:
-                    result += f"• {title}\n"
-            
-            return result.rstrip()
+            return {'politics': [article['title'] for article in political_data[:3] if article.get('title')]}
             
         except Exception:
-            return "🏛️ **Politics**: Error during retrieval"
+            return None
 
     def _search_political_news(self, keywords: str) -> list:
         """Recherche d'actualités politiques"""
         try:
-            api_key = os.getenv('NEWSAPI_KEY')
+            api_key = clients.env('NEWSAPI_KEY')
             if api_key:
                 url = "https://newsapi.org/v2/everything"
                 params = {
@@ -680,17 +633,19 @@ ABSOLUTE PRIORITY: Protect travelers - when in doubt, choose the strictest secur
                     'apiKey': api_key
                 }
                 
-                response = requests.get(url, params=params, timeout=10)
+                response = resilience.get_provider("newsapi").get(url, params=params, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     return data.get('articles', [])
             
             return []
             
+        except resilience.ProviderUnavailableError:
+            raise
         except Exception:
             return []
 
-    def _get_llm_final_recommendation(self, country: str, full_report: str):
+    def _get_llm_final_recommendation(self, country: str, full_report: str) -> Optional[dict]:
         """Uses Claude to generate an intelligent final recommendation"""
         try:
             if not self.claude_client:
@@ -714,7 +669,8 @@ Desired response format:
 
 If the destination is dangerous, clearly use "CHANGE DESTINATION" in your response."""
 
-            response = self.claude_client.messages.create(
+            response = resilience.get_provider("anthropic").call(
+                self.claude_client.messages.create,
                 model="claude-3-opus-20240229",
                 max_tokens=250,
                 temperature=0.2,
@@ -723,7 +679,7 @@ If the destination is dangerous, clearly use "CHANGE DESTINATION" in your respon
                     {"role": "user", "content": prompt}
                 ]
             )
-            return response.content[0].text.strip()
+            return {'recommendation': response.content[0].text.strip()}
             
         except Exception:
             return None 
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+Stale-while-revalidate cache for country reports.
+
+Callers always get the cached report immediately when one exists, even a stale
+one, while a refresh runs in the background. A daemon refresher keeps the
+hottest countries fresh on a schedule so popular destinations never pay the
+full cold cost (several NewsAPI queries and two Claude calls) on the request path.
+A report is whatever the loader returns (CountryInfoTool caches CountryResult records).
+
+Only countries still in demand are refreshed: a key whose decayed hit score
+falls under `min_score` is left to expire, entries idle for `max_idle` seconds
+are dropped and at most `max_entries` are kept. Background refreshes are
+charged to a usage session of their own (tools/usage.py), renewed every day,
+whose `refresh_budgets` cap what the refresher may spend; once one is spent,
+refreshes stop until the next day and callers load on demand.
+"""
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+from tools import singleflight, usage
+
+# What background refreshes may spend per day (COUNTRY_REPORT_REFRESH_BUDGETS, same format as USAGE_BUDGETS)
+DEFAULT_REFRESH_BUDGETS = {
+    "newsapi": 30,
+    "anthropic": 40,
+}
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "loader", "should_cache", "score", "scored_at", "refreshing")
+
+    def __init__(self, loader: Callable[[], Any]):
+        self.value: Optional[Any] = None
+        self.fetched_at = 0.0
+        self.loader = loader
+        self.should_cache: Callable[[Any], bool] = lambda value: True
+        self.score = 0.0
+        self.scored_at = time.monotonic()
+        self.refreshing = False
+
+
+class CountryReportCache:
+    """
+    Args:
+        fresh_ttl: age (seconds) under which a report is served without refresh.
+        max_stale: age beyond which a stale report is no longer served and the caller loads synchronously.
+        refresh_interval: period of the background refresher.
+        hot_count: number of hottest keys kept fresh by the refresher.
+        half_life: half-life (seconds) of the hotness score.
+        min_score: decayed hit score a key needs to be refreshed by the refresher.
+        max_idle: seconds without a request after which an entry is dropped.
+        max_entries: maximum number of entries kept (coldest dropped first).
+        refresh_budgets: daily caps of background refreshes, as in usage.Session
+            (defaults to DEFAULT_REFRESH_BUDGETS).
+    """
+
+    def __init__(
+        self,
+        fresh_ttl: float = 1800,
+        max_stale: float = 86400,
+        refresh_interval: float = 600,
+        hot_count: int = 20,
+        half_life: float = 3600,
+        min_score: float = 2.0,
+        max_idle: float = 86400,
+        max_entries: int = 256,
+        refresh_budgets: Optional[dict] = None,
+        max_workers: int = 4,
+    ):
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self.refresh_interval = refresh_interval
+        self.hot_count = hot_count
+        self.half_life = half_life
+        self.min_score = min_score
+        self.max_idle = max_idle
+        self.max_entries = max_entries
+        self.refresh_budgets = dict(DEFAULT_REFRESH_BUDGETS if refresh_budgets is None else refresh_budgets)
+        self._refresh_session: Optional[usage.Session] = None
+        self._refresh_day: Optional[str] = None
+        self._entries: dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="country-refresh")
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self, key: Hashable, loader: Callable[[], Any], should_cache: Callable[[Any], bool] = lambda v: True) -> Any:
+        """Returns the report for `key`, loading it synchronously only when nothing usable is cached."""
+        self._ensure_refresher()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(loader)
+                self._evict(keep=key)
+            entry.loader = loader
+            entry.should_cache = should_cache
+            self._touch(entry)
+            value, age = entry.value, time.monotonic() - entry.fetched_at
+
+        if value is not None and age < self.max_stale:
+            if age >= self.fresh_ttl:
+                self._refresh_async(key, entry)
+            return value
+
+        return self._load(key, entry)
+
+    def peek(self, key: Hashable) -> Optional[tuple[Any, float]]:
+        """Returns (report, age in seconds) without counting a hit or triggering a load."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.value is None:
+                return None
+            return entry.value, time.monotonic() - entry.fetched_at
+
+    def put(self, key: Hashable, value: Any, loader: Callable[[], Any], age: float = 0.0) -> None:
+        """Seeds the cache (e.g. from a precomputed store)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(loader)
+                self._evict(keep=key)
+            entry.value = value
+            entry.fetched_at = time.monotonic() - age
+
+    def hottest(self, count: Optional[int] = None) -> list:
+        """Keys ordered by decayed hit score, hottest first."""
+        with self._lock:
+            now = time.monotonic()
+            scored = sorted(self._entries.items(), key=lambda item: -self._decayed(item[1], now))
+        return [key for key, _ in scored[: count or self.hot_count]]
+
+    def _decayed(self, entry: _Entry, now: float) -> float:
+        return entry.score * math.pow(0.5, (now - entry.scored_at) / self.half_life)
+
+    def _evict(self, keep: Optional[Hashable] = None) -> None:
+        """Drops idle entries, then the coldest ones beyond `max_entries`, except `keep` (lock held by the caller)."""
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if key != keep and now - entry.scored_at > self.max_idle]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            coldest = min((key for key in self._entries if key != keep),
+                          key=lambda key: self._decayed(self._entries[key], now))
+            del self._entries[coldest]
+
+    def _touch(self, entry: _Entry) -> None:
+        now = time.monotonic()
+        entry.score = self._decayed(entry, now) + 1.0
+        entry.scored_at = now
+
+    def _load(self, key: Hashable, entry: _Entry) -> Any:
+        # Concurrent cold misses on the same key share a single load
+        value = singleflight.shared.do(("country_report", key), entry.loader)
+        if entry.should_cache(value):
+            with self._lock:
+                entry.value = value
+                entry.fetched_at = time.monotonic()
+        return value
+
+    def refresh_session(self) -> usage.Session:
+        """Usage session background refreshes are charged to, renewed every day."""
+        day = time.strftime("%Y-%m-%d")
+        with self._lock:
+            if self._refresh_day != day:
+                if self._refresh_session is not None:
+                    self._refresh_session.close()
+                self._refresh_session = usage.Session(budgets=self.refresh_budgets, label=f"country report refresh {day}")
+                self._refresh_day = day
+            return self._refresh_session
+
+    def _refresh_budget_spent(self, session: usage.Session) -> bool:
+        # A report needs every budgeted provider: refreshing with one of them spent would be wasted
+        providers = {name.removesuffix("_tokens") for name in session.budgets}
+        return any(session.over_budget(provider) for provider in providers)
+
+    def _refresh_async(self, key: Hashable, entry: _Entry) -> None:
+        session = self.refresh_session()
+        if self._refresh_budget_spent(session):
+            return
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+
+        def _run():
+            try:
+                with usage.bound(session):
+                    self._load(key, entry)
+            except Exception:
+                pass
+            finally:
+                entry.refreshing = False
+
+        self._executor.submit(_run)
+
+    def _ensure_refresher(self) -> None:
+        if self._refresher is not None or self.refresh_interval <= 0:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="country-report-refresher", daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            with self._lock:
+                self._evict()
+            for key in self.hottest():
+                with self._lock:
+                    entry = self._entries.get(key)
+                    now = time.monotonic()
+                    due = (entry is not None and now - entry.fetched_at >= self.fresh_ttl
+                           and self._decayed(entry, now) >= self.min_score)
+                if due:
+                    self._refresh_async(key, entry)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+shared = CountryReportCache(
+    fresh_ttl=float(os.getenv("COUNTRY_REPORT_FRESH_TTL", 1800)),
+    max_stale=float(os.getenv("COUNTRY_REPORT_MAX_STALE", 86400)),
+    refresh_interval=float(os.getenv("COUNTRY_REPORT_REFRESH_INTERVAL", 600)),
+    hot_count=int(os.getenv("COUNTRY_REPORT_HOT_COUNT", 20)),
+    min_score=float(os.getenv("COUNTRY_REPORT_MIN_SCORE", 2.0)),
+    max_idle=float(os.getenv("COUNTRY_REPORT_MAX_IDLE", 86400)),
+    max_entries=int(os.getenv("COUNTRY_REPORT_MAX_ENTRIES", 256)),
+    refresh_budgets={**DEFAULT_REFRESH_BUDGETS, **usage.parse_budgets(os.getenv("COUNTRY_REPORT_REFRESH_BUDGETS", ""))},
+)
@@ -0,0 +1,64 @@
+"""
+Local store of precomputed country report sections.
+
+One timestamped record per (country, section), kept in a SQLite file so the
+offline batch job and the serving processes can share it. CountryInfoTool
+stores each section's fields as JSON (cf. tools/results.CountryResult).
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_STORE_PATH = os.getenv("COUNTRY_REPORT_STORE", os.path.join(os.path.dirname(__file__), "data", "country_reports.sqlite"))
+
+
+class CountryReportStore:
+    """Thread-safe SQLite store of report sections keyed by (country, section)."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " country TEXT NOT NULL,"
+            " section TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (country, section))"
+        )
+        self._conn.commit()
+
+    def put(self, country: str, section: str, content: str, fetched_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sections (country, section, content, fetched_at) VALUES (?, ?, ?, ?)",
+                (country, section, content, fetched_at or time.time()),
+            )
+            self._conn.commit()
+
+    def get(self, country: str, section: str) -> Optional[tuple[str, float]]:
+        """Returns (content, fetched_at epoch seconds) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, fetched_at FROM sections WHERE country = ? AND section = ?",
+                (country, section),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def get_fresh(self, country: str, section: str, max_age: float) -> Optional[tuple[str, float]]:
+        """Like get(), but only returns records younger than `max_age` seconds."""
+        record = self.get(country, section)
+        if record and time.time() - record[1] <= max_age:
+            return record
+        return None
+
+    def countries(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT country FROM sections ORDER BY country")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,5 +1,6 @@
 from typing import Any, Optional
 from smolagents.tools import Tool
+from tools import observations, results
 
 class FinalAnswerTool(Tool):
     name = "final_answer"
@@ -8,6 +9,12 @@ class FinalAnswerTool(Tool):
     output_type = "any"
 
     def forward(self, answer: Any) -> Any:
+        # Restore full tool outputs that were compacted in the agent's memory
+        if isinstance(answer, str):
+            return observations.shared_store.expand(answer)
+        # Structured tool results (tools/results.py) are shown as their markdown rendering
+        if isinstance(answer, results.ToolResult):
+            return answer.render()
         return answer
 
     def __init__(self, *args, **kwargs):
@@ -1,15 +1,68 @@
-import os
 from typing import Optional
 from smolagents.tools import Tool
 import serpapi
-from dotenv import load_dotenv
-load_dotenv()  # Loads variables from .env into environment
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from tools import airports, cancellation, clients, prefetch, resilience, singleflight
+from tools.flight_search import FlightSearch, FlightSearchPlanner, cheapest
+from tools.results import FlightsResult, GroupFlightsResult, GroupLeg, GroupOption
 
 
+def _query(params: dict) -> dict:
+    """One Google Flights query through SerpApi (resilient, coalesced with identical in-flight queries)."""
+    params = {**params, 'api_key': clients.env("SERPAPI_API_KEY")}
+    search = singleflight.shared.do(
+        resilience.request_key("serpapi", "google_flights", params),
+        resilience.get_provider("serpapi").call, serpapi.search, params,
+    )
+    return search.data
+
+
+planner = FlightSearchPlanner(_query, base_params={
+    'engine': 'google_flights',
+    'hl': 'en',
+    'gl': 'us',
+    'currency': 'USD',
+})
+
+
+# Google Flights sells at most 9 seats per booking
+MAX_PASSENGERS = 9
+
+
+def _adult_count(value) -> Optional[int]:
+    """Number of adults from 2, 2.0 or "2" (1 when not given), None when it is not a whole number from 1 to MAX_PASSENGERS."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return 1
+    if isinstance(value, bool):
+        return None
+    try:
+        count = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(count) if count.is_integer() and 1 <= count <= MAX_PASSENGERS else None
+
+
+def _invalid_airport(*codes: Optional[str]) -> Optional[str]:
+    """
+    Message for the first code that cannot have flights (None when all can):
+    malformed codes and airports known to be closed. Codes missing from the
+    bundled data are still searched (cf. airports.status).
+    """
+    for code in codes:
+        status = airports.status(code)
+        if status == airports.MALFORMED:
+            return (f"No flights searched: '{code}' is not an airport code. "
+                    "Use the 3-letter IATA code of the airport serving the destination.")
+        if status == airports.CLOSED:
+            return (f"No flights searched: '{code}' has no scheduled flights ({airports.closed_reason(code)}). "
+                    "Use the IATA code of an airport in service.")
+    return None
+
 
 class FlightsFinderTool(Tool):
     name = "flights_finder"
-    description = "Find flights using the Google Flights engine."
+    description = "Find flights using the Google Flights engine: round trip with the total price, full itineraries (all segments and layovers) and alternative options."
     inputs = {
         'departure_airport': {'type': 'string', 'description': 'Departure airport code (IATA)'},
         'arrival_airport': {'type': 'string', 'description': 'Arrival airport code (IATA)'},
@@ -18,7 +71,8 @@ class FlightsFinderTool(Tool):
         'adults': {'type': 'integer', 'default': 1, 'nullable': True, 'description': 'Number of adults'},
         'children': {'type': 'integer', 'default': 0, 'nullable': True, 'description': 'Number of children'},
     }
-    output_type = "string"
+    output_type = "object"
+    observation_budget = 450
 
     @staticmethod
     def find_flight(
@@ -27,7 +81,22 @@ class FlightsFinderTool(Tool):
         date: Optional[str] = None,
         adults: Optional[int] = 1,
         children: Optional[int] = 0,
-    ) -> str:
+    ) -> FlightsResult:
+        """Cheapest one-way flight, taken from the speculative prefetch (tools/prefetch.py) when available."""
+        if departure_airport and arrival_airport and date:
+            prefetched = prefetch.shared.take(prefetch.trip_key(departure_airport, arrival_airport, date, None, adults, children))
+            if prefetched is not prefetch.MISS:
+                return FlightsFinderTool.to_result(prefetched, departure_airport, arrival_airport, date)
+        return FlightsFinderTool.search_flight(departure_airport, arrival_airport, date, adults, children)
+
+    @staticmethod
+    def search_flight(
+        departure_airport: Optional[str] = None,
+        arrival_airport: Optional[str] = None,
+        date: Optional[str] = None,
+        adults: Optional[int] = 1,
+        children: Optional[int] = 0,
+    ) -> FlightsResult:
         """
         Finds the cheapest one-way flight for a given route and date.
 
@@ -37,59 +106,48 @@ class FlightsFinderTool(Tool):
             date (str): Flight date in YYYY-MM-DD format
             adults (int): Number of adults
             children (int): Number of children
-            infants_in_seat (int): Number of infants in seat
-            infants_on_lap (int): Number of lap infants
 
         Returns:
-            str: Formatted string with cheapest flight details
+            FlightsResult: the cheapest itinerary (all segments and layovers) and a few alternatives
         """
-        params = {
-            'api_key': os.getenv("SERPAPI_API_KEY"),
-            'engine': 'google_flights',
-            'hl': 'en',
-            'gl': 'us',
-            'departure_id': departure_airport,
-            'arrival_id': arrival_airport,
-            'outbound_date': date,
-            'currency': 'USD',
-            'adults': adults,
-            'children': children,
-            'type': 2,
-        }
-
+        trip = dict(origin=departure_airport, destination=arrival_airport, outbound_date=date)
+        # Never spend a SerpApi call on a malformed code or a closed airport
+        invalid = _invalid_airport(departure_airport, arrival_airport)
+        if invalid:
+            return FlightsResult(**trip, error=invalid)
         try:
-            search = serpapi.search(params)
-            flights = search.data.get("best_flights", [])
-            if not flights:
-                return "No flights found."
-
-            # Find the flight with the lowest price
-            cheapest = min(flights, key=lambda f: f.get("price", float("inf")))
-
-            if not cheapest.get("flights"):
-                return "No flight segments found."
-
-            flight = cheapest["flights"][0]
-            dep = flight["departure_airport"]
-            arr = flight["arrival_airport"]
-            dep_time = dep["time"]
-            arr_time = arr["time"]
-            duration = flight["duration"]
-            airline = flight.get("airline", "Unknown")
-            price = cheapest["price"]
-
-            hours = duration // 60
-            minutes = duration % 60
-            duration_str = f"{hours}h {minutes}m"
-
-            return (
-                f"From {dep['id']} at {dep_time} → {arr['id']} at {arr_time} | "
-                f"Duration: {duration_str}\nAirline: {airline} | Price: ${price}"
-            )
-
+            return FlightsFinderTool.to_result(planner.one_way(departure_airport, arrival_airport, date, adults, children), **trip)
         except Exception as e:
-            return f"Error occurred: {e}"
-        
+            return FlightsResult(**trip, error=str(e))
+
+    def plan(
+        self,
+        departure_airport: str,
+        arrival_airport: str,
+        outbound_date: str,
+        return_date: Optional[str],
+        adults: int = 1,
+        children: int = 0,
+    ) -> FlightSearch:
+        """Planned search for the trip (cf. tools/flight_search.py), from the speculative prefetch when available."""
+        key = prefetch.trip_key(departure_airport, arrival_airport, outbound_date, return_date, adults, children)
+        prefetched = prefetch.shared.take(key)
+        if prefetched is not prefetch.MISS:
+            return prefetched
+        return self.search_trip(departure_airport, arrival_airport, outbound_date, return_date, adults, children)
+
+    @staticmethod
+    def search_trip(
+        departure_airport: str,
+        arrival_airport: str,
+        outbound_date: str,
+        return_date: Optional[str],
+        adults: int = 1,
+        children: int = 0,
+    ) -> FlightSearch:
+        """Live planned search (round trip when there is a return date), without the prefetch."""
+        return planner.plan(departure_airport, arrival_airport, outbound_date, return_date, adults or 1, children or 0)
+
     def forward(
         self,
         departure_airport: str,
@@ -98,26 +156,129 @@ class FlightsFinderTool(Tool):
         return_date: str,
         adults: int = 1,
         children: int = 0,
-    ) -> str:
-        outbound = self.find_flight(
-            departure_airport=departure_airport,
-            arrival_airport=arrival_airport,
-            date=outbound_date,
-            adults=adults,
-            children=children,
-        )
+    ) -> FlightsResult:
+        trip = dict(origin=departure_airport, destination=arrival_airport, outbound_date=outbound_date, return_date=return_date)
+        invalid = _invalid_airport(departure_airport, arrival_airport)
+        if invalid:
+            return FlightsResult(**trip, error=invalid)
+        try:
+            search = self.plan(departure_airport, arrival_airport, outbound_date, return_date, adults, children)
+            return self.to_result(search, **trip)
+        except Exception as e:
+            return FlightsResult(**trip, error=str(e))
 
-        inbound = self.find_flight(
-            departure_airport=arrival_airport,
-            arrival_airport=departure_airport,
-            date=return_date,
-            adults=adults,
-            children=children,
+    @staticmethod
+    def to_result(search: FlightSearch, origin: str, destination: str, outbound_date: Optional[str] = None,
+                  return_date: Optional[str] = None, max_alternatives: int = 2) -> FlightsResult:
+        """Selected outbound and return itineraries, total price and a few alternative outbound options."""
+        outbound = search.selected
+        return FlightsResult(
+            origin=origin,
+            destination=destination,
+            outbound_date=outbound_date,
+            return_date=return_date,
+            mode=search.mode,
+            # Reading the return leg fetches it (round trips, cf. FlightSearch.inbound)
+            inbound=cheapest(search.inbound),
+            # One-way trips cost their outbound flight
+            price=search.trip_price if return_date else getattr(outbound, "price", None),
+            outbound=outbound,
+            alternatives=[i for i in search.outbound if i is not outbound][:max_alternatives],
         )
 
-        return f"✈️ Outbound Flight:\n{outbound}\n\n🛬 Inbound Flight:\n{inbound}"
-
-        
     def __init__(self, *args, **kwargs):
         self.is_initialized = False
 
+
+def _arrival(itinerary) -> Optional[datetime]:
+    try:
+        return datetime.strptime(itinerary.arrival_time, "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return None
+
+
+class GroupFlightsFinderTool(FlightsFinderTool):
+    name = "group_flights_finder"
+    description = "Finds flights for a group leaving from several airports (e.g. CDG, LYS and BRU) to one or more candidate destinations, in one call (parallel searches). Ranks destinations by total group cost, arrival spread and worst-case travel time."
+    inputs = {
+        'departure_airports': {'type': 'array', 'description': 'Departure airport codes (IATA) or cities of the group members, e.g. ["CDG", "LYS", "BRU"]'},
+        'arrival_airports': {'type': 'array', 'description': 'Candidate destination airport codes (IATA), e.g. ["LIS", "BCN"]'},
+        'outbound_date': {'type': 'string', 'description': 'Outbound date in YYYY-MM-DD format'},
+        'return_date': {'type': 'string', 'description': 'Return date in YYYY-MM-DD format'},
+        'adults': {'type': 'array', 'nullable': True, 'description': 'Number of adults leaving from each departure airport, in the same order (default 1 each)'},
+    }
+    output_type = "object"
+    observation_budget = 700
+
+    def __init__(self, *args, max_workers: int = 8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_workers = max_workers
+
+    def forward(
+        self,
+        departure_airports: list,
+        arrival_airports: list,
+        outbound_date: str,
+        return_date: str,
+        adults: Optional[list] = None,
+    ) -> GroupFlightsResult:
+        origins = [airports.code_for(place) or str(place).strip().upper() for place in departure_airports or []]
+        destinations = list(dict.fromkeys(str(code).strip().upper() for code in arrival_airports or [] if code))
+        if not origins or not destinations:
+            return GroupFlightsResult(origins, error="At least one departure airport and one arrival airport are required.")
+        counts = [adults] if isinstance(adults, (int, float, str)) else list(adults or [])
+        if counts and len(counts) != len(origins):
+            return GroupFlightsResult(origins, error="Give one number of adults per departure airport, in the same order.")
+        for origin, count in zip(origins, counts):
+            if _adult_count(count) is None:
+                return GroupFlightsResult(origins, error=f"Invalid number of adults for {origin}: {count!r}. "
+                                                         f"Give a whole number from 1 to {MAX_PASSENGERS} per departure airport.")
+        counts = [_adult_count(count) for count in counts] or [1] * len(origins)
+        invalid = _invalid_airport(*origins, *destinations)
+        if invalid:
+            return GroupFlightsResult(origins, error=invalid)
+
+        # Every origin → destination pair is searched in parallel (one round-trip query each)
+        pairs = [(origin, count, destination) for destination in destinations
+                 for origin, count in zip(origins, counts) if origin != destination]
+
+        def search(pair):
+            origin, count, destination = pair
+            try:
+                return self.plan(origin, destination, outbound_date, return_date, count, 0)
+            except cancellation.Cancelled:
+                raise
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pairs) or 1)) as executor:
+            results = list(executor.map(cancellation.wrap(search), pairs))
+
+        ranking = [self._aggregate(destination, [(origin, result) for (origin, _, arrival), result in zip(pairs, results)
+                                                 if arrival == destination])
+                   for destination in destinations]
+        ranking.sort(key=lambda option: (option.missing != [], option.total_cost if option.total_cost is not None else float("inf"),
+                                         option.spread if option.spread is not None else float("inf")))
+        return GroupFlightsResult(origins, ranking)
+
+    @staticmethod
+    def _aggregate(destination: str, searches: list) -> GroupOption:
+        """Group totals for one destination: cost, arrival spread (minutes) and worst-case duration."""
+        legs, missing = [], []
+        for origin, search in searches:
+            flight = search.selected if isinstance(search, FlightSearch) else None
+            price = search.quoted_price if flight else None
+            if flight is None or price is None:
+                missing.append(origin)
+            else:
+                legs.append(GroupLeg(origin, flight, price))
+        arrivals = [arrival for arrival in (_arrival(leg.itinerary) for leg in legs) if arrival]
+        durations = [leg.itinerary.total_duration for leg in legs if leg.itinerary.total_duration]
+        return GroupOption(
+            destination=destination,
+            legs=legs,
+            missing=missing,
+            total_cost=sum(leg.price for leg in legs) if legs else None,
+            spread=int((max(arrivals) - min(arrivals)).total_seconds() // 60) if len(arrivals) > 1 else (0 if arrivals else None),
+            worst_duration=max(durations) if durations else None,
+        )
@@ -0,0 +1,271 @@
+"""
+Google Flights (SerpApi) search planning and itinerary parsing.
+
+FlightsFinderTool used to send two one-way queries per trip and keep only the
+first segment of the cheapest `best_flights` entry. The planner makes every
+query count:
+
+- a trip with a return date is searched as a round trip (`type=1`): one query
+  returns the outbound options with the total trip price;
+- the return options of the chosen outbound are fetched through its
+  `departure_token` only when they are actually read (`FlightSearch.inbound`),
+  so a route without flights, or a candidate dropped by the caller, costs a
+  single query;
+- when the round-trip search finds nothing (e.g. one-way-only carriers) the
+  planner falls back to two one-way queries;
+- every itinerary of `best_flights` and `other_flights` is parsed with all its
+  segments, layovers and total duration.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+ROUND_TRIP = "round_trip"
+ONE_WAY = "one_way"
+
+
+def format_duration(minutes: Optional[int]) -> str:
+    if not minutes:
+        return "?"
+    return f"{minutes // 60}h {minutes % 60}m"
+
+
+def _clock(timestamp: str) -> str:
+    """'2025-08-01 07:35' → '07:35' (the value unchanged when there is no date part)."""
+    return (timestamp or "?").split(" ")[-1]
+
+
+@dataclass
+class Segment:
+    departure_airport: str
+    departure_time: str
+    arrival_airport: str
+    arrival_time: str
+    duration: Optional[int] = None  # minutes
+    airline: str = "Unknown"
+    flight_number: str = ""
+    travel_class: str = ""
+    airplane: str = ""
+    overnight: bool = False
+
+    def describe(self) -> str:
+        flight = " ".join(part for part in (self.airline, self.flight_number) if part)
+        return (f"{self.departure_airport} {_clock(self.departure_time)} → {self.arrival_airport} "
+                f"{_clock(self.arrival_time)} · {flight} · {format_duration(self.duration)}")
+
+
+@dataclass
+class Layover:
+    airport: str
+    name: str = ""
+    duration: Optional[int] = None  # minutes
+    overnight: bool = False
+
+    def describe(self) -> str:
+        return f"{self.airport} {format_duration(self.duration)}" + (" overnight" if self.overnight else "")
+
+
+@dataclass
+class Itinerary:
+    segments: list
+    layovers: list = field(default_factory=list)
+    total_duration: Optional[int] = None  # minutes, layovers included
+    price: Optional[float] = None  # whole trip for round-trip searches
+    best: bool = False  # listed by Google under "best flights"
+    departure_token: Optional[str] = None
+    booking_token: Optional[str] = None
+
+    @property
+    def origin(self) -> str:
+        return self.segments[0].departure_airport
+
+    @property
+    def destination(self) -> str:
+        return self.segments[-1].arrival_airport
+
+    @property
+    def departure_time(self) -> str:
+        return self.segments[0].departure_time
+
+    @property
+    def arrival_time(self) -> str:
+        return self.segments[-1].arrival_time
+
+    @property
+    def stops(self) -> int:
+        return len(self.segments) - 1
+
+    @property
+    def airlines(self) -> list:
+        return list(dict.fromkeys(segment.airline for segment in self.segments))
+
+    def headline(self, with_price: bool = True) -> str:
+        """One-line summary, for alternative options."""
+        stops = "direct" if not self.stops else f"{self.stops} stop{'s' if self.stops > 1 else ''}"
+        price = f" — ${self.price:g}" if with_price and self.price is not None else ""
+        return (f"{self.origin} {_clock(self.departure_time)} → {self.destination} {_clock(self.arrival_time)}, "
+                f"{format_duration(self.total_duration)}, {stops}, {', '.join(self.airlines)}{price}")
+
+    def describe(self, with_price: bool = True) -> str:
+        """Headline (route, times, duration, stops, airlines) plus one line per segment for connections."""
+        stops = "direct" if not self.stops else (
+            f"{self.stops} stop{'s' if self.stops > 1 else ''} ({', '.join(l.describe() for l in self.layovers)})")
+        lines = [
+            f"From {self.origin} at {self.departure_time} → {self.destination} at {self.arrival_time} | "
+            f"Duration: {format_duration(self.total_duration)}, {stops}\n"
+            f"Airline: {', '.join(self.airlines)}"
+            + (f" | Price: ${self.price:g}" if with_price and self.price is not None else "")
+        ]
+        if self.stops:
+            lines.extend(f"  • {segment.describe()}" for segment in self.segments)
+        return "\n".join(lines)
+
+
+def parse_itinerary(raw: dict, best: bool = False) -> Optional[Itinerary]:
+    """Itinerary from a SerpApi `best_flights` / `other_flights` entry, None without segments."""
+    segments = []
+    for flight in raw.get("flights") or []:
+        departure = flight.get("departure_airport") or {}
+        arrival = flight.get("arrival_airport") or {}
+        segments.append(Segment(
+            departure_airport=departure.get("id", "?"),
+            departure_time=departure.get("time", "?"),
+            arrival_airport=arrival.get("id", "?"),
+            arrival_time=arrival.get("time", "?"),
+            duration=flight.get("duration"),
+            airline=flight.get("airline", "Unknown"),
+            flight_number=flight.get("flight_number", ""),
+            travel_class=flight.get("travel_class", ""),
+            airplane=flight.get("airplane", ""),
+            overnight=bool(flight.get("overnight")),
+        ))
+    if not segments:
+        return None
+    layovers = [Layover(airport=layover.get("id", "?"), name=layover.get("name", ""),
+                        duration=layover.get("duration"), overnight=bool(layover.get("overnight")))
+                for layover in raw.get("layovers") or []]
+    return Itinerary(
+        segments=segments,
+        layovers=layovers,
+        total_duration=raw.get("total_duration") or sum(s.duration or 0 for s in segments) or None,
+        price=raw.get("price"),
+        best=best,
+        departure_token=raw.get("departure_token"),
+        booking_token=raw.get("booking_token"),
+    )
+
+
+def parse_itineraries(data: dict) -> list:
+    """Every itinerary of a response (best flights first), cheapest first within each group."""
+    itineraries = []
+    for key, best in (("best_flights", True), ("other_flights", False)):
+        group = [parse_itinerary(raw, best) for raw in data.get(key) or []]
+        group = [itinerary for itinerary in group if itinerary is not None]
+        itineraries.extend(sorted(group, key=lambda i: i.price if i.price is not None else float("inf")))
+    return itineraries
+
+
+def cheapest(itineraries: list) -> Optional[Itinerary]:
+    priced = [i for i in itineraries if i.price is not None]
+    return min(priced, key=lambda i: i.price) if priced else (itineraries[0] if itineraries else None)
+
+
+class FlightSearch:
+    """
+    Outcome of a planned search. For round trips, `inbound` fetches the return
+    options of `selected` (through its departure token) on first access.
+    """
+
+    def __init__(self, mode: str, outbound: list, inbound: Optional[list] = None,
+                 fetch_inbound: Optional[Callable[["Itinerary"], list]] = None, error: Optional[str] = None):
+        self.mode = mode
+        self.outbound = outbound
+        self.error = error
+        self.queries = 0
+        self._inbound = inbound
+        self._fetch_inbound = fetch_inbound
+        self._lock = threading.Lock()
+
+    @property
+    def selected(self) -> Optional[Itinerary]:
+        """The outbound itinerary the trip is built on (the cheapest one)."""
+        return cheapest(self.outbound)
+
+    @property
+    def inbound(self) -> list:
+        with self._lock:
+            if self._inbound is None:
+                selected = self.selected
+                self._inbound = self._fetch_inbound(selected) if (self._fetch_inbound and selected) else []
+            return self._inbound
+
+    @property
+    def quoted_price(self) -> Optional[float]:
+        """Trip price known without further queries: the selected round-trip fare, or both one-way legs."""
+        if self.mode == ROUND_TRIP:
+            return getattr(self.selected, "price", None)
+        return self.trip_price
+
+    @property
+    def trip_price(self) -> Optional[float]:
+        """Total price: the round-trip fare, or the sum of the cheapest one-way legs."""
+        if self.mode == ROUND_TRIP:
+            best_return = cheapest(self.inbound)
+            return best_return.price if best_return and best_return.price is not None else getattr(self.selected, "price", None)
+        legs = [cheapest(self.outbound), cheapest(self._inbound or [])]
+        prices = [leg.price for leg in legs if leg is not None and leg.price is not None]
+        return sum(prices) if len(prices) == 2 else None
+
+
+class FlightSearchPlanner:
+    """
+    Args:
+        query: `params -> SerpApi response dict` (the tool passes its resilient, coalesced call).
+        base_params: parameters sent with every query (engine, api key, currency, locale...).
+    """
+
+    def __init__(self, query: Callable[[dict], dict], base_params: Optional[dict] = None):
+        self.query = query
+        self.base_params = dict(base_params or {})
+
+    def _search(self, search: FlightSearch, **params: Any) -> list:
+        search.queries += 1
+        data = self.query({**self.base_params, **params})
+        if data.get("error") and not search.error:
+            search.error = data["error"]
+        return parse_itineraries(data)
+
+    def one_way(self, departure_airport: str, arrival_airport: str, date: str, adults: int = 1, children: int = 0) -> FlightSearch:
+        search = FlightSearch(ONE_WAY, [], inbound=[])
+        search.outbound = self._search(search, departure_id=departure_airport, arrival_id=arrival_airport,
+                                       outbound_date=date, adults=adults, children=children, type=2)
+        return search
+
+    def plan(self, departure_airport: str, arrival_airport: str, outbound_date: str, return_date: Optional[str],
+             adults: int = 1, children: int = 0) -> FlightSearch:
+        """Round trip when there is a return date, falling back to two one-way searches."""
+        if not return_date:
+            return self.one_way(departure_airport, arrival_airport, outbound_date, adults, children)
+
+        trip = dict(departure_id=departure_airport, arrival_id=arrival_airport, outbound_date=outbound_date,
+                    return_date=return_date, adults=adults, children=children)
+        search = FlightSearch(ROUND_TRIP, [])
+
+        def fetch_inbound(selected: Itinerary) -> list:
+            if not selected.departure_token:
+                return []
+            return self._search(search, **trip, type=1, departure_token=selected.departure_token)
+
+        search._fetch_inbound = fetch_inbound
+        search.outbound = self._search(search, **trip, type=1)
+        if search.outbound:
+            return search
+
+        # Nothing sold as a round trip: price each leg on its own
+        search.mode = ONE_WAY
+        search._fetch_inbound = None
+        search.outbound = self._search(search, departure_id=departure_airport, arrival_id=arrival_airport,
+                                       outbound_date=outbound_date, adults=adults, children=children, type=2)
+        search._inbound = self._search(search, departure_id=arrival_airport, arrival_id=departure_airport,
+                                       outbound_date=return_date, adults=adults, children=children, type=2)
+        return search
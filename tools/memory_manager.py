@@ -0,0 +1,123 @@
+"""
+Rolling summarization of the agent's step history.
+
+Once the history re-sent on every step grows past a token threshold, older
+steps are folded into a single running summary while the most recent steps
+stay verbatim, so per-step prompt size (and latency) stays bounded on long
+runs such as repeated loop-backs after bad weather.
+"""
+import itertools
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from smolagents.memory import ActionStep, MemoryStep, PlanningStep, TaskStep
+from smolagents.models import ChatMessage, MessageRole
+
+from tools.observations import compact_text, estimate_tokens
+
+
+@dataclass
+class SummaryStep(MemoryStep):
+    """Stands in for folded steps: renders as a single user message carrying the running summary."""
+    summary: str
+    folded_steps: int
+
+    def dict(self):
+        return {"summary": self.summary, "folded_steps": self.folded_steps}
+
+    def to_messages(self, summary_mode: bool = False) -> list[ChatMessage]:
+        return [
+            ChatMessage(
+                role=MessageRole.USER,
+                content=[{"type": "text", "text": f"Summary of your {self.folded_steps} earlier steps:\n{self.summary}"}],
+            )
+        ]
+
+
+def _step_tokens(step: MemoryStep) -> int:
+    total = 0
+    for message in step.to_messages():
+        content = message.content
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        total += estimate_tokens(str(content or ""))
+    return total
+
+
+def describe_step(step: MemoryStep, observation_chars: int = 400) -> str:
+    """Extractive one-paragraph description of a step (thought, code, observation, error)."""
+    if isinstance(step, SummaryStep):
+        return step.summary
+    if isinstance(step, PlanningStep):
+        return "Plan: " + " ".join(step.plan.split())[:300]
+    if not isinstance(step, ActionStep):
+        return ""
+
+    parts = [f"Step {step.step_number}:"]
+    if isinstance(step.model_output, str) and step.model_output.strip():
+        thought = re.split(r"\n\s*Code:|```", step.model_output.strip(), maxsplit=1)[0]
+        parts.append("Thought: " + " ".join(thought.replace("Thought:", "").split())[:250])
+    if step.code_action:
+        parts.append("Code: " + " ".join(step.code_action.split())[:200])
+    if step.observations:
+        parts.append("Observation: " + " ".join(step.observations.split())[:observation_chars])
+    if step.error:
+        parts.append("Error: " + str(step.error).splitlines()[0][:200])
+    return " ".join(parts)
+
+
+class MemoryManager:
+    """
+    Step callback keeping recent steps verbatim and older ones in a running summary.
+
+    Args:
+        max_history_tokens: estimated size of the step history above which folding starts.
+        keep_recent: number of most recent action steps always kept verbatim.
+        summary_tokens: budget of the running summary.
+        summarizer: optional `(text, budget_tokens) -> str` (e.g. an LLM call) applied to the
+            extractive description of the folded steps; structural trimming is used otherwise.
+    """
+
+    def __init__(self, max_history_tokens: int = 6000, keep_recent: int = 3, summary_tokens: int = 800,
+                 summarizer: Optional[Callable[[str, int], str]] = None):
+        self.max_history_tokens = max_history_tokens
+        self.keep_recent = keep_recent
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+
+    def __call__(self, memory_step: MemoryStep, agent=None) -> None:
+        if agent is None:
+            return
+        steps = agent.memory.steps
+        history = [s for s in steps if not isinstance(s, TaskStep)]
+        if sum(_step_tokens(s) for s in history) + _step_tokens(memory_step) <= self.max_history_tokens:
+            return
+
+        recent_actions = [s for s in history if isinstance(s, ActionStep)][-self.keep_recent:] if self.keep_recent else []
+        first_kept = next(i for i, s in enumerate(steps) if s is recent_actions[0]) if recent_actions else len(steps)
+        # Task steps stay in place: when runs share memory (reset=False), the older steps of
+        # each task are folded into a summary of their own, right after that task
+        head, folded_any = [], False
+        for is_task, group in itertools.groupby(steps[:first_kept], key=lambda s: isinstance(s, TaskStep)):
+            group = list(group)
+            if is_task or (len(group) == 1 and isinstance(group[0], SummaryStep)):
+                head.extend(group)
+            else:
+                head.append(self._fold(group))
+                folded_any = True
+        if not folded_any:
+            return
+
+        agent.memory.steps[:] = head + steps[first_kept:]
+
+    def _fold(self, folded: list) -> SummaryStep:
+        count = sum(s.folded_steps if isinstance(s, SummaryStep) else 1 for s in folded)
+        text = "\n\n".join(filter(None, (describe_step(s) for s in folded)))
+        summary = None
+        if self.summarizer:
+            try:
+                summary = self.summarizer(text, self.summary_tokens)
+            except Exception:
+                summary = None
+        return SummaryStep(summary=summary or compact_text(text, self.summary_tokens), folded_steps=count)
@@ -1,8 +1,5 @@
 from smolagents.tools import Tool
-from anthropic import Anthropic, HUMAN_PROMPT, AI_PROMPT
-import os
-from dotenv import load_dotenv
-load_dotenv()  # Loads variables from .env into environment
+from tools import clients, resilience
 class MoodToNeedTool(Tool):
     """
     A tool that converts user mood descriptions into vacation needs using an LLM.
@@ -48,10 +45,9 @@ class MoodToNeedTool(Tool):
         response = self.model(prompt)
         return response.strip()
 
-client = Anthropic(api_key=os.getenv("ANTROPIC_KEY"))
-
 def claude_mood_to_need_model(prompt: str) -> str:
-    message = client.messages.create(
+    message = resilience.get_provider("anthropic").call(
+        clients.anthropic_client().messages.create,
         model="claude-3-opus-20240229",
         max_tokens=1024,
         temperature=0.7,
@@ -1,9 +1,9 @@
 from smolagents.tools import Tool
-from anthropic import Anthropic
-import os
 import json
-from dotenv import load_dotenv
-load_dotenv()  # Loads variables from .env into environment
+import re
+from typing import Callable, Optional
+from tools import airports, clients, resilience
+from tools.text_matcher import normalize_text
 
 class NeedToDestinationTool(Tool):
     name = "NeedToDestination"
@@ -11,14 +11,26 @@ class NeedToDestinationTool(Tool):
         "need": {"type": "string", "description": "User's travel need as text"},
     }
     output_type = "array"
-    description = "Suggests destinations and flight info based on user need."
+    description = ("Suggests destinations and flight info based on user need. Mention the user's departure "
+                   "airport (IATA code or city) in the need, otherwise from_airport is null.")
 
-    def __init__(self, model: callable, departure_airport: str = "CDG") -> None:
+    def __init__(self, model: callable, departure_airport: Optional[str] = None, geocoder: Optional[Callable[[str], Optional[tuple]]] = None) -> None:
+        """
+        Args:
+            model: `prompt -> text` callable.
+            departure_airport: IATA code of the user's airport. When None, the origin is taken from
+                the need and left null if the need does not name one (never a made-up default).
+            geocoder: `location -> (lat, lon)` used to find the nearest real airport when the
+                suggested code is unknown and the city has no airport (e.g. WeatherTool.coordinates).
+        """
         super().__init__()
         self.model = model
         self.departure_airport = departure_airport
+        self.geocoder = geocoder
 
     def forward(self, need: str) -> list[dict]:
+        origin = (f'"{self.departure_airport}"' if self.departure_airport
+                  else "IATA code of the departure airport named in the need, or null if it names none")
         prompt = f"""
             You are a travel agent AI.
 
@@ -32,13 +44,13 @@ class NeedToDestinationTool(Tool):
                 "destination": "DestinationName",
                 "departure": {{
                 "date": "YYYY-MM-DD",
-                "from_airport": "{self.departure_airport}",
+                "from_airport": {origin},
                 "to_airport": "XXX"
                 }},
                 "return": {{
                 "date": "YYYY-MM-DD",
                 "from_airport": "XXX",
-                "to_airport": "{self.departure_airport}"
+                "to_airport": {origin}
                 }}
             }},
             ...
@@ -52,13 +64,53 @@ class NeedToDestinationTool(Tool):
         except json.JSONDecodeError:
             raise ValueError("Could not parse LLM output to JSON.")
 
+        return self._check_airports(self._check_origin(destinations, need))
+
+    def _check_origin(self, destinations: list, need: str) -> list:
+        """Keeps a departure airport only when it is the configured one or is named in the need."""
+        for destination in destinations if isinstance(destinations, list) else []:
+            if not isinstance(destination, dict):
+                continue
+            departure = destination.setdefault("departure", {})
+            inbound = destination.setdefault("return", {})
+            origin = self.departure_airport or departure.get("from_airport")
+            if not self.departure_airport and not _named_in(origin, need):
+                origin = None
+            departure["from_airport"] = inbound["to_airport"] = origin.upper() if origin else None
+        return destinations
+
+    def _check_airports(self, destinations: list) -> list:
+        """Replaces airport codes invented by the LLM with real airports serving the destination."""
+        for destination in destinations if isinstance(destinations, list) else []:
+            if not isinstance(destination, dict) or not destination.get("destination"):
+                continue
+            departure = destination.setdefault("departure", {})
+            inbound = destination.setdefault("return", {})
+            suggested = departure.get("to_airport") or inbound.get("from_airport")
+
+            airport = airports.resolve(destination["destination"], suggested, locate=self.geocoder)
+            if airport is None:
+                # No serviceable airport found: no flight search will be sent for it
+                departure["to_airport"] = inbound["from_airport"] = None
+                continue
+            departure["to_airport"] = inbound["from_airport"] = airport.iata
         return destinations
     
 
-client = Anthropic(api_key=os.getenv("ANTROPIC_KEY"))
+def _named_in(code: Optional[str], text: str) -> bool:
+    """Whether the airport `code` appears in `text`, as its code or its city name."""
+    if not isinstance(code, str) or not code.strip():
+        return False
+    words = " " + " ".join(re.findall(r"[^\W_]+", normalize_text(text))) + " "
+    if f" {normalize_text(code)} " in words:
+        return True
+    airport = airports.lookup(code)
+    return airport is not None and f" {normalize_text(airport.city)} " in words
+
 
 def claude_need_to_destination_model(prompt: str) -> str:
-    message = client.messages.create(
+    message = resilience.get_provider("anthropic").call(
+        clients.anthropic_client().messages.create,
         model="claude-3-opus-20240229",
         max_tokens=1024,
         temperature=0.7,
@@ -0,0 +1,77 @@
+"""
+Near-duplicate clustering of news articles (SimHash over title + description).
+
+Syndicated wire stories are republished with slightly different headlines;
+clustering them lets the security prompt carry one representative per story
+plus a count instead of several copies of the same facts.
+"""
+import hashlib
+from typing import Optional
+
+from tools.text_matcher import normalize_text
+
+# Function words ignored: they make unrelated headlines look artificially close
+STOPWORDS = frozenset(
+    "a an the of in on at to for from by with and or but is are was were be been as it its "
+    "this that these those after before over amid says said new".split()
+)
+
+
+def _features(text: str) -> dict[str, int]:
+    """Unigrams and bigrams of the normalized text (bigrams keep some word order)."""
+    tokens = [t for t in normalize_text(text).split() if t not in STOPWORDS]
+    features: dict[str, int] = {}
+    for token in tokens:
+        features[token] = features.get(token, 0) + 1
+    for left, right in zip(tokens, tokens[1:]):
+        bigram = f"{left} {right}"
+        features[bigram] = features.get(bigram, 0) + 1
+    return features
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """Charikar SimHash fingerprint of `text`."""
+    weights = [0] * bits
+    for feature, weight in _features(text).items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for i in range(bits):
+            weights[i] += weight if digest >> i & 1 else -weight
+    return sum(1 << i for i, w in enumerate(weights) if w > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def article_text(article: dict) -> str:
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+def cluster_articles(articles: list, max_distance: int = 18) -> list[tuple[dict, int]]:
+    """
+    Groups near-duplicate articles.
+
+    Args:
+        articles: NewsAPI-style dicts, in priority order (the first of each cluster is kept).
+        max_distance: maximum Hamming distance between fingerprints of the same story.
+
+    Returns:
+        List of (representative article, cluster size), in order of first appearance.
+    """
+    clusters: list[list] = []  # [fingerprint, representative, size, normalized title]
+    for article in articles:
+        text = article_text(article)
+        if not text.strip():
+            continue
+        fingerprint = simhash(text)
+        title = normalize_text(article.get('title') or '')
+        match: Optional[list] = None
+        for cluster in clusters:
+            if (title and title == cluster[3]) or hamming(fingerprint, cluster[0]) <= max_distance:
+                match = cluster
+                break
+        if match:
+            match[2] += 1
+        else:
+            clusters.append([fingerprint, article, 1, title])
+    return [(cluster[1], cluster[2]) for cluster in clusters]
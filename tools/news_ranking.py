@@ -0,0 +1,107 @@
+"""
+Relevance scoring and top-k selection for security news.
+
+Weighted terms are compiled once into a single multi-pattern automaton, so the
+cost of scoring an article is one pass over its text whatever the number of
+terms. The score combines matched term weights, recency decay and source weight.
+"""
+import heapq
+import math
+from datetime import datetime, timezone
+from typing import Optional
+
+from tools.text_matcher import KeywordAutomaton, normalize_text
+
+# Security term weights. Matching is on whole words, so inflected forms (plurals,
+# past tenses, agent nouns) are listed explicitly next to their base term
+SECURITY_TERMS = {
+    'war': 3.0, 'wars': 3.0, 'armed conflict': 3.0, 'conflict': 2.5, 'conflicts': 2.5,
+    'attack': 2.5, 'attacks': 2.5, 'attacked': 2.5, 'attacker': 2.5, 'attackers': 2.5,
+    'bomb': 3.0, 'bombs': 3.0, 'bombed': 3.0, 'bombing': 3.0, 'bombings': 3.0,
+    'explosion': 2.5, 'explosions': 2.5,
+    'terrorism': 3.0, 'terrorist': 3.0, 'terrorists': 3.0, 'terror': 2.5,
+    'coup': 3.0, 'coups': 3.0, 'martial law': 3.0,
+    'violence': 2.0, 'violent': 2.0, 'clash': 2.0, 'clashes': 2.0, 'clashed': 2.0,
+    'killed': 2.0, 'killing': 2.0, 'killings': 2.0,
+    'kidnapping': 2.5, 'kidnappings': 2.5, 'kidnapped': 2.5,
+    'unrest': 2.0, 'riot': 2.0, 'riots': 2.0, 'rioting': 2.0,
+    'protest': 1.0, 'protests': 1.0, 'protesters': 1.0, 'curfew': 2.0, 'curfews': 2.0,
+    'evacuation': 2.0, 'evacuations': 2.0, 'evacuated': 2.0,
+    'crisis': 1.5, 'crises': 1.5, 'sanctions': 1.0, 'instability': 1.5,
+    'travel advisory': 3.0, 'do not travel': 3.5, 'travel ban': 3.0, 'advisory': 2.0, 'advisories': 2.0,
+    'warning': 1.5, 'warnings': 1.5, 'danger': 1.5, 'dangers': 1.5, 'dangerous': 1.5,
+    'risk': 1.0, 'risks': 1.0, 'threat': 1.5, 'threats': 1.5, 'threaten': 1.5, 'threatens': 1.5,
+    'threatened': 1.5, 'threatening': 1.5, 'security': 1.0,
+}
+
+# Source weights: wire agencies and outlets of record rank above aggregators
+SOURCE_WEIGHTS = {
+    'reuters': 1.4, 'associated press': 1.4, 'ap news': 1.4, 'agence france presse': 1.4, 'afp': 1.4,
+    'bbc news': 1.3, 'al jazeera english': 1.2, 'the guardian': 1.2, 'the new york times': 1.2,
+    'the washington post': 1.2, 'npr': 1.2, 'france 24': 1.2, 'deutsche welle': 1.2, 'cnn': 1.1,
+}
+
+
+class NewsScorer:
+    """Scores articles by weighted security terms, recency and source."""
+
+    def __init__(self, terms: Optional[dict] = None, source_weights: Optional[dict] = None,
+                 half_life_days: float = 7.0, title_boost: float = 2.0):
+        self.automaton = KeywordAutomaton((term, (term, weight)) for term, weight in (terms or SECURITY_TERMS).items()).compile()
+        self.source_weights = {normalize_text(k): v for k, v in (source_weights or SOURCE_WEIGHTS).items()}
+        self.half_life_days = half_life_days
+        self.title_boost = title_boost
+
+    def term_score(self, article: dict) -> float:
+        """Sum of distinct matched term weights, title matches boosted (one pass per field)."""
+        scores: dict[str, float] = {}
+        for field, boost in (('title', self.title_boost), ('description', 1.0)):
+            text = article.get(field) or ''
+            for _, _, (term, weight) in self.automaton.iter_matches(text):
+                scores[term] = max(scores.get(term, 0.0), weight * boost)
+        return sum(scores.values())
+
+    def recency_factor(self, article: dict, now: Optional[datetime] = None) -> float:
+        published = article.get('publishedAt')
+        if not published:
+            return 0.5
+        try:
+            published_at = datetime.fromisoformat(published.replace('Z', '+00:00'))
+        except ValueError:
+            return 0.5
+        if published_at.tzinfo is None:
+            published_at = published_at.replace(tzinfo=timezone.utc)
+        age_days = max(0.0, ((now or datetime.now(timezone.utc)) - published_at).total_seconds() / 86400)
+        return math.pow(0.5, age_days / self.half_life_days)
+
+    def source_factor(self, article: dict) -> float:
+        source = article.get('source') or {}
+        name = source.get('name') if isinstance(source, dict) else str(source)
+        return self.source_weights.get(normalize_text(name or ''), 1.0)
+
+    def score(self, article: dict, now: Optional[datetime] = None) -> float:
+        terms = self.term_score(article)
+        if terms == 0:
+            return 0.0
+        return terms * self.recency_factor(article, now) * self.source_factor(article)
+
+    def top_k(self, articles: list, k: int = 10) -> list:
+        """Returns the k most relevant articles (score > 0), best first, each annotated with 'relevance'."""
+        now = datetime.now(timezone.utc)
+        scored = []
+        for index, article in enumerate(articles):
+            relevance = self.score(article, now)
+            if relevance > 0:
+                scored.append((relevance, -index, dict(article, relevance=relevance)))
+        return [article for _, _, article in heapq.nlargest(k, scored)]
+
+
+_default_scorer: Optional[NewsScorer] = None
+
+
+def default_scorer() -> NewsScorer:
+    """Shared scorer, compiled on first use."""
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = NewsScorer()
+    return _default_scorer
@@ -0,0 +1,175 @@
+"""
+Token-budgeted compaction of tool observations.
+
+Tools declare an `observation_budget` class attribute: the number of tokens of
+their output worth keeping in agent memory, sized to what the model needs to
+plan its next step (a weather summary needs less than a visited page). When a
+tool output larger than its budget shows up in a step's observations, the copy
+kept in agent memory (and re-sent on every later step) is structurally trimmed
+or summarized. The full text stays out-of-band: in the Python variable the
+agent's code got back, and in an ObservationStore from which `final_answer`
+expands `[[obs-N]]` references.
+
+Outputs waiting for their step callback are kept per run (the usage session
+bound by the UI, cf. tools/usage.py), so concurrent users of the same agent
+never compact each other's observations.
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from tools import results, usage
+
+CHARS_PER_TOKEN = 4
+
+_REFERENCE = re.compile(r"\[\[(obs-\d+)\]\]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for mixed French/English markdown)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_text(text: str, budget_tokens: int) -> str:
+    """
+    Structurally trims markdown to roughly `budget_tokens`: every section
+    (blank-line separated block) keeps its heading line and as many of its
+    first lines as its share of the budget allows.
+    """
+    max_chars = budget_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    sections = [s for s in re.split(r"\n\s*\n", text.strip()) if s.strip()]
+    share = max(max_chars // max(len(sections), 1), 120)
+    kept_sections = []
+    for section in sections:
+        lines = section.splitlines()
+        kept = [lines[0][:share]]
+        used = len(kept[0])
+        for index, line in enumerate(lines[1:], 1):
+            if used + len(line) + 1 > share:
+                kept.append(f"  … (+{len(lines) - index} lines)")
+                break
+            kept.append(line)
+            used += len(line) + 1
+        kept_sections.append("\n".join(kept))
+
+    compacted = "\n\n".join(kept_sections)
+    if len(compacted) > max_chars:
+        compacted = compacted[:max_chars].rstrip() + " …"
+    return compacted
+
+
+class ObservationStore:
+    """Bounded, thread-safe store of full tool outputs keyed by `obs-N` ids."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def record(self, tool_name: str, text: str) -> str:
+        with self._lock:
+            self._counter += 1
+            obs_id = f"obs-{self._counter}"
+            self._entries[obs_id] = (tool_name, text)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return obs_id
+
+    def get(self, obs_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(obs_id)
+        return entry[1] if entry else None
+
+    def expand(self, text: str) -> str:
+        """Replaces `[[obs-N]]` references with the stored full outputs."""
+        return _REFERENCE.sub(lambda m: self.get(m.group(1)) or m.group(0), text)
+
+
+shared_store = ObservationStore()
+
+
+def _run_key() -> Optional[Hashable]:
+    """The run a tool call or step callback belongs to: its usage session (None outside one)."""
+    session = usage.current()
+    return session.id if session is not None else None
+
+
+class ObservationCompactor:
+    """
+    Wraps tools so their outputs (the markdown of ToolResult records) are
+    recorded, and acts as a step callback that compacts those outputs inside
+    the step's observations.
+
+    Args:
+        store: where full outputs are kept (defaults to the shared store).
+        summarizer: optional `(text, budget_tokens) -> str` used instead of
+            structural trimming (e.g. a small LLM call).
+        max_observation_tokens: cap applied to the whole observation block
+            after per-tool compaction.
+    """
+
+    def __init__(self, store: Optional[ObservationStore] = None,
+                 summarizer: Optional[Callable[[str, int], str]] = None,
+                 max_observation_tokens: int = 2500):
+        self.store = store or shared_store
+        self.summarizer = summarizer
+        self.max_observation_tokens = max_observation_tokens
+        # Outputs recorded since the last step callback, by run (cf. _run_key)
+        self._pending: dict[Hashable, list[tuple[str, str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, tools: list) -> list:
+        """Hooks every tool that declares an `observation_budget`; returns the same list."""
+        for tool in tools:
+            budget = getattr(tool, "observation_budget", None)
+            if budget:
+                tool.forward = self._recording(tool.name, budget, tool.forward)
+        return tools
+
+    def _recording(self, tool_name: str, budget: int, forward: Callable) -> Callable:
+        def forward_and_record(*args, **kwargs):
+            output = forward(*args, **kwargs)
+            # Measure the largest text the model may get: a result's markdown (printed via render()),
+            # not its short str() summary
+            text = results.render(output) if output is not None else ""
+            if estimate_tokens(text) > budget:
+                with self._lock:
+                    self._pending.setdefault(_run_key(), []).append((tool_name, text, budget))
+            return output
+        return forward_and_record
+
+    def _compact(self, text: str, budget: int) -> str:
+        if self.summarizer:
+            try:
+                return self.summarizer(text, budget)
+            except Exception:
+                pass
+        return compact_text(text, budget)
+
+    def __call__(self, memory_step, agent=None) -> None:
+        with self._lock:
+            pending = self._pending.pop(_run_key(), [])
+
+        observations = getattr(memory_step, "observations", None)
+        if not observations:
+            return
+
+        for tool_name, text, budget in pending:
+            if text not in observations:
+                continue
+            obs_id = self.store.record(tool_name, text)
+            compacted = self._compact(text, budget)
+            note = (f"\n[{tool_name} output compacted from ~{estimate_tokens(text)} tokens; "
+                    f"the full text is still in the variable your code received, or use [[{obs_id}]] in final_answer]")
+            observations = observations.replace(text, compacted + note)
+
+        if estimate_tokens(observations) > self.max_observation_tokens:
+            obs_id = self.store.record("observations", observations)
+            observations = compact_text(observations, self.max_observation_tokens) + f"\n[observations compacted; full text: [[{obs_id}]]]"
+
+        memory_step.observations = observations
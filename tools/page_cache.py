@@ -0,0 +1,146 @@
+"""
+Conditional-GET cache for visited web pages.
+
+Pages are stored as converted markdown, keyed by URL, together with the
+validators the server sent (ETag, Last-Modified). While fresh a page is
+served without any request; after that the next visit revalidates it with
+If-None-Match / If-Modified-Since, and a `304 Not Modified` reuses the cached
+markdown without downloading or converting the page again.
+
+A page stays fresh for `fresh_ttl` seconds at most, less when its
+Cache-Control says so: `s-maxage`/`max-age` (minus the `Age` already spent
+upstream) shorten it, while `no-cache`, `private` and `max-age=0` make every
+visit revalidate. Pages sent with `no-store`, and pages that must be
+revalidated but carry no validator, are not kept; other pages without
+validators are dropped once stale.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Mapping, Optional
+
+
+_DIRECTIVE = re.compile(r"([a-z-]+)\s*(?:=\s*\"?([^\",]*)\"?)?")
+
+
+def cache_directives(headers: Mapping[str, str]) -> dict:
+    """Cache-Control directives, e.g. 'public, max-age=60' → {'public': None, 'max-age': '60'}."""
+    return {name: value for name, value in _DIRECTIVE.findall((headers.get("Cache-Control") or "").lower())}
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness(headers: Mapping[str, str], fresh_ttl: float) -> Optional[float]:
+    """Seconds a response may be served without revalidation (capped at `fresh_ttl`), None if it may not be stored."""
+    directives = cache_directives(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives or "private" in directives:
+        return 0.0
+    max_age = _seconds(directives.get("s-maxage")) if "s-maxage" in directives else _seconds(directives.get("max-age"))
+    if max_age is None:
+        return fresh_ttl
+    return max(min(max_age - (_seconds(headers.get("Age")) or 0), fresh_ttl), 0.0)
+
+
+class CachedPage:
+    __slots__ = ("markdown", "etag", "last_modified", "checked_at", "fresh_for")
+
+    def __init__(self, markdown: str, etag: Optional[str], last_modified: Optional[str], fresh_for: float):
+        self.markdown = markdown
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = time.monotonic()
+        self.fresh_for = fresh_for
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Bounded LRU of converted pages.
+
+    Args:
+        fresh_ttl: longest time a page is served without contacting the server (shortened by Cache-Control).
+        max_entries: maximum number of cached pages (least recently used dropped first).
+    """
+
+    def __init__(self, fresh_ttl: float = 300, max_entries: int = 256):
+        self.fresh_ttl = fresh_ttl
+        self.max_entries = max_entries
+        self._pages: OrderedDict[str, CachedPage] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def lookup(self, url: str) -> tuple[Optional[CachedPage], bool]:
+        """
+        Returns `(page, fresh)`: `page` is None when nothing usable is cached,
+        `fresh` tells whether it can be served without revalidation.
+        """
+        with self._lock:
+            page = self._pages.get(url)
+            if page is None:
+                self.misses += 1
+                return None, False
+            self._pages.move_to_end(url)
+            if time.monotonic() - page.checked_at < page.fresh_for:
+                self.hits += 1
+                return page, True
+            if not page.revalidatable:
+                del self._pages[url]
+                self.misses += 1
+                return None, False
+            return page, False
+
+    def not_modified(self, url: str, headers: Mapping[str, str]) -> None:
+        """Records a 304 answer: the page is fresh again (with any updated validators and Cache-Control)."""
+        with self._lock:
+            page = self._pages.get(url)
+            if page is None:
+                return
+            page.etag = headers.get("ETag") or page.etag
+            page.last_modified = headers.get("Last-Modified") or page.last_modified
+            page.checked_at = time.monotonic()
+            if headers.get("Cache-Control"):
+                page.fresh_for = freshness(headers, self.fresh_ttl) or 0.0
+            self.revalidated += 1
+
+    def store(self, url: str, markdown: str, headers: Mapping[str, str]) -> None:
+        """Caches a freshly fetched page unless the server forbids it or it could never be reused."""
+        fresh_for = freshness(headers, self.fresh_ttl)
+        page = CachedPage(markdown, headers.get("ETag"), headers.get("Last-Modified"), fresh_for or 0.0)
+        if fresh_for is None or (fresh_for == 0 and not page.revalidatable):
+            with self._lock:
+                self._pages.pop(url, None)
+            return
+        with self._lock:
+            self._pages[url] = page
+            self._pages.move_to_end(url)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+
+# Process-wide cache used by VisitWebpageTool
+shared = PageCache()
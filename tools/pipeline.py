@@ -0,0 +1,289 @@
+"""
+Deterministic execution mode for the WanderMind flow.
+
+The CodeAgent spends a full LLM turn deciding every tool call, although the
+flow described in prompts.yaml never changes:
+
+    check inputs → MoodToNeed → NeedToDestination → weather + country → flights → wrap-up
+
+This module runs that flow as a declared DAG over the existing tool objects.
+Stages whose dependencies are met run in parallel (weather and country info
+for every candidate at once), and a stage can raise `LoopBack` to re-run an
+earlier stage and its descendants, e.g. to ask for other destinations when
+no candidate has acceptable weather or safety conditions. The LLM is only
+called by the tools themselves and for the final inspirational message.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from tools import airports, cancellation, weather_rules
+
+# Weather verdicts of an unacceptable destination
+_WEATHER_REJECT = (weather_rules.CHANGEZ, weather_rules.DECONSEILLE)
+
+
+class LoopBack(Exception):
+    """Raised by a stage to re-run `stage` (and everything downstream of it)."""
+
+    def __init__(self, stage: str, reason: str = ""):
+        super().__init__(reason or f"loop back to {stage}")
+        self.stage = stage
+        self.reason = reason
+
+
+@dataclass
+class Stage:
+    """A pipeline node: `run(context)` returns the value stored in `context[name]`."""
+    name: str
+    run: Callable[[dict], Any]
+    after: tuple = ()
+
+
+class DagExecutor:
+    """
+    Runs stages in dependency waves; the stages of a wave run concurrently.
+
+    Args:
+        stages: stages in declaration order (dependencies must be declared before use).
+        max_workers: threads used for a wave.
+        max_loops: maximum number of `LoopBack` re-runs before giving up.
+    """
+
+    def __init__(self, stages: list, max_workers: int = 4, max_loops: int = 2):
+        names = set()
+        for stage in stages:
+            unknown = set(stage.after) - names
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on undeclared stage(s): {', '.join(sorted(unknown))}")
+            names.add(stage.name)
+        self.stages = list(stages)
+        self.max_workers = max_workers
+        self.max_loops = max_loops
+
+    def descendants(self, name: str) -> set:
+        """`name` and every stage that depends on it, directly or not."""
+        found = {name}
+        for stage in self.stages:
+            if found.intersection(stage.after):
+                found.add(stage.name)
+        return found
+
+    def run(self, context: dict) -> dict:
+        """Executes the DAG; results and per-stage timings are written into `context`."""
+        context.setdefault("loop", 0)
+        timings = context.setdefault("timings", {})
+        done: set = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            while len(done) < len(self.stages):
+                wave = [s for s in self.stages if s.name not in done and done.issuperset(s.after)]
+                cancellation.check()
+                futures = {stage.name: executor.submit(cancellation.wrap(self._timed), stage, context) for stage in wave}
+
+                restart: Optional[LoopBack] = None
+                for name, future in futures.items():
+                    try:
+                        context[name], timings[name] = cancellation.wait(future)
+                        done.add(name)
+                    except LoopBack as loop_back:
+                        restart = restart or loop_back
+
+                if restart:
+                    if context["loop"] >= self.max_loops:
+                        raise RuntimeError(f"Pipeline gave up after {self.max_loops} loop-backs: {restart.reason}")
+                    context["loop"] += 1
+                    done -= self.descendants(restart.stage)
+        return context
+
+    @staticmethod
+    def _timed(stage: Stage, context: dict) -> tuple:
+        start = time.time()
+        value = stage.run(context)
+        return value, round(time.time() - start, 2)
+
+
+@dataclass
+class PipelineRun:
+    """Outcome of a pipeline run: the message for the user plus every intermediate result."""
+    message: str
+    context: dict = field(default_factory=dict)
+
+    @property
+    def timings(self) -> dict:
+        return self.context.get("timings", {})
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d")
+    except (AttributeError, ValueError):
+        return None
+
+
+def _country_of(destination: str) -> str:
+    """'Lisbon, Portugal' → 'Portugal' (the whole string when there is no country part)."""
+    parts = [part.strip() for part in destination.split(",") if part.strip()]
+    return parts[-1] if parts else destination
+
+
+class WanderMindPipeline:
+    """
+    The WanderMind flow as a DAG over the existing tools.
+
+    Args:
+        mood_tool, destination_tool, weather_tool, country_tool, flights_tool: tool instances
+            (MoodToNeedTool, NeedToDestinationTool, WeatherTool, CountryInfoTool, FlightsFinderTool).
+        model: `prompt -> text` callable used only for the final message.
+        max_loops: times new destinations are requested when every candidate is rejected.
+        trip_days: trip length used when `week` is an exact date.
+        max_workers: parallelism for the per-candidate weather and country lookups.
+    """
+
+    def __init__(self, mood_tool, destination_tool, weather_tool, country_tool, flights_tool,
+                 model: Callable[[str], str], max_loops: int = 2, trip_days: int = 7, max_workers: int = 8):
+        self.mood_tool = mood_tool
+        self.destination_tool = destination_tool
+        self.weather_tool = weather_tool
+        self.country_tool = country_tool
+        self.flights_tool = flights_tool
+        self.model = model
+        self.trip_days = trip_days
+        self.max_workers = max_workers
+        self.executor = DagExecutor([
+            Stage("need", self._need),
+            Stage("candidates", self._candidates, ("need",)),
+            Stage("weather", self._weather, ("candidates",)),
+            Stage("country", self._country, ("candidates",)),
+            Stage("choice", self._choose, ("weather", "country")),
+            Stage("flights", self._flights, ("choice",)),
+            Stage("message", self._wrap_up, ("flights",)),
+        ], max_loops=max_loops)
+
+    @staticmethod
+    def check_inputs(mood: str, origin: str, week: str) -> Optional[str]:
+        """Question to ask the user when an input is missing or unusable, None when all are fine."""
+        missing = []
+        if not (mood or "").strip():
+            missing.append("your mood")
+        if not (origin or "").strip():
+            missing.append("your departure airport")
+        if not (week or "").strip():
+            missing.append("your travel week or dates")
+        if missing:
+            return f"Before we start planning, could you tell me {', '.join(missing)}? 😊"
+        if airports.code_for(origin) is None:
+            return f"I could not find an airport for '{origin}'. Could you give me the 3-letter code of your departure airport (e.g. CDG)? 😊"
+        return None
+
+    def run(self, mood: str, origin: str, week: str) -> PipelineRun:
+        question = self.check_inputs(mood, origin, week)
+        if question:
+            return PipelineRun(message=question)
+
+        context = {"mood": mood.strip(), "origin": airports.code_for(origin), "week": week.strip(), "rejected": []}
+        try:
+            self.executor.run(context)
+        except Exception as e:
+            return PipelineRun(message=f"❌ Sorry, I could not plan this trip: {e}", context=context)
+        return PipelineRun(message=context["message"], context=context)
+
+    # --- Stages ---
+
+    def _need(self, context: dict) -> str:
+        return self.mood_tool.forward(mood=context["mood"])
+
+    def _candidates(self, context: dict) -> list:
+        need = f"{context['need']} (departing from {context['origin']}, travelling around {context['week']})"
+        if context["rejected"]:
+            need += f". Do not suggest: {', '.join(context['rejected'])}"
+        candidates = [c for c in self.destination_tool.forward(need=need) if c.get("destination")]
+        start = _parse_date(context["week"])
+        for candidate in candidates:
+            # An exact travel date from the user wins over the dates made up by the LLM
+            if start:
+                candidate.setdefault("departure", {})["date"] = start.strftime("%Y-%m-%d")
+                candidate.setdefault("return", {})["date"] = (start + timedelta(days=self.trip_days)).strftime("%Y-%m-%d")
+        if not candidates:
+            raise LoopBack("candidates", "no destination suggested")
+        return candidates
+
+    def _weather(self, context: dict) -> list:
+        candidates = context["candidates"]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(candidates))) as executor:
+            return list(executor.map(
+                cancellation.wrap(lambda c: self.weather_tool.collect(c["destination"], c.get("departure", {}).get("date"))),
+                candidates,
+            ))
+
+    def _country(self, context: dict) -> list:
+        candidates = context["candidates"]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(candidates))) as executor:
+            return list(executor.map(
+                cancellation.wrap(lambda c: self.country_tool.forward(country=_country_of(c["destination"]), info_type="all")),
+                candidates,
+            ))
+
+    def _choose(self, context: dict) -> list:
+        """Candidates whose weather and country conditions are acceptable, best first."""
+        scored = []
+        for index, (candidate, weather, country) in enumerate(zip(context["candidates"], context["weather"], context["country"])):
+            weather_ok = weather.verdict not in _WEATHER_REJECT
+            country_ok = not country.change_destination
+            ideal = weather.verdict == weather_rules.IDEAL
+            scored.append((not country_ok, not weather_ok, not ideal, index, candidate, weather, country))
+
+        accepted = [s for s in sorted(scored) if not s[0] and not s[1]]
+        if not accepted:
+            context["rejected"].extend(c["destination"] for c in context["candidates"])
+            if context["loop"] < self.executor.max_loops:
+                raise LoopBack("candidates", "weather or safety conditions unsuitable for every candidate")
+            # Out of retries: keep the safest option, the wrap-up mentions the caveats
+            accepted = [s for s in sorted(scored) if not s[0]][:1] or sorted(scored)[:1]
+        return [{"candidate": s[4], "weather": s[5], "country": s[6]} for s in accepted]
+
+    def _flights(self, context: dict) -> dict:
+        """Flights for the best accepted candidate; falls back to the next one when no flight is found."""
+        for option in context["choice"]:
+            candidate = option["candidate"]
+            to_airport = (candidate.get("departure", {}).get("to_airport") or "").upper()
+            if not airports.is_searchable(to_airport):
+                continue
+            flights = self.flights_tool.forward(
+                departure_airport=context["origin"],
+                arrival_airport=to_airport,
+                outbound_date=candidate["departure"].get("date"),
+                return_date=candidate.get("return", {}).get("date"),
+            )
+            if flights.found:
+                return dict(option, flights=flights)
+        option = context["choice"][0]
+        return dict(option, flights=None)
+
+    def _wrap_up(self, context: dict) -> str:
+        plan = context["flights"]
+        candidate = plan["candidate"]
+        weather = plan["weather"].render()
+        flights = plan["flights"].render() if plan["flights"] else "No flights found for the suggested destinations."
+        details = (
+            f"📍 **{candidate['destination']}**\n\n"
+            f"{weather}\n\n"
+            f"{flights}"
+        )
+        prompt = (
+            "You are WanderMind, a warm travel companion.\n"
+            f"The user feels: \"{context['mood']}\". Their emotional need: \"{context['need']}\".\n"
+            f"Chosen destination: {candidate['destination']} (from {context['origin']}, "
+            f"{candidate.get('departure', {}).get('date')} → {candidate.get('return', {}).get('date')}).\n\n"
+            f"Weather:\n{weather[:1200]}\n\n"
+            f"Country information:\n{plan['country'].render()[-1500:]}\n\n"
+            f"Flights:\n{flights}\n\n"
+            "Write a short inspirational message (max 150 words) presenting this trip, mention any "
+            "precaution from the weather or country information, and end with a quote matching the mood."
+        )
+        try:
+            message = self.model(prompt).strip()
+        except Exception:
+            message = ""
+        return f"{message}\n\n{details}" if message else details
@@ -0,0 +1,199 @@
+"""
+Speculative prefetching of the lookups that follow NeedToDestination.
+
+As soon as NeedToDestination returns its candidates, their destinations,
+airports and dates are known, while the agent still needs a full LLM turn
+before calling the next tools. The prefetcher starts the weather, country-info
+and flight lookups for every candidate in the background:
+
+- weather observations and flight searches are parked in a `Prefetcher`, keyed
+  like the real calls, which take them from there instead of calling the API;
+- country reports go through `CountryInfoTool.forward`, which fills the shared
+  report cache the real call reads from.
+
+A prefetched result is used at most once and only by an identical call of the
+same request (keys are scoped to its usage session); any miss, failure, expired
+entry or lookup still running after `take_timeout` seconds falls back to the
+normal live call, and results nobody asked for are dropped after `ttl` seconds. Background lookups run in the
+context of the request that triggered them: they are charged to its usage
+session (tools/usage.py) and abandoned if it is cancelled.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+from tools import airports, cancellation, usage
+
+# Returned by Prefetcher.take when no usable result is parked
+MISS = object()
+
+
+class Prefetcher:
+    """
+    Bounded store of background results (futures) taken at most once.
+
+    Args:
+        max_workers: threads running speculative lookups.
+        ttl: seconds after which an unclaimed result is discarded.
+        max_entries: maximum number of parked results (oldest dropped first).
+        take_timeout: default number of seconds `take` waits for a result still running.
+    """
+
+    def __init__(self, max_workers: int = 6, ttl: float = 300, max_entries: int = 128, take_timeout: float = 20.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.take_timeout = take_timeout
+        self._entries: OrderedDict[Hashable, tuple[float, Future]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    @staticmethod
+    def _scoped(key: Hashable) -> tuple:
+        """`key` within the current request: one user never takes a result prefetched for another."""
+        session = usage.current()
+        return (session.id if session is not None else None, key)
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> None:
+        """Starts `fn(*args, **kwargs)` in the background unless `key` is already parked."""
+        key = self._scoped(key)
+        with self._lock:
+            self._evict()
+            if key in self._entries:
+                return
+            self._entries[key] = (time.monotonic(), self._executor.submit(cancellation.wrap(fn), *args, **kwargs))
+            while len(self._entries) > self.max_entries:
+                _, (_, future) = self._entries.popitem(last=False)
+                future.cancel()
+                self.discarded += 1
+
+    def take(self, key: Hashable, timeout: Optional[float] = None) -> Any:
+        """
+        Claims the result parked under `key`, waiting up to `timeout` seconds
+        (`take_timeout` by default) if it is still running. Returns `MISS` when
+        there is none, when the background call failed or when it took too long.
+        """
+        key = self._scoped(key)
+        with self._lock:
+            self._evict()
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        try:
+            value = cancellation.wait(entry[1], self.take_timeout if timeout is None else timeout)
+        except cancellation.Cancelled:
+            # Raise only if our request was cancelled, not the one that started the lookup
+            cancellation.check()
+            self.misses += 1
+            return MISS
+        except Exception:  # failed, or still running after the timeout
+            self.misses += 1
+            return MISS
+        self.hits += 1
+        return value
+
+    def warm(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Runs `fn` in the background without parking its result (for tools that cache on their own)."""
+        return self._executor.submit(cancellation.wrap(fn), *args, **kwargs)
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, future in self._entries.values():
+                future.cancel()
+            self.discarded += len(self._entries)
+            self._entries.clear()
+
+    def _evict(self) -> None:
+        """Drops unclaimed results older than the TTL (lock held by the caller)."""
+        deadline = time.monotonic() - self.ttl
+        while self._entries:
+            key, (created, future) = next(iter(self._entries.items()))
+            if created >= deadline:
+                break
+            del self._entries[key]
+            future.cancel()
+            self.discarded += 1
+
+
+# Process-wide store consulted by WeatherTool and FlightsFinderTool
+shared = Prefetcher()
+
+
+def weather_key(location: str, date: Optional[str]) -> tuple:
+    return ("weather", " ".join(location.lower().split()), date or None)
+
+
+def trip_key(departure_airport: str, arrival_airport: str, outbound_date: str, return_date: Optional[str],
+             adults: int, children: int) -> tuple:
+    return ("flight", departure_airport.upper(), arrival_airport.upper(), outbound_date, return_date or None,
+            adults or 1, children or 0)
+
+
+class SpeculativePrefetcher:
+    """
+    Hooks NeedToDestination so each returned candidate triggers background lookups.
+
+    Args:
+        weather_tool: WeatherTool whose observations are prefetched (None to skip).
+        country_tool: CountryInfoTool whose "all" report is warmed in its cache (None to skip).
+        flights_tool: FlightsFinderTool whose planned round-trip search is prefetched (None to skip).
+        prefetcher: store the real calls read from (defaults to the shared one).
+    """
+
+    def __init__(self, weather_tool=None, country_tool=None, flights_tool=None, prefetcher: Optional[Prefetcher] = None):
+        self.weather_tool = weather_tool
+        self.country_tool = country_tool
+        self.flights_tool = flights_tool
+        self.prefetcher = prefetcher or shared
+
+    def wrap(self, tools: list) -> list:
+        """Hooks the NeedToDestination tool of `tools`; returns the same list."""
+        for tool in tools:
+            if tool.name == "NeedToDestination":
+                tool.forward = self._speculating(tool.forward)
+        return tools
+
+    def _speculating(self, forward: Callable) -> Callable:
+        def forward_and_prefetch(*args, **kwargs):
+            candidates = forward(*args, **kwargs)
+            try:
+                self.speculate(candidates)
+            except Exception:
+                pass  # speculation must never break the real call
+            return candidates
+        return forward_and_prefetch
+
+    def speculate(self, candidates: list) -> None:
+        """Starts the weather, country and flight lookups for every candidate."""
+        warmed = set()
+        for candidate in candidates or []:
+            if not isinstance(candidate, dict) or not candidate.get("destination"):
+                continue
+            destination = candidate["destination"]
+            departure = candidate.get("departure") or {}
+            inbound = candidate.get("return") or {}
+
+            if self.weather_tool is not None:
+                date = departure.get("date")
+                self.prefetcher.submit(weather_key(destination, date), self.weather_tool._observe, destination, date, None)
+
+            if self.country_tool is not None:
+                country = destination.split(",")[-1].strip()
+                if country.lower() not in warmed:
+                    warmed.add(country.lower())
+                    self.prefetcher.warm(self.country_tool.forward, country, "all")
+
+            if self.flights_tool is not None:
+                # NeedToDestination only fills the origin when the user gave one, and speculative searches
+                # are only spent on airports of the bundled data (unverified codes wait for the agent)
+                origin, arrival = departure.get("from_airport"), departure.get("to_airport")
+                outbound_date, return_date = departure.get("date"), inbound.get("date")
+                if airports.is_valid(origin) and airports.is_valid(arrival) and outbound_date:
+                    # One round-trip query; the return leg is only fetched if the agent reads it
+                    self.prefetcher.submit(trip_key(origin, arrival, outbound_date, return_date, 1, 0),
+                                           self.flights_tool.search_trip, origin, arrival, outbound_date, return_date, 1, 0)
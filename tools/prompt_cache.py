@@ -0,0 +1,154 @@
+"""
+Provider-side prompt caching for the agent model.
+
+The system prompt (prompts.yaml + tool descriptions) is identical on every step
+of every run. Anthropic caches a prompt prefix up to the last block carrying a
+`cache_control` marker, so marking the end of the system messages lets later
+calls read that prefix from the cache instead of re-processing it. Cache read
+and write token counts returned in the usage block are accumulated, process-wide
+and in the usage session of the run, so they can be shown next to the regular
+token counts.
+"""
+import copy
+import threading
+
+from smolagents import LiteLLMModel
+from smolagents.models import ChatMessage
+
+from tools import registry, resilience, usage
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def mark_cacheable(messages: list[dict]) -> list[dict]:
+    """
+    Returns a copy of `messages` where the last text block of the leading system
+    messages carries a cache marker (the static prefix ends there).
+    """
+    prefix_end = None
+    for index, message in enumerate(messages):
+        if message.get("role") != "system":
+            break
+        prefix_end = index
+    if prefix_end is None:
+        return messages
+
+    marked = list(messages)
+    message = copy.deepcopy(messages[prefix_end])
+    content = message.get("content")
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    text_blocks = [block for block in content or [] if isinstance(block, dict) and block.get("type") == "text"]
+    if not text_blocks:
+        return messages
+    text_blocks[-1]["cache_control"] = dict(CACHE_CONTROL)
+    message["content"] = content
+    marked[prefix_end] = message
+    return marked
+
+
+def cache_usage(usage) -> tuple[int, int]:
+    """(cache read tokens, cache write tokens) from a LiteLLM/Anthropic usage block."""
+    if usage is None:
+        return 0, 0
+    read = getattr(usage, "cache_read_input_tokens", None)
+    if read is None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        read = getattr(details, "cached_tokens", None) if details is not None else None
+    written = getattr(usage, "cache_creation_input_tokens", None)
+    return int(read or 0), int(written or 0)
+
+
+class CacheStats:
+    """Thread-safe running totals of prompt cache usage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, input_tokens: int, cache_read: int, cache_write: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.cache_read_tokens += cache_read
+            self.cache_write_tokens += cache_write
+
+    def totals(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cache_read_tokens": self.cache_read_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+            }
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of input tokens served from the cache."""
+        with self._lock:
+            return self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+class CachingLiteLLMModel(LiteLLMModel):
+    """
+    LiteLLMModel that marks the static system prefix as cacheable and records
+    cache hits/misses.
+
+    Args:
+        cache_prompt: emit cache markers (disable for providers that reject them).
+        usage_provider: resilience provider the calls go through (tools/resilience.py):
+            its rate limit, retries and circuit breaker, and its budget in the current
+            usage session (tools/usage.py), where calls and tokens are charged.
+        All other arguments are passed to LiteLLMModel.
+    """
+
+    def __init__(self, *args, cache_prompt: bool = True, usage_provider: str = "anthropic", **kwargs):
+        self.cache_prompt = cache_prompt
+        self.usage_provider = usage_provider
+        self.cache_stats = CacheStats()
+        self.last_cache_read_tokens = 0
+        self.last_cache_write_tokens = 0
+        self._client = None
+        self._client_lock = threading.Lock()
+        # Retries and rate limiting are left to the resilience layer (see generate)
+        kwargs.setdefault("retry", False)
+        super().__init__(*args, **kwargs)
+
+    def create_client(self):
+        # Importing litellm takes seconds: the client is created on the first call instead
+        return None
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    with registry.profile.timed("client litellm"):
+                        self._client = LiteLLMModel.create_client(self)
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    def _prepare_completion_kwargs(self, *args, **kwargs) -> dict:
+        completion_kwargs = super()._prepare_completion_kwargs(*args, **kwargs)
+        if self.cache_prompt:
+            completion_kwargs["messages"] = mark_cacheable(completion_kwargs["messages"])
+        return completion_kwargs
+
+    def generate(self, *args, **kwargs) -> ChatMessage:
+        # Rate limit, retries, circuit breaker and session budget of the provider (tools/resilience.py);
+        # abandoned at once if the user request is cancelled (tools/cancellation.py)
+        message = resilience.get_provider(self.usage_provider).call(super().generate, *args, **kwargs)
+        self.last_cache_read_tokens, self.last_cache_write_tokens = cache_usage(getattr(message.raw, "usage", None))
+        input_tokens = message.token_usage.input_tokens if message.token_usage else 0
+        self.cache_stats.record(input_tokens, self.last_cache_read_tokens, self.last_cache_write_tokens)
+        session = usage.current()
+        if session is not None:
+            # The model is shared by every user: per-run cache usage is kept in the run's session
+            session.record_cache(self.usage_provider, self.last_cache_read_tokens, self.last_cache_write_tokens)
+        return message
@@ -0,0 +1,133 @@
+"""
+Lazy tool registry and startup profile.
+
+Tool modules are imported, and tools instantiated, only when first asked for;
+heavy SDKs (Anthropic, LiteLLM, duckduckgo_search) are imported by the
+clients that need them on first use (see tools/clients.py). Every import,
+instantiation and client construction done through here is timed, so a slow
+start can be traced back to its cause:
+
+    python -m tools.registry                 # profile importing/instantiating every tool
+    STARTUP_PROFILE=1 python app.py          # print the profile once the agent is built
+"""
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+
+class StartupProfile:
+    """Thread-safe record of (label, seconds) for imports and constructions."""
+
+    def __init__(self):
+        self._entries: list[tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, label: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._entries.append((label, time.perf_counter() - start))
+
+    def entries(self) -> list[tuple[str, float]]:
+        with self._lock:
+            return list(self._entries)
+
+    def report(self) -> str:
+        entries = self.entries()
+        if not entries:
+            return "⏱️ Startup profile: nothing loaded yet"
+        width = max(len(label) for label, _ in entries)
+        lines = [f"⏱️ Startup profile ({sum(seconds for _, seconds in entries):.2f}s):"]
+        for label, seconds in sorted(entries, key=lambda entry: -entry[1]):
+            lines.append(f"   {label.ljust(width)}  {seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+profile = StartupProfile()
+
+
+class _Spec:
+    __slots__ = ("module", "attribute", "factory")
+
+    def __init__(self, module: str, attribute: str, factory: Optional[Callable[..., Any]]):
+        self.module = module
+        self.attribute = attribute
+        self.factory = factory
+
+
+class ToolRegistry:
+    """
+    Maps tool names to `module:Class` targets, imported and instantiated on demand.
+
+    `factory(module, **kwargs)` can replace the plain `Class(**kwargs)` call, e.g. to
+    pass a model callable that lives in the same module.
+    """
+
+    def __init__(self, startup_profile: Optional[StartupProfile] = None):
+        self.profile = startup_profile or profile
+        self._specs: dict[str, _Spec] = {}
+        self._shared: dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, target: str, factory: Optional[Callable[..., Any]] = None) -> None:
+        module, _, attribute = target.partition(":")
+        self._specs[name] = _Spec(module, attribute, factory)
+
+    def names(self) -> list[str]:
+        return list(self._specs)
+
+    def _module(self, spec: _Spec):
+        with self.profile.timed(f"import {spec.module}"):
+            return importlib.import_module(spec.module)
+
+    def create(self, name: str, **kwargs) -> Any:
+        """Imports the tool's module if needed and returns a new instance."""
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown tool '{name}'. Registered tools: {', '.join(self._specs)}")
+        module = self._module(spec)
+        with self.profile.timed(f"create {name}"):
+            if spec.factory:
+                return spec.factory(module, **kwargs)
+            return getattr(module, spec.attribute)(**kwargs)
+
+    def get(self, name: str) -> Any:
+        """Shared instance of the tool, created on first use."""
+        tool = self._shared.get(name)
+        if tool is None:
+            with self._lock:
+                tool = self._shared.get(name)
+                if tool is None:
+                    tool = self._shared[name] = self.create(name)
+        return tool
+
+
+registry = ToolRegistry()
+registry.register("MoodToNeed", "tools.mood_to_need:MoodToNeedTool",
+                  lambda module, **kwargs: module.MoodToNeedTool(model=module.claude_mood_to_need_model, **kwargs))
+registry.register("NeedToDestination", "tools.need_to_destination:NeedToDestinationTool",
+                  lambda module, **kwargs: module.NeedToDestinationTool(model=module.claude_need_to_destination_model, **kwargs))
+registry.register("weather_forecast", "tools.weather_tool:WeatherTool")
+registry.register("weather_forecast_batch", "tools.weather_tool:WeatherBatchTool")
+registry.register("flights_finder", "tools.find_flight:FlightsFinderTool")
+registry.register("group_flights_finder", "tools.find_flight:GroupFlightsFinderTool")
+registry.register("country_info", "tools.country_info_tool:CountryInfoTool")
+registry.register("final_answer", "tools.final_answer:FinalAnswerTool")
+registry.register("web_search", "tools.web_search:DuckDuckGoSearchTool")
+registry.register("web_search_batch", "tools.web_search:WebSearchBatchTool")
+registry.register("visit_webpage", "tools.visit_webpage:VisitWebpageTool")
+registry.register("visit_webpages", "tools.visit_webpage:VisitWebpagesTool")
+
+
+if __name__ == "__main__":
+    for tool_name in registry.names():
+        try:
+            registry.create(tool_name)
+        except Exception as e:
+            print(f"   ❌ {tool_name}: {e}")
+    print(profile.report())
@@ -0,0 +1,347 @@
+"""
+Shared resilience layer for outbound providers.
+
+Each provider (OpenWeatherMap, SerpApi, NewsAPI, REST Countries, Nager.Date,
+Anthropic) gets a process-wide token-bucket rate limiter, a retry budget with
+jittered exponential backoff, and a circuit breaker. State is module-level so
+every tool instance and every concurrent session shares the same quota view.
+Each upstream attempt is also charged to the current user session, within its
+budget (tools/usage.py).
+"""
+import hashlib
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import requests
+
+from tools import cancellation, singleflight, usage
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when a provider is rate limited locally or its circuit is open."""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider} temporarily unavailable: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+class BudgetExceededError(ProviderUnavailableError):
+    """Raised when the current session has spent its budget for the provider (tools/usage.py)."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float, initial: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity if initial is None else initial
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Takes tokens if available; otherwise returns the seconds to wait (0.0 on success)."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, timeout: float, tokens: float = 1.0) -> bool:
+        """
+        Blocks until tokens are available or `timeout` seconds have elapsed.
+        Raises cancellation.Cancelled if the current request is cancelled meanwhile.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                return False
+            cancellation.sleep(wait)
+
+    def deposit(self, tokens: float) -> None:
+        """Adds tokens back (capped at capacity)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of traffic: every first attempt deposits `ratio`
+    tokens and every retry spends one, so a failing provider cannot be hit with
+    more than roughly (1 + ratio) times the normal request volume.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 3.0):
+        self.ratio = ratio
+        self._bucket = TokenBucket(rate=0.1, capacity=max(min_tokens, 10.0), initial=min_tokens)
+
+    def record_request(self) -> None:
+        self._bucket.deposit(self.ratio)
+
+    def can_retry(self) -> bool:
+        return self._bucket.try_acquire() == 0.0
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures, half-opens after `reset_timeout` seconds."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                # Only one probe request at a time while half-open
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Gives the half-open probe back when the call ended without an outcome (never sent)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+@dataclass
+class ProviderPolicy:
+    """Per-provider limits. `rate` is requests per second, `burst` the bucket capacity."""
+    rate: float
+    burst: float
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    max_wait: float = 10.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx responses are worth retrying."""
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    # Anthropic SDK connection errors (no status code)
+    if type(exc).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return True
+    return _status_code(exc) in RETRYABLE_STATUS_CODES
+
+
+class _RetryableResponse(Exception):
+    """Internal: wraps an HTTP response with a retryable status so it goes through the retry loop."""
+
+    def __init__(self, response: requests.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+class Provider:
+    """Rate limiter + retry budget + circuit breaker for one external API."""
+
+    def __init__(self, name: str, policy: ProviderPolicy):
+        self.name = name
+        self.policy = policy
+        self.bucket = TokenBucket(policy.rate, policy.burst)
+        self.retry_budget = RetryBudget()
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when the provider sends one."""
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.policy.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.policy.max_delay, self.policy.base_delay * 2 ** attempt))
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `fn` under this provider's rate limit, retry budget and circuit breaker."""
+        session = usage.current()
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            cancellation.check()
+            if session is not None:
+                reason = session.over_budget(self.name)
+                if reason:
+                    session.deny(self.name)
+                    raise BudgetExceededError(self.name, reason)
+            if not self.breaker.allow():
+                raise ProviderUnavailableError(self.name, "circuit open after repeated failures")
+            try:
+                acquired = self.bucket.acquire(self.policy.max_wait)
+            except cancellation.Cancelled:
+                self.breaker.release()
+                raise
+            if not acquired:
+                self.breaker.release()
+                raise ProviderUnavailableError(self.name, "local rate limit reached")
+            if session is not None:
+                # Every attempt reaches the provider and counts against its quota
+                session.charge(self.name)
+            try:
+                # Abandoned at once (Cancelled) if the user request is cancelled meanwhile
+                result = cancellation.run(fn, *args, **kwargs)
+            except cancellation.Cancelled:
+                # No outcome to record: give a half-open probe back
+                self.breaker.release()
+                raise
+            except Exception as exc:
+                if not is_retryable(exc):
+                    status = _status_code(exc)
+                    if status is not None and 400 <= status < 500:
+                        # The provider answered: client-side errors (bad key, 404...) say nothing about its health
+                        self.breaker.record_success()
+                    else:
+                        # Local failure before or after the exchange: no outcome to record
+                        self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt >= self.policy.max_attempts or not self.retry_budget.can_retry():
+                    raise
+                cancellation.sleep(self._backoff(attempt, exc))
+                continue
+            self.breaker.record_success()
+            if session is not None:
+                session.record_tokens(self.name, result)
+            return result
+
+    def get(self, url: str, coalesce: bool = True, **kwargs) -> requests.Response:
+        """
+        `requests.get` through the resilience layer. Retryable statuses (429, 5xx)
+        are retried; once attempts are exhausted the last response is returned so
+        callers keep their existing status-code handling.
+
+        Identical concurrent GETs (same URL, parameters and API key, ignoring case)
+        are coalesced into a single upstream request. A session budget error
+        is only raised to the session it belongs to.
+        """
+        def _get():
+            with requests.get(url, stream=True, **kwargs) as response:
+                # Read the body now so the response can be shared between threads,
+                # stopping between chunks if the request is cancelled meanwhile
+                body = []
+                for chunk in response.iter_content(chunk_size=65536):
+                    cancellation.check()
+                    body.append(chunk)
+                response._content = b"".join(body)
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise _RetryableResponse(response)
+            return response
+
+        def _call():
+            try:
+                return self.call(_get)
+            except _RetryableResponse as exc:
+                return exc.response
+
+        if not coalesce:
+            return _call()
+        try:
+            return singleflight.shared.do(request_key(self.name, url, kwargs.get("params")), _call)
+        except BudgetExceededError:
+            # The coalesced call may have been led by another session whose budget is spent
+            session = usage.current()
+            if session is not None and session.over_budget(self.name):
+                raise
+            return _call()
+
+
+SECRET_PARAMS = frozenset({"appid", "apikey", "api_key", "key", "token"})
+
+
+def request_key(provider: str, url: str, params: Optional[dict] = None) -> tuple:
+    """
+    Normalized coalescing key: case-insensitive URL and parameters. Secrets are
+    only kept as a digest, so calls made with different API keys are never shared.
+    """
+    params = params or {}
+    normalized = tuple(sorted(
+        (str(k).lower(), " ".join(str(v).split()).casefold())
+        for k, v in params.items()
+        if str(k).lower() not in SECRET_PARAMS
+    ))
+    secrets = sorted((str(k).lower(), str(v)) for k, v in params.items() if str(k).lower() in SECRET_PARAMS)
+    digest = hashlib.sha256(repr(secrets).encode()).hexdigest()[:16] if secrets else None
+    return (provider, " ".join(url.split()).casefold(), normalized, digest)
+
+
+PROVIDER_POLICIES = {
+    # Free tier: 60 calls/minute
+    "openweathermap": ProviderPolicy(rate=1.0, burst=10),
+    # Plan-dependent; searches are the scarcest quota we have
+    "serpapi": ProviderPolicy(rate=0.5, burst=5, max_attempts=2),
+    # Developer plan: 100 requests/day, keep bursts small
+    "newsapi": ProviderPolicy(rate=0.5, burst=8, max_attempts=2),
+    "restcountries": ProviderPolicy(rate=5.0, burst=20),
+    "nager_date": ProviderPolicy(rate=5.0, burst=20),
+    "anthropic": ProviderPolicy(rate=1.0, burst=5, max_attempts=3, base_delay=1.0, max_wait=30.0),
+}
+
+_providers: dict[str, Provider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str) -> Provider:
+    """Returns the process-wide Provider for `name`, creating it on first use."""
+    provider = _providers.get(name)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(name)
+            if provider is None:
+                policy = PROVIDER_POLICIES.get(name, ProviderPolicy(rate=2.0, burst=10))
+                provider = _providers[name] = Provider(name, policy)
+    return provider
@@ -0,0 +1,390 @@
+"""
+Structured tool results.
+
+The weather, flight and country tools used to return markdown only, and the
+CodeAgent spent steps (and tokens) parsing prices or temperatures back out of
+it. They now return these records:
+
+- fields the agent's code reads directly (`weather.temp_max`, `trip.price`,
+  `country.change_destination`...);
+- `str(result)`: a short plain-text summary, which is what the agent sees when
+  it prints a result;
+- `render()`: the full markdown, for the user (Gradio_UI and final_answer
+  render results with it).
+
+Failures are reported in `error` (`ok` is False): the message itself, without
+an "Erreur:" or "Error occurred:" prefix; `render()` shows it after a ❌.
+"""
+import dataclasses
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+from tools.flight_search import ROUND_TRIP, Itinerary, format_duration
+
+_SUMMARY_ADVICE_CHARS = 180
+
+
+def _shorten(text: Optional[str], limit: int = _SUMMARY_ADVICE_CHARS) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _advice(recommendation: Optional[str]) -> str:
+    """Recommendation text without its '🎯 **...**' heading line."""
+    lines = (recommendation or "").strip().splitlines()
+    if lines and lines[0].startswith("🎯"):
+        lines = lines[1:]
+    return " ".join(line.strip() for line in lines).replace("**", "")
+
+
+def _money(price: Optional[float]) -> str:
+    return f"${price:g}" if price is not None else "–"
+
+
+def _measure(value: Optional[float], spec: str, unit: str) -> str:
+    return f"{value:{spec}} {unit}" if value is not None else "?"
+
+
+def render(value) -> str:
+    """Markdown for the user: results are rendered, anything else is converted with str()."""
+    if isinstance(value, ToolResult):
+        return value.render()
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, ToolResult) for item in value):
+        return "\n\n".join(item.render() for item in value)
+    return str(value)
+
+
+class ToolResult(ABC):
+    """Base of the result records: `summary()` for the agent, `render()` for the user."""
+    __slots__ = ()
+
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @abstractmethod
+    def summary(self) -> str:
+        ...
+
+    @abstractmethod
+    def render(self) -> str:
+        ...
+
+    def rendered_error(self) -> str:
+        return f"❌ {self.error}"
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    def __str__(self) -> str:
+        return self.summary()
+
+    __repr__ = __str__
+
+
+# --- Weather ---
+
+@dataclass(slots=True, repr=False)
+class WeatherResult(ToolResult):
+    location: str
+    date: Optional[str] = None  # YYYY-MM-DD, None for the current weather
+    conditions: Optional[str] = None
+    condition_ids: list = field(default_factory=list)  # OpenWeatherMap condition codes
+    temp_min: Optional[float] = None  # °C
+    temp_max: Optional[float] = None
+    feels_like: Optional[float] = None
+    humidity: Optional[int] = None  # %
+    wind_max: Optional[float] = None  # m/s
+    rain_mm: Optional[float] = None  # rain and snow
+    activity: Optional[str] = None
+    verdict: Optional[str] = None  # IDÉAL / ACCEPTABLE / DÉCONSEILLÉ / CHANGEZ DE DESTINATION
+    recommendation: Optional[str] = None
+    report: str = ""  # markdown
+    error: Optional[str] = None
+
+    @property
+    def temperatures(self) -> str:
+        if self.temp_min is None or self.temp_max is None:
+            return "?"
+        if round(self.temp_min) == round(self.temp_max):
+            return f"{self.temp_min:.0f}"
+        return f"{self.temp_min:.0f}–{self.temp_max:.0f}"
+
+    def summary(self) -> str:
+        if self.error:
+            return f"{self.location}: {self.error}"
+        text = (f"{self.location} ({self.date or 'today'}): {self.conditions}, {self.temperatures}°C, "
+                f"humidity {_measure(self.humidity, 'd', '%')}, wind {_measure(self.wind_max, '.0f', 'm/s')}, "
+                f"rain {_measure(self.rain_mm, '.1f', 'mm')}")
+        if self.recommendation:
+            advice = _advice(self.recommendation)
+            if self.verdict and advice.upper().startswith(self.verdict):
+                advice = advice[len(self.verdict):].lstrip(" —-:")
+            text += f" | {self.activity or 'activity'}: {self.verdict or '?'} — {_shorten(advice)}"
+        return text
+
+    def render(self) -> str:
+        return self.rendered_error() if self.error else self.report
+
+
+@dataclass(slots=True, repr=False)
+class WeatherComparison(ToolResult):
+    reports: list  # WeatherResult, in the requested order
+    error: Optional[str] = None
+
+    def __iter__(self):
+        return iter(self.reports)
+
+    def __len__(self) -> int:
+        return len(self.reports)
+
+    def __getitem__(self, index: int) -> WeatherResult:
+        return self.reports[index]
+
+    def summary(self) -> str:
+        if self.error:
+            return self.error
+        return "\n".join(f"- {report.summary()}" for report in self.reports)
+
+    def render(self) -> str:
+        """Comparison table followed by the recommendation of each destination."""
+        if self.error:
+            return self.rendered_error()
+        result = "🌤️ **Comparaison météo**\n\n"
+        result += "| Destination | Date | Conditions | Temp. (°C) | Vent max | Pluie | Verdict |\n"
+        result += "|---|---|---|---|---|---|---|\n"
+        for report in self.reports:
+            date_label = report.date or "aujourd'hui"
+            if report.ok and report.conditions:
+                verdict = report.verdict or ("voir détail" if report.recommendation else "–")
+                result += (f"| {report.location} | {date_label} | {report.conditions.title()} | {report.temperatures} "
+                           f"| {_measure(report.wind_max, '.0f', 'm/s')} | {_measure(report.rain_mm, '.1f', 'mm')} | {verdict} |\n")
+            else:
+                result += f"| {report.location} | {date_label} | {report.render()[:80]} | – | – | – | – |\n"
+
+        details = [f"**{report.location}**\n{report.recommendation}" for report in self.reports if report.recommendation]
+        if details:
+            result += "\n" + "\n\n".join(details)
+        return result
+
+
+# --- Flights ---
+
+@dataclass(slots=True, repr=False)
+class FlightsResult(ToolResult):
+    origin: str
+    destination: str
+    outbound_date: Optional[str] = None
+    return_date: Optional[str] = None
+    mode: Optional[str] = None  # flight_search.ROUND_TRIP or ONE_WAY
+    price: Optional[float] = None  # whole trip (USD), both legs included
+    currency: str = "USD"
+    outbound: Optional[Itinerary] = None
+    inbound: Optional[Itinerary] = None
+    alternatives: list = field(default_factory=list)  # other outbound Itinerary options
+    error: Optional[str] = None
+
+    @property
+    def found(self) -> bool:
+        return self.outbound is not None or self.inbound is not None
+
+    def summary(self) -> str:
+        route = f"{self.origin}→{self.destination} {self.outbound_date or ''}" + (f"/{self.return_date}" if self.return_date else "")
+        if self.error:
+            return f"{route}: {self.error}"
+        if not self.found:
+            return f"{route}: no flights found"
+        kind = "round trip" if self.mode == ROUND_TRIP else ("one-way legs" if self.return_date else "one way")
+        parts = [f"{route}, {kind}, total {_money(self.price)}"]
+        parts.append("out: " + (self.outbound.headline(with_price=False) if self.outbound else "no flight"))
+        if self.return_date:
+            parts.append("back: " + (self.inbound.headline(with_price=False) if self.inbound else "no flight"))
+        if self.alternatives:
+            parts.append(f"{len(self.alternatives)} other outbound options")
+        return " | ".join(parts)
+
+    def render(self) -> str:
+        """Selected outbound and return itineraries, total price and a few alternative outbound options."""
+        if self.error:
+            return self.rendered_error()
+        round_trip = self.mode == ROUND_TRIP
+        one_way = not self.return_date and self.inbound is None
+        # Round-trip fares are whole-trip prices: shown once, as the total
+        parts = ["✈️ Outbound Flight:\n" + (self.outbound.describe(with_price=not round_trip) if self.outbound else "No flights found.")]
+        if not one_way:
+            parts.append("🛬 Inbound Flight:\n" + (self.inbound.describe(with_price=not round_trip) if self.inbound else "No flights found."))
+        if self.price is not None:
+            label = "round trip" if round_trip else ("one way" if one_way else "both one-way legs")
+            parts.append(f"💶 Total price ({label}): ${self.price:g}")
+        if self.alternatives:
+            label = "round-trip price" if round_trip else "price"
+            parts.append(f"🔁 Other outbound options ({label}):\n" + "\n".join(f"- {i.headline()}" for i in self.alternatives))
+        return "\n\n".join(parts)
+
+
+@dataclass(slots=True)
+class GroupLeg:
+    origin: str
+    itinerary: Itinerary
+    price: float  # trip price for every traveller leaving from `origin`
+
+
+@dataclass(slots=True, repr=False)
+class GroupOption(ToolResult):
+    destination: str
+    legs: list = field(default_factory=list)  # GroupLeg
+    missing: list = field(default_factory=list)  # origins without a priced flight
+    total_cost: Optional[float] = None
+    spread: Optional[int] = None  # minutes between the first and the last arrival
+    worst_duration: Optional[int] = None  # minutes
+    error: Optional[str] = None
+
+    def summary(self) -> str:
+        text = (f"{self.destination}: total {_money(self.total_cost)}, arrival spread "
+                f"{format_duration(self.spread) if self.spread else ('0h 0m' if self.spread == 0 else '?')}, "
+                f"worst duration {format_duration(self.worst_duration)}")
+        return text + (f", missing {', '.join(self.missing)}" if self.missing else "")
+
+    def render(self) -> str:
+        lines = [f"**{self.destination}**"]
+        lines.extend(f"- {leg.itinerary.headline(with_price=False)} — ${leg.price:g}" for leg in self.legs)
+        lines.extend(f"- {origin}: No flights found." for origin in self.missing)
+        return "\n".join(lines)
+
+
+@dataclass(slots=True, repr=False)
+class GroupFlightsResult(ToolResult):
+    origins: list
+    ranking: list = field(default_factory=list)  # GroupOption, best first
+    error: Optional[str] = None
+
+    @property
+    def best(self) -> Optional[GroupOption]:
+        return self.ranking[0] if self.ranking else None
+
+    def summary(self) -> str:
+        if self.error:
+            return self.error
+        return f"Group from {', '.join(self.origins)}, best first:\n" + "\n".join(
+            f"{rank}. {option.summary()}" for rank, option in enumerate(self.ranking, 1))
+
+    def render(self) -> str:
+        if self.error:
+            return self.rendered_error()
+        result = f"👥 **Group flights from {', '.join(self.origins)}** (ranked best first)\n\n"
+        result += "| Rank | Destination | Group total | Arrival spread | Worst-case duration | Missing origins |\n"
+        result += "|---|---|---|---|---|---|\n"
+        for rank, option in enumerate(self.ranking, 1):
+            spread = format_duration(option.spread) if option.spread else ("0h 0m" if option.spread == 0 else "–")
+            result += (f"| {rank} | {option.destination} | {_money(option.total_cost)} | {spread} | "
+                       f"{format_duration(option.worst_duration) if option.worst_duration else '–'} | "
+                       f"{', '.join(option.missing) or '–'} |\n")
+        result += "\n" + "\n\n".join(option.render() for option in self.ranking)
+        result += "\n\nPrices are trip prices (outbound and return) per departure airport, all its travellers included."
+        return result
+
+
+# --- Country information ---
+
+# Report sections, in display order
+COUNTRY_SECTIONS = ("security", "events", "holidays", "travel", "politics")
+
+SAFETY_ICONS = {"safe": "🟢", "caution": "🟡", "danger": "🔴", "unknown": "⚪"}
+
+# Heading shown in place of a section that could not be retrieved
+_SECTION_LABELS = {
+    "security": "🛡️ **Security**",
+    "events": "📅 **Events**",
+    "holidays": "🎉 **Holidays**",
+    "travel": "✈️ **Travel**",
+    "politics": "🏛️ **Politics**",
+}
+
+
+@dataclass(slots=True, repr=False)
+class CountryResult(ToolResult):
+    country: str
+    info_type: str = "all"
+    updated: Optional[str] = None
+    safety: Optional[str] = None  # "safe", "caution", "danger" or "unknown"
+    safety_description: Optional[str] = None
+    safety_advice: Optional[str] = None
+    change_destination: bool = False  # the security analysis or the final recommendation advises against going
+    events: list = field(default_factory=list)  # headlines
+    holidays: Optional[list] = field(default_factory=list)  # (name, YYYY-MM-DD); None when the country has no holiday data
+    currency: Optional[str] = None
+    languages: list = field(default_factory=list)
+    region: Optional[str] = None
+    politics: list = field(default_factory=list)  # headlines
+    recommendation: Optional[str] = None
+    missing: list = field(default_factory=list)  # sections that could not be retrieved ("security", ..., "recommendation")
+    error: Optional[str] = None
+
+    @property
+    def sections(self) -> tuple:
+        return COUNTRY_SECTIONS if self.info_type == "all" else tuple(s for s in COUNTRY_SECTIONS if s == self.info_type)
+
+    def summary(self) -> str:
+        if self.error:
+            return self.error
+        parts = [self.country + (" — CHANGE DESTINATION" if self.change_destination else "")]
+        if self.safety:
+            parts.append(f"safety: {self.safety}" + (f" ({_shorten(self.safety_advice, 80)})" if self.safety_advice else ""))
+        if self.currency or self.languages:
+            parts.append(f"currency {self.currency or '?'}, languages {', '.join(self.languages) or '?'}")
+        if self.holidays:
+            parts.append("holidays: " + ", ".join(f"{name} ({date})" for name, date in self.holidays[:3]))
+        if self.events:
+            parts.append(f"{len(self.events)} current events")
+        if self.politics:
+            parts.append(f"{len(self.politics)} political headlines")
+        if self.recommendation:
+            parts.append("advice: " + _shorten(_advice(self.recommendation)))
+        if self.missing:
+            parts.append("unavailable: " + ", ".join(self.missing))
+        return " | ".join(parts)
+
+    def render(self) -> str:
+        """Report header, one block per requested section, then the final recommendation."""
+        if self.error:
+            return self.rendered_error()
+        result = f"🌍 **Contextual Information for {self.country}**\n"
+        result += f"*Updated: {self.updated}*\n\n"
+        result += "\n\n".join(self._render_section(section) for section in self.sections)
+        if self.recommendation:
+            result += f"\n\n{self.recommendation}"
+        return result
+
+    def _render_section(self, section: str) -> str:
+        if section in self.missing:
+            return f"{_SECTION_LABELS[section]}: Error during retrieval"
+        if section == "security":
+            return (f"🛡️ **Security and Travel Advice**\n"
+                    f"{SAFETY_ICONS.get(self.safety, '⚪')} **Level determined by real-time analysis**\n"
+                    f"📋 {self.safety_description}\n"
+                    f"🎯 **Recommendation: {self.safety_advice}**")
+        if section == "events":
+            if not self.events:
+                return f"📅 **Events**: No major events detected for {self.country}"
+            return "📅 **Current Events and Context**\n" + "\n".join(f"• {title}" for title in self.events)
+        if section == "holidays":
+            if self.holidays is None:
+                return f"🎉 **Holidays**: Information not available for {self.country}"
+            if not self.holidays:
+                return "🎉 **Holidays and Seasonal Events**\n**No major holidays scheduled in the coming months**"
+            return ("🎉 **Holidays and Seasonal Events**\n**Upcoming holidays:**\n"
+                    + "\n".join(f"• {name} ({date})" for name, date in self.holidays))
+        if section == "travel":
+            if not (self.currency or self.languages or self.region):
+                return f"✈️ **Travel**: Information not available for {self.country}"
+            return (f"✈️ **Practical Travel Information**\n"
+                    f"💰 Currency: {self.currency}\n"
+                    f"🗣️ Languages: {', '.join(self.languages)}\n"
+                    f"🌍 Region: {self.region}\n"
+                    f"📋 Check visa requirements on the country's official website")
+        if not self.politics:
+            return f"🏛️ **Politics**: Stable situation for {self.country}"
+        return "🏛️ **Political Context**\n" + "\n".join(f"• {title}" for title in self.politics)
@@ -0,0 +1,82 @@
+"""
+TTL cache for web search results.
+
+Results are keyed on the normalized query (case and whitespace folded), the
+requested number of results and the client options (region, proxy...), so the agent re-running a search, or two
+sessions searching the same destination, hit DuckDuckGo once per `ttl`.
+Identical searches running concurrently share one request (single-flight).
+Empty results are not cached.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Mapping, Optional
+
+from tools import singleflight
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def options_key(options: Optional[Mapping]) -> Optional[str]:
+    """Digest of the client options, so searches made with different settings (or proxy credentials) are never shared."""
+    if not options:
+        return None
+    return hashlib.sha256(repr(sorted((str(k), repr(v)) for k, v in options.items())).encode()).hexdigest()[:16]
+
+
+class SearchCache:
+    """
+    Args:
+        ttl: seconds during which a result list is reused.
+        max_entries: maximum number of cached searches (least recently used dropped first).
+    """
+
+    def __init__(self, ttl: float = 900, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, list]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str, max_results: int, search: Callable[[], list], options: Optional[Mapping] = None) -> list:
+        """Cached results for `(query, max_results, options)`, calling `search()` on a miss."""
+        key = ("web_search", normalize_query(query), max_results, options_key(options))
+        results = self._lookup(key)
+        if results is not None:
+            return results
+
+        def search_and_store() -> list:
+            found = list(search() or [])
+            if found:
+                with self._lock:
+                    self._entries[key] = (time.monotonic(), found)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return found
+
+        return singleflight.shared.do(key, search_and_store)
+
+    def _lookup(self, key: tuple) -> Optional[list]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache used by DuckDuckGoSearchTool
+shared = SearchCache()
@@ -0,0 +1,69 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key wait on one in-flight call and share
+its result (or its exception), so a trending destination triggers one upstream
+request instead of one per session.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from tools import cancellation
+
+
+class _Call:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self):
+        self.future = Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls sharing a key. Completed results are not cached."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `fn(*args, **kwargs)` unless a call for `key` is already in flight, in which case waits for it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                # Gives up at once if our own request is cancelled
+                return cancellation.wait(call.future)
+            except cancellation.Cancelled:
+                # Raise only if our request was cancelled; if the leader's was, run the call ourselves
+                cancellation.check()
+                return self.do(key, fn, *args, **kwargs)
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._calls[key]
+        call.future.set_result(result)
+        return result
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+# Process-wide group shared by every tool instance and session
+shared = SingleFlight()
@@ -0,0 +1,102 @@
+"""
+Multi-pattern keyword matching (Aho-Corasick) with word-boundary handling.
+
+The automaton is built once from a list of patterns; a search is a single pass
+over the text whose cost does not depend on the number of patterns.
+"""
+import re
+import unicodedata
+from collections import deque
+from typing import Any, Iterable, Iterator, Optional
+
+_SEPARATORS = re.compile(r"[\s\-'’_/,.;:()]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and collapse separators so 'Val-d'Isère' matches 'val d isere'."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _SEPARATORS.sub(" ", stripped).strip()
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton mapping normalized patterns to arbitrary payloads.
+
+    Matches are only reported on word boundaries, so "nice" does not fire inside
+    "venice" and "bali" does not fire inside "balinese".
+    """
+
+    def __init__(self, patterns: Optional[Iterable[tuple[str, Any]]] = None):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[tuple[int, Any]]] = [[]]
+        self._compiled = False
+        self.size = 0
+        for pattern, payload in patterns or ():
+            self.add(pattern, payload)
+
+    def add(self, pattern: str, payload: Any = None) -> None:
+        """Adds a pattern; must be called before the first search."""
+        if self._compiled:
+            raise RuntimeError("Cannot add patterns to a compiled automaton.")
+        key = normalize_text(pattern)
+        if not key:
+            return
+        node = 0
+        for char in key:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        # First definition of a pattern wins
+        if not any(length == len(key) for length, _ in self._output[node]):
+            self._output[node].append((len(key), payload))
+            self.size += 1
+
+    def compile(self) -> "KeywordAutomaton":
+        """Builds failure links (breadth-first) and merges suffix outputs."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._compiled = True
+        return self
+
+    def iter_matches(self, text: str, normalized: bool = False) -> Iterator[tuple[int, int, Any]]:
+        """Yields (start, end, payload) for every whole-word match in the normalized text."""
+        if not self._compiled:
+            self.compile()
+        haystack = text if normalized else normalize_text(text)
+        node = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for index, char in enumerate(haystack):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, payload in output[node]:
+                start = index - length + 1
+                if start > 0 and haystack[start - 1].isalnum():
+                    continue
+                if index + 1 < len(haystack) and haystack[index + 1].isalnum():
+                    continue
+                yield start, index + 1, payload
+
+    def longest_match(self, text: str) -> Optional[tuple[int, int, Any]]:
+        """Returns the longest (then leftmost) match, or None."""
+        best = None
+        for match in self.iter_matches(text):
+            if best is None or (match[1] - match[0]) > (best[1] - best[0]):
+                best = match
+        return best
@@ -0,0 +1,221 @@
+"""
+Per-session accounting of external calls, with budgets.
+
+A `Session` is bound to the context running one user request (`bound(session)`);
+thread pools inherit it through cancellation.wrap/run. Every outbound call goes
+through resilience.Provider.call, which charges it to the current session:
+calls per provider (OpenWeatherMap, SerpApi, NewsAPI...) and, for Anthropic,
+input and output tokens. The agent model's LLM calls go through the same path
+(CachingLiteLLMModel), which also records their prompt cache reads and writes. Calls served from a cache, the prefetch store or an
+identical in-flight call cost nothing and are charged to nobody.
+
+Budgets cap what one request may spend. They are read from USAGE_BUDGETS, e.g.
+"serpapi=20,newsapi=30,openweathermap=80,anthropic_tokens=500000": a provider
+name caps its calls, `<provider>_tokens` its tokens, and "none" lifts a cap.
+Once a budget is spent, further calls to that provider raise
+resilience.BudgetExceededError, a ProviderUnavailableError, which the tools
+already degrade on (weather without recommendation, country sections marked
+unavailable...). Unlike an outage, a spent budget says nothing about the
+provider: degraded results are never written to the shared caches (country
+report cache and store), and requests coalesced with an over-budget one make
+their own call.
+
+Closed sessions are kept in `history`; `most_expensive()` finds the heavy runs.
+"""
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Optional
+
+DEFAULT_BUDGETS = {
+    "serpapi": 20,
+    "newsapi": 30,
+    "openweathermap": 80,
+    "anthropic_tokens": 500_000,
+}
+
+DISPLAY_NAMES = {
+    "anthropic": "Claude",
+    "serpapi": "SerpApi",
+    "newsapi": "NewsAPI",
+    "openweathermap": "OpenWeatherMap",
+    "restcountries": "REST Countries",
+    "nager_date": "Nager.Date",
+}
+
+
+def parse_budgets(spec: str) -> dict:
+    """'serpapi=20,anthropic_tokens=none' → {'serpapi': 20, 'anthropic_tokens': None}; bad entries are skipped."""
+    budgets = {}
+    for item in (spec or "").split(","):
+        name, _, value = item.partition("=")
+        name, value = name.strip().lower(), value.strip().lower()
+        if not name or not value:
+            continue
+        if value in ("none", "off", "unlimited"):
+            budgets[name] = None
+            continue
+        try:
+            budgets[name] = int(float(value))
+        except ValueError:
+            continue
+    return budgets
+
+
+def default_budgets() -> dict:
+    """DEFAULT_BUDGETS overridden by USAGE_BUDGETS (read on each new session)."""
+    return {**DEFAULT_BUDGETS, **parse_budgets(os.getenv("USAGE_BUDGETS", ""))}
+
+
+def _count(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def _compact(number: int) -> str:
+    return f"{number / 1000:.1f}k" if number >= 1000 else str(number)
+
+
+class Session:
+    """
+    Running totals of one user request.
+
+    Args:
+        budgets: caps by provider (calls) or `<provider>_tokens` (tokens), None values
+            being unlimited. Defaults to `default_budgets()`.
+        label: free text shown in `history` (e.g. the task).
+    """
+
+    def __init__(self, budgets: Optional[dict] = None, label: str = ""):
+        self.id = uuid.uuid4().hex[:8]
+        self.label = label
+        self.budgets = default_budgets() if budgets is None else dict(budgets)
+        self.started = time.time()
+        self.ended: Optional[float] = None
+        self.calls: Counter = Counter()
+        self.input_tokens: Counter = Counter()
+        self.output_tokens: Counter = Counter()
+        self.denied: Counter = Counter()
+        # Prompt cache reads and writes, already included in input_tokens
+        self.cache_read_tokens: Counter = Counter()
+        self.cache_write_tokens: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def tokens(self, provider: str) -> int:
+        with self._lock:
+            return self.input_tokens[provider] + self.output_tokens[provider]
+
+    def over_budget(self, provider: str) -> Optional[str]:
+        """Why `provider` may not be called any more in this session (None while within budget)."""
+        with self._lock:
+            calls = self.budgets.get(provider)
+            if calls is not None and self.calls[provider] >= calls:
+                return f"session budget of {calls} calls spent"
+            tokens = self.budgets.get(f"{provider}_tokens")
+            if tokens is not None and self.input_tokens[provider] + self.output_tokens[provider] >= tokens:
+                return f"session budget of {tokens} tokens spent"
+        return None
+
+    def deny(self, provider: str) -> None:
+        with self._lock:
+            self.denied[provider] += 1
+
+    def charge(self, provider: str, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        """Counts one upstream call (and its tokens when known)."""
+        with self._lock:
+            self.calls[provider] += 1
+            self.input_tokens[provider] += input_tokens
+            self.output_tokens[provider] += output_tokens
+
+    def record_tokens(self, provider: str, result: Any) -> None:
+        """
+        Adds the tokens of an Anthropic SDK response (`result.usage`, cached prompt
+        tokens included) or of a smolagents ChatMessage (`result.token_usage`).
+        """
+        usage = getattr(result, "usage", None) or getattr(result, "token_usage", None)
+        if usage is None:
+            return
+        input_tokens = sum(_count(getattr(usage, name, 0)) for name in
+                           ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"))
+        output_tokens = _count(getattr(usage, "output_tokens", 0))
+        with self._lock:
+            self.input_tokens[provider] += input_tokens
+            self.output_tokens[provider] += output_tokens
+
+    def record_cache(self, provider: str, read_tokens: int, write_tokens: int) -> None:
+        """Adds the prompt cache reads and writes of one call (cf. tools/prompt_cache.py)."""
+        with self._lock:
+            self.cache_read_tokens[provider] += read_tokens
+            self.cache_write_tokens[provider] += write_tokens
+
+    def cache_tokens(self, provider: str) -> tuple[int, int]:
+        """(cache read tokens, cache write tokens) spent on `provider` so far."""
+        with self._lock:
+            return self.cache_read_tokens[provider], self.cache_write_tokens[provider]
+
+    def totals(self) -> dict:
+        """{provider: {'calls', 'input_tokens', 'output_tokens', 'denied'}} for every provider used."""
+        with self._lock:
+            providers = set(self.calls) | set(self.denied)
+            return {provider: {
+                "calls": self.calls[provider],
+                "input_tokens": self.input_tokens[provider],
+                "output_tokens": self.output_tokens[provider],
+                "denied": self.denied[provider],
+            } for provider in sorted(providers)}
+
+    def summary(self) -> str:
+        """One line for the UI, e.g. 'Claude: 3 calls, 41.2k/500.0k tokens · SerpApi: 2/20'."""
+        parts = []
+        for provider, total in self.totals().items():
+            name = DISPLAY_NAMES.get(provider, provider)
+            calls_budget = self.budgets.get(provider)
+            tokens_budget = self.budgets.get(f"{provider}_tokens")
+            tokens = total["input_tokens"] + total["output_tokens"]
+            if tokens or tokens_budget is not None:
+                text = f"{name}: {total['calls']} calls, {_compact(tokens)}"
+                text += f"/{_compact(tokens_budget)} tokens" if tokens_budget is not None else " tokens"
+            else:
+                text = f"{name}: {total['calls']}" + (f"/{calls_budget}" if calls_budget is not None else "")
+            if total["denied"]:
+                text += " (budget reached)"
+            parts.append(text)
+        return " · ".join(parts)
+
+    def close(self) -> None:
+        """Marks the session finished and keeps it in `history` (once)."""
+        with self._lock:
+            if self.ended is not None:
+                return
+            self.ended = time.time()
+        history.append(self)
+
+
+# Recently closed sessions, newest last
+history: deque = deque(maxlen=200)
+
+_current: contextvars.ContextVar[Optional[Session]] = contextvars.ContextVar("usage_session", default=None)
+
+
+def current() -> Optional[Session]:
+    return _current.get()
+
+
+@contextmanager
+def bound(session: Optional[Session]):
+    """Charges the external calls made in the block (and in its thread pools) to `session`."""
+    reset = _current.set(session)
+    try:
+        yield session
+    finally:
+        _current.reset(reset)
+
+
+def most_expensive(provider: str = "anthropic", limit: int = 5) -> list:
+    """Closed sessions that spent the most on `provider` (tokens when it has any, else calls)."""
+    def spent(session: Session) -> tuple:
+        return session.tokens(provider), session.calls[provider]
+    return sorted(history, key=spent, reverse=True)[:limit]
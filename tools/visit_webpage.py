@@ -1,15 +1,109 @@
 from typing import Any, Optional
 from smolagents.tools import Tool
+import codecs
 import requests
 import markdownify
 import smolagents
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools import cancellation, page_cache
+
+# Elements whose content never reaches the markdown; dropped before conversion
+_SKIPPED_TAGS = ("script", "style", "nav", "noscript", "svg", "iframe", "template", "head")
+_SKIPPED = re.compile(r"<!--.*?-->|<(%s)\b[^>]*>.*?</\1\s*>" % "|".join(_SKIPPED_TAGS), re.S | re.I)
+# Start of a skipped element (or comment) whose end has not been received yet
+_SKIPPED_OPEN = re.compile(r"<!--|<(?:%s)\b" % "|".join(_SKIPPED_TAGS), re.I)
+# Elements converted as a whole (splitting a table or list changes its markdown)
+_CONTAINER_TAGS = ("table", "ul", "ol", "dl", "pre", "blockquote")
+# Closing tags after which the received HTML can be converted without cutting a block in two,
+# provided no container element is still open
+_BLOCK_TAGS = _CONTAINER_TAGS + ("p", "div", r"h[1-6]", "section", "article", "header", "footer", "main")
+_BLOCK_TAG = re.compile(r"<(/?)(%s)\b[^>]*>" % "|".join(_BLOCK_TAGS), re.I)
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.I)
+
+
+def _decoder(response, first_chunk: bytes):
+    """
+    Incremental decoder for the body: charset from the Content-Type header, else
+    from a <meta charset> in the first chunk, else UTF-8 (requests would fall
+    back to ISO-8859-1 for any text/* response without a charset).
+    """
+    encoding = None
+    if "charset" in response.headers.get("content-type", "").lower():
+        encoding = response.encoding
+    if not encoding:
+        meta = _META_CHARSET.search(first_chunk[:4096])
+        encoding = meta.group(1).decode("ascii") if meta else "utf-8"
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+class _StreamingMarkdown:
+    """
+    Incremental HTML → markdown conversion.
+
+    HTML is fed in decoded chunks; skipped elements are removed as soon as they
+    are complete and everything up to the last block boundary is converted,
+    so only the unfinished tail of the page is kept in memory.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts: list[str] = []
+        self.length = 0
+        self._pending = ""
+
+    @property
+    def full(self) -> bool:
+        return self.length >= self.max_chars
+
+    def feed(self, html: str) -> None:
+        pending = _SKIPPED.sub("", self._pending + html)
+        # Keep an unfinished skipped element out of the conversion until it is closed
+        unfinished = _SKIPPED_OPEN.search(pending)
+        limit = unfinished.start() if unfinished else len(pending)
+        boundary = None
+        depth = 0
+        for tag in _BLOCK_TAG.finditer(pending, 0, limit):
+            closing, name = tag.group(1), tag.group(2).lower()
+            if name in _CONTAINER_TAGS:
+                depth = max(depth - 1, 0) if closing else depth + 1
+            if closing and depth == 0:
+                boundary = tag
+        if boundary is None:
+            self._pending = pending
+            return
+        self._convert(pending[:boundary.end()])
+        self._pending = pending[boundary.end():]
+
+    def close(self) -> str:
+        """Converts what is left (minus any unfinished skipped element) and returns the markdown."""
+        pending = _SKIPPED.sub("", self._pending)
+        unfinished = _SKIPPED_OPEN.search(pending)
+        self._convert(pending[:unfinished.start()] if unfinished else pending)
+        self._pending = ""
+        return "\n\n".join(self.parts)
+
+    def _convert(self, html: str) -> None:
+        if self.full or not html.strip():
+            return
+        text = markdownify.markdownify(html).strip()
+        if text:
+            self.parts.append(text)
+            self.length += len(text) + 2
+
 
 class VisitWebpageTool(Tool):
     name = "visit_webpage"
     description = "Visits a webpage at the given url and reads its content as a markdown string. Use this to browse webpages."
     inputs = {'url': {'type': 'string', 'description': 'The url of the webpage to visit.'}}
     output_type = "string"
+    observation_budget = 1500
 
     def forward(self, url: str) -> str:
         try:
@@ -23,18 +117,15 @@ class VisitWebpageTool(Tool):
                 "You must install packages `markdownify` and `requests` to run this tool: for instance run `pip install markdownify requests`."
             ) from e
         try:
-            # Send a GET request to the URL with a 20-second timeout
-            response = requests.get(url, timeout=20)
-            response.raise_for_status()  # Raise an exception for bad status codes
-
-            # Convert the HTML content to Markdown
-            markdown_content = markdownify(response.text).strip()
+            markdown_content = self._fetch(url)
 
             # Remove multiple line breaks
             markdown_content = re.sub(r"\n{3,}", "\n\n", markdown_content)
 
-            return truncate_content(markdown_content, 10000)
+            return truncate_content(markdown_content, self.max_output_chars)
 
+        except cancellation.Cancelled:
+            raise
         except requests.exceptions.Timeout:
             return "The request timed out. Please try again later or check the URL."
         except RequestException as e:
@@ -42,5 +133,111 @@ class VisitWebpageTool(Tool):
         except Exception as e:
             return f"An unexpected error occurred: {str(e)}"
 
-    def __init__(self, *args, **kwargs):
-        self.is_initialized = False
\ No newline at end of file
+    def _fetch(self, url: str) -> str:
+        """Markdown of the page, from the page cache when the server confirms it has not changed."""
+        cached, fresh = self.page_cache.lookup(url) if self.page_cache else (None, False)
+        if fresh:
+            return cached.markdown
+        headers = cached.conditional_headers() if cached else {}
+
+        # Send a GET request to the URL with a 20-second timeout
+        with requests.get(url, timeout=20, stream=True, headers=headers) as response:
+            if response.status_code == 304 and cached is not None:
+                self.page_cache.not_modified(url, response.headers)
+                return cached.markdown
+            response.raise_for_status()  # Raise an exception for bad status codes
+
+            if self.stream:
+                markdown_content = self._convert_streaming(response)
+            else:
+                # Convert the HTML content to Markdown
+                markdown_content = markdownify.markdownify(response.text).strip()
+
+        if self.page_cache:
+            self.page_cache.store(url, markdown_content, response.headers)
+        return markdown_content
+
+    def _convert_streaming(self, response) -> str:
+        """
+        Reads at most `max_bytes` of the body in `chunk_size` pieces and converts
+        them as they arrive, stopping as soon as the output budget is reached.
+        """
+        converter = _StreamingMarkdown(self.max_output_chars)
+        received = 0
+        decoder = None
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            cancellation.check()
+            chunk = chunk[:self.max_bytes - received]
+            if decoder is None:
+                decoder = _decoder(response, chunk)
+            received += len(chunk)
+            converter.feed(decoder.decode(chunk))
+            if converter.full or received >= self.max_bytes:
+                break
+        else:
+            if decoder is not None:
+                converter.feed(decoder.decode(b"", final=True))
+        markdown_content = converter.close().strip()
+        if received >= self.max_bytes and not converter.full:
+            markdown_content += f"\n\n_(page truncated after {self.max_bytes // 1024} KB)_"
+        return markdown_content
+
+    def __init__(self, *args, stream: bool = True, max_bytes: int = 2_000_000, max_output_chars: int = 10000,
+                 chunk_size: int = 65536, cache_pages: bool = True, pages: Optional[page_cache.PageCache] = None, **kwargs):
+        """
+        Args:
+            stream: read and convert the page incrementally (False: download and convert it whole).
+            max_bytes: maximum number of body bytes read in streaming mode.
+            max_output_chars: size of the markdown returned to the agent.
+            chunk_size: bytes read from the socket at a time in streaming mode.
+            cache_pages: keep converted pages and revalidate them with conditional requests.
+            pages: page cache to use (defaults to the shared one).
+        """
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.max_output_chars = max_output_chars
+        self.chunk_size = chunk_size
+        self.page_cache = (pages or page_cache.shared) if cache_pages else None
+        self.is_initialized = False
+
+
+class VisitWebpagesTool(VisitWebpageTool):
+    name = "visit_webpages"
+    description = "Visits several webpages at once (fetched in parallel) and returns their content as markdown, one section per url. Use this instead of several visit_webpage calls when reading multiple pages."
+    inputs = {
+        'urls': {'type': 'array', 'description': 'The urls of the webpages to visit.'},
+        'deadline': {'type': 'number', 'description': 'Seconds to wait for all pages (optional, default 30). Pages not read by then are reported as skipped.', 'nullable': True},
+    }
+    output_type = "string"
+    observation_budget = 2500
+
+    def __init__(self, *args, max_workers: int = 8, deadline: float = 30, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_workers = max_workers
+        self.deadline = deadline
+
+    def forward(self, urls: list, deadline: Optional[float] = None) -> str:
+        urls = list(dict.fromkeys(url.strip() for url in urls or [] if url and url.strip()))
+        if not urls:
+            return "Error: at least one url is required."
+
+        from smolagents.utils import truncate_content
+
+        # Every page shares the output budget of a single visit
+        per_page = max(self.max_output_chars // len(urls), 1000)
+        end = time.monotonic() + (deadline or self.deadline)
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)), thread_name_prefix="visit")
+        try:
+            visit = cancellation.wrap(super().forward)
+            futures = [executor.submit(visit, url) for url in urls]
+            sections = []
+            for url, future in zip(urls, futures):
+                try:
+                    content = cancellation.wait(future, max(end - time.monotonic(), 0))
+                except TimeoutError:
+                    content = "Skipped: the page could not be read before the deadline."
+                sections.append(f"## {url}\n\n{truncate_content(content, per_page)}")
+        finally:
+            # Late pages finish in the background (bounded by their own timeout) and are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+        return "\n\n".join(sections)
@@ -0,0 +1,162 @@
+"""
+Moteur de règles météo : tranche les cas évidents (plage + pluie, ski + redoux...)
+sans appeler Claude. Les cas ambigus renvoient None et sont escaladés au LLM.
+"""
+import operator
+from typing import Optional
+
+# Verdicts utilisés dans les recommandations (mêmes libellés que le prompt Claude)
+IDEAL = "IDÉAL"
+ACCEPTABLE = "ACCEPTABLE"
+DECONSEILLE = "DÉCONSEILLÉ"
+CHANGEZ = "CHANGEZ DE DESTINATION"
+
+_OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+
+# Synonymes acceptés pour le type d'activité
+ACTIVITY_ALIASES = {
+    'plage': 'plage', 'beach': 'plage', 'mer': 'plage', 'baignade': 'plage',
+    'ski': 'ski', 'snowboard': 'ski', 'sports d\'hiver': 'ski',
+    'ville': 'ville', 'city': 'ville', 'culture': 'ville', 'shopping': 'ville',
+    'randonnee': 'randonnee', 'randonnée': 'randonnee', 'hiking': 'randonnee', 'trekking': 'randonnee', 'montagne': 'randonnee',
+    'camping': 'camping',
+    'festival': 'festival', 'concert': 'festival',
+}
+
+# Règles par activité, évaluées dans l'ordre : la première qui correspond l'emporte.
+# Chaque règle : (conditions [(champ, opérateur, valeur)], verdict, conseil)
+RULES = {
+    'plage': [
+        ([('thunder', '==', True)], CHANGEZ, "Orages prévus : baignade dangereuse. Choisissez une destination ensoleillée ou décalez vos dates."),
+        ([('heavy_rain', '==', True)], CHANGEZ, "Fortes pluies prévues : la journée plage est compromise. Reportez ou choisissez une autre destination."),
+        ([('temp_max', '<', 18)], DECONSEILLE, "Trop frais pour la plage. Privilégiez une destination plus chaude ou une activité en ville."),
+        ([('wind_max', '>=', 12)], DECONSEILLE, "Vent fort : mer agitée et plage peu agréable."),
+        ([('light_rain', '==', True), ('temp_max', '>=', 20)], ACCEPTABLE, "Averses passagères : la plage reste possible entre deux averses, prévoyez une activité de repli."),
+        ([('temp_max', '>=', 25), ('clear_or_clouds', '==', True), ('wind_max', '<', 8)], IDEAL, "Soleil et chaleur : conditions parfaites pour la plage. Pensez à la crème solaire."),
+        ([('temp_max', '>=', 20), ('clear_or_clouds', '==', True)], ACCEPTABLE, "Temps sec et doux : agréable pour se promener sur la plage, baignade plus fraîche."),
+    ],
+    'ski': [
+        ([('temp_min', '>', 5)], DECONSEILLE, "Températures trop douces : neige de mauvaise qualité. Visez une station plus haute ou d'autres dates."),
+        ([('thunder', '==', True)], DECONSEILLE, "Orages en montagne : remontées probablement fermées."),
+        ([('wind_max', '>=', 15)], DECONSEILLE, "Vent violent : risque de fermeture des remontées mécaniques."),
+        ([('rain', '==', True), ('temp_max', '>', 2)], DECONSEILLE, "Pluie sur les pistes : neige lourde et conditions désagréables."),
+        ([('snow', '==', True), ('temp_max', '<=', 2)], IDEAL, "Chutes de neige et froid : excellente qualité de neige."),
+        ([('precipitation', '==', False), ('temp_max', '<=', 0)], IDEAL, "Froid sec : neige bien conservée et ciel dégagé."),
+        ([('precipitation', '==', False), ('temp_max', '<=', 5)], ACCEPTABLE, "Températures positives en journée : neige plus molle l'après-midi."),
+    ],
+    'randonnee': [
+        ([('thunder', '==', True)], CHANGEZ, "Orages prévus : randonnée dangereuse en altitude. Changez de destination ou de dates."),
+        ([('heavy_rain', '==', True)], DECONSEILLE, "Fortes pluies : sentiers glissants et visibilité réduite."),
+        ([('wind_max', '>=', 15)], DECONSEILLE, "Vent violent : évitez les crêtes et sommets."),
+        ([('temp_max', '>', 35)], DECONSEILLE, "Chaleur extrême : risque de coup de chaleur. Partez très tôt ou choisissez une autre activité."),
+        ([('precipitation', '==', False), ('temp_max', '>=', 10), ('temp_max', '<=', 28), ('wind_max', '<', 10)], IDEAL, "Temps sec et températures agréables : conditions idéales pour randonner."),
+        ([('light_rain', '==', True), ('temp_max', '>=', 8)], ACCEPTABLE, "Averses légères : prévoyez une veste imperméable."),
+    ],
+    'ville': [
+        ([('thunder', '==', True)], DECONSEILLE, "Orages : privilégiez musées et activités en intérieur."),
+        ([('precipitation', '==', False), ('temp_max', '>=', 12), ('temp_max', '<=', 30)], IDEAL, "Temps sec et doux : parfait pour explorer la ville à pied."),
+        ([('light_rain', '==', True)], ACCEPTABLE, "Pluie légère : acceptable avec un parapluie, alternez avec des visites en intérieur."),
+        ([('precipitation', '==', False), ('temp_max', '>=', 5), ('temp_max', '<=', 34)], ACCEPTABLE, "Temps sec : bonnes conditions pour visiter, adaptez votre tenue."),
+    ],
+    'camping': [
+        ([('thunder', '==', True)], CHANGEZ, "Orages prévus : camper sous tente est dangereux. Changez de destination ou de dates."),
+        ([('heavy_rain', '==', True)], DECONSEILLE, "Fortes pluies : risque d'inondation du campement."),
+        ([('temp_min', '<', 5)], DECONSEILLE, "Nuits trop froides pour camper sans équipement hivernal."),
+        ([('wind_max', '>=', 12)], DECONSEILLE, "Vent fort : montage de tente difficile."),
+        ([('precipitation', '==', False), ('temp_min', '>=', 10), ('temp_max', '<=', 30)], IDEAL, "Temps sec et nuits douces : conditions parfaites pour camper."),
+        ([('light_rain', '==', True), ('temp_min', '>=', 10)], ACCEPTABLE, "Averses légères : prévoyez une bâche et des vêtements de pluie."),
+    ],
+    'festival': [
+        ([('thunder', '==', True)], DECONSEILLE, "Orages : risque d'annulation des scènes extérieures."),
+        ([('heavy_rain', '==', True)], DECONSEILLE, "Forte pluie : festival en extérieur très boueux."),
+        ([('precipitation', '==', False), ('temp_max', '>=', 15), ('temp_max', '<=', 32)], IDEAL, "Temps sec et doux : conditions idéales pour un festival en plein air."),
+        ([('light_rain', '==', True)], ACCEPTABLE, "Pluie légère : prévoyez un poncho et des bottes."),
+    ],
+}
+
+
+def _compile_condition(field: str, op: str, value):
+    """Compile une condition (champ, opérateur, valeur) en prédicat"""
+    compare = _OPERATORS[op]
+    return lambda features: features.get(field) is not None and compare(features[field], value)
+
+
+def _compile_rules(rules: dict) -> dict:
+    """Compile la table de règles en (prédicats, verdict, conseil) une seule fois à l'import"""
+    compiled = {}
+    for activity, activity_rules in rules.items():
+        compiled[activity] = tuple(
+            (tuple(_compile_condition(*condition) for condition in conditions), verdict, advice)
+            for conditions, verdict, advice in activity_rules
+        )
+    return compiled
+
+
+_COMPILED_RULES = _compile_rules(RULES)
+
+
+def extract_features(summary: dict) -> dict:
+    """Dérive les indicateurs booléens (pluie, orage, neige...) depuis le résumé météo structuré"""
+    ids = summary.get('condition_ids', [])
+    rain_mm = summary.get('rain_mm', 0) or 0
+    # Codes OpenWeatherMap : 2xx orage, 3xx bruine, 5xx pluie, 6xx neige, 800 ciel clair, 80x nuages
+    thunder = any(200 <= i < 300 for i in ids)
+    drizzle = any(300 <= i < 400 for i in ids)
+    rain_ids = [i for i in ids if 500 <= i < 600]
+    snow = any(600 <= i < 700 for i in ids)
+    heavy_rain = any(i >= 502 for i in rain_ids) or rain_mm >= 10
+    rain = bool(rain_ids) or drizzle
+    return {
+        'temp_min': summary.get('temp_min'),
+        'temp_max': summary.get('temp_max'),
+        'wind_max': summary.get('wind_max', 0),
+        'thunder': thunder,
+        'snow': snow,
+        'rain': rain,
+        'heavy_rain': heavy_rain,
+        'light_rain': rain and not heavy_rain and not thunder,
+        'precipitation': thunder or rain or snow,
+        'clear_or_clouds': bool(ids) and all(i >= 800 for i in ids),
+    }
+
+
+def normalize_activity(activity_type: Optional[str]) -> Optional[str]:
+    """Ramène un type d'activité libre à une des activités couvertes par les règles"""
+    if not activity_type:
+        return None
+    return ACTIVITY_ALIASES.get(activity_type.lower().strip())
+
+
+def evaluate(activity_type: str, summary: Optional[dict]) -> Optional[tuple]:
+    """
+    Évalue les règles pour une activité.
+
+    Returns:
+        (verdict, conseil) pour un cas tranché, None si le cas est ambigu ou non couvert.
+    """
+    activity = normalize_activity(activity_type)
+    if not activity or not summary:
+        return None
+
+    features = extract_features(summary)
+    for predicates, verdict, advice in _COMPILED_RULES[activity]:
+        if all(predicate(features) for predicate in predicates):
+            return verdict, advice
+    return None
+
+
+def verdict_of(recommendation: Optional[str]) -> Optional[str]:
+    """Verdict cité dans une recommandation (règles ou Claude), None s'il n'y en a pas"""
+    upper = (recommendation or "").upper()
+    for verdict in (CHANGEZ, DECONSEILLE, ACCEPTABLE, IDEAL):
+        if verdict in upper:
+            return verdict
+    return None
+
+
+def format_recommendation(verdict: str, advice: str) -> str:
+    """Formate un verdict au même format que la recommandation Claude"""
+    return f"🎯 **RECOMMANDATION VOYAGE**\n**{verdict}** — {advice}"
@@ -4,8 +4,17 @@ import requests
 from datetime import datetime, timedelta
 import json
 import os
-from dotenv import load_dotenv
-import anthropic
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tools import activity_gazetteer, cancellation, clients, prefetch, resilience, weather_rules
+from tools.results import WeatherComparison, WeatherResult
+
+# Géocodages réussis partagés entre instances (la météo et la recherche d'aéroport géocodent les mêmes destinations)
+_GEOCODE_CACHE_SIZE = 512
+_geocoded: OrderedDict = OrderedDict()
+_geocoded_lock = threading.Lock()
+
 
 class WeatherTool(Tool):
     name = "weather_forecast"
@@ -16,30 +25,39 @@ class WeatherTool(Tool):
         'activity_type': {'type': 'string', 'description': 'Type d\'activité/destination: "plage", "ski", "ville", "randonnee", "camping", "festival" (optionnel)', 'nullable': True},
         'api_key': {'type': 'string', 'description': 'Clé API OpenWeatherMap (optionnel si définie dans les variables d\'environnement)', 'nullable': True}
     }
-    output_type = "string"
+    output_type = "object"
+    observation_budget = 400
 
     def __init__(self, api_key: Optional[str] = None):
         super().__init__()
-        # Charger les variables d'environnement depuis le fichier .env
-        load_dotenv()
-        
         # Utiliser la clé API fournie, sinon celle du .env
-        self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
+        self.api_key = api_key or clients.env('OPENWEATHER_API_KEY')
         self.base_url = "http://api.openweathermap.org/data/2.5"
-        
-        # Initialiser le client Claude pour les recommandations intelligentes
+
+    @property
+    def claude_client(self):
+        """Client Claude partagé pour les recommandations intelligentes, créé au premier appel (cf. tools/clients.py)"""
         try:
-            self.claude_client = anthropic.Anthropic(api_key=os.getenv('ANTROPIC_KEY'))
-        except:
-            self.claude_client = None
+            return clients.anthropic_client()
+        except Exception:
+            return None
+
+    def forward(self, location: str, date: Optional[str] = None, activity_type: Optional[str] = None, api_key: Optional[str] = None) -> WeatherResult:
+        return self.collect(location, date, activity_type, api_key)
 
-    def forward(self, location: str, date: Optional[str] = None, activity_type: Optional[str] = None, api_key: Optional[str] = None) -> str:
+    def collect(self, location: str, date: Optional[str] = None, activity_type: Optional[str] = None, api_key: Optional[str] = None) -> WeatherResult:
+        """
+        Géocode, récupère et formate la météo d'une localisation (champs structurés + rapport, cf. tools/results.py).
+        Point d'entrée pour le code appelant l'outil directement (tools/pipeline.py), hors de l'agent.
+        """
+        entry = WeatherResult(location=location, date=date or None)
         try:
             # Utiliser la clé API fournie ou celle par défaut
             used_api_key = api_key or self.api_key
             
             if not used_api_key:
-                return "Erreur: Clé API OpenWeatherMap requise. Ajoutez OPENWEATHER_API_KEY dans votre fichier .env ou obtenez une clé gratuite sur https://openweathermap.org/api"
+                entry.error = "Clé API OpenWeatherMap requise. Ajoutez OPENWEATHER_API_KEY dans votre fichier .env ou obtenez une clé gratuite sur https://openweathermap.org/api"
+                return entry
 
             # Parser la date si fournie
             target_date = None
@@ -47,61 +65,116 @@ class WeatherTool(Tool):
                 try:
                     target_date = datetime.strptime(date, "%Y-%m-%d")
                 except ValueError:
-                    return f"Erreur: Format de date invalide. Utilisez YYYY-MM-DD (ex: 2024-01-15)"
-
-            # Obtenir les coordonnées de la localisation
-            geo_url = f"http://api.openweathermap.org/geo/1.0/direct"
-            geo_params = {
-                'q': location,
-                'limit': 1,
-                'appid': used_api_key
-            }
-            
-            geo_response = requests.get(geo_url, params=geo_params, timeout=10)
-            geo_response.raise_for_status()
-            geo_data = geo_response.json()
-            
-            if not geo_data:
-                return f"Erreur: Localisation '{location}' non trouvée. Essayez avec le nom d'une ville ou d'un pays plus précis."
-            
-            lat = geo_data[0]['lat']
-            lon = geo_data[0]['lon']
-            country = geo_data[0].get('country', '')
-            city_name = geo_data[0]['name']
+                    entry.error = f"Format de date invalide. Utilisez YYYY-MM-DD (ex: 2024-01-15)"
+                    return entry
 
-            # Utiliser l'API gratuite
-            weather_data = self._get_weather(lat, lon, city_name, country, target_date, used_api_key)
+            # Géocodage + météo : résultat préchargé par tools/prefetch.py s'il existe, sinon appel direct.
+            # Le préchargement utilise la clé de l'outil : une autre clé fournie par l'appelant ne s'en sert pas
+            observed = prefetch.MISS
+            if used_api_key == self.api_key:
+                observed = prefetch.shared.take(prefetch.weather_key(location, date))
+            if observed is prefetch.MISS:
+                observed = self._observe(location, date, used_api_key)
+            if not observed:
+                entry.error = f"Localisation '{location}' non trouvée. Essayez avec le nom d'une ville ou d'un pays plus précis."
+                return entry
+
+            entry.location, weather_data, summary = observed
+            if not summary:
+                # Pas de mesures exploitables (date hors des 5 jours de prévisions, données incomplètes...)
+                entry.error = weather_data
+                return entry
+            for key in ('conditions', 'condition_ids', 'temp_min', 'temp_max', 'feels_like', 'humidity', 'wind_max', 'rain_mm'):
+                setattr(entry, key, summary[key])
             
-            # Ajouter des recommandations intelligentes si Claude est disponible
-            if self.claude_client:
-                # Utiliser le type d'activité fourni ou essayer de le détecter automatiquement
-                detected_activity = activity_type or self._detect_activity_from_location(location)
-                
-                if detected_activity:
-                    recommendation = self._get_intelligent_recommendation(weather_data, detected_activity, location, target_date)
-                    if recommendation:
-                        if not activity_type:  # Si détecté automatiquement, l'indiquer
-                            weather_data += f"\n\n💡 *Activité détectée: {detected_activity}*"
-                        weather_data += f"\n\n{recommendation}"
+            # Ajouter des recommandations : règles pour les cas évidents, Claude pour les cas ambigus
+            # Utiliser le type d'activité fourni ou essayer de le détecter automatiquement
+            detected_activity = activity_type or self._detect_activity_from_location(location)
+            entry.activity = detected_activity
+            
+            if detected_activity:
+                recommendation = self._get_recommendation(weather_data, summary, detected_activity, location, target_date)
+                if recommendation:
+                    entry.recommendation = recommendation
+                    entry.verdict = weather_rules.verdict_of(recommendation)
+                    if not activity_type:  # Si détecté automatiquement, l'indiquer
+                        weather_data += f"\n\n💡 *Activité détectée: {detected_activity}*"
+                    weather_data += f"\n\n{recommendation}"
             
-            return weather_data
+            entry.report = weather_data
 
+        except resilience.ProviderUnavailableError:
+            entry.error = "Service météo temporairement indisponible (trop de requêtes ou panne du fournisseur). Réessayez dans quelques instants."
         except requests.exceptions.Timeout:
-            return "Erreur: Délai d'attente dépassé. Veuillez réessayer."
+            entry.error = "Délai d'attente dépassé. Veuillez réessayer."
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401:
-                return "Erreur 401: Clé API invalide ou non activée. Vérifiez votre clé API OpenWeatherMap et assurez-vous qu'elle est activée (peut prendre quelques heures après création)."
+                entry.error = "Clé API invalide ou non activée (HTTP 401). Vérifiez votre clé API OpenWeatherMap et assurez-vous qu'elle est activée (peut prendre quelques heures après création)."
             elif e.response.status_code == 429:
-                return "Erreur 429: Limite de requêtes dépassée. Attendez avant de refaire une requête."
+                entry.error = "Limite de requêtes dépassée (HTTP 429). Attendez avant de refaire une requête."
             else:
-                return f"Erreur HTTP {e.response.status_code}: {str(e)}"
+                entry.error = f"HTTP {e.response.status_code}: {str(e)}"
         except requests.exceptions.RequestException as e:
-            return f"Erreur de requête: {str(e)}"
+            entry.error = f"Requête échouée: {str(e)}"
         except Exception as e:
-            return f"Erreur inattendue: {str(e)}"
+            entry.error = f"Échec inattendu: {str(e)}"
+        return entry
+
+    def _observe(self, location: str, date: Optional[str], api_key: Optional[str]) -> Optional[tuple]:
+        """Géocode puis récupère la météo : (localisation résolue, texte formaté, résumé) ou None si introuvable"""
+        api_key = api_key or self.api_key
+        target_date = datetime.strptime(date, "%Y-%m-%d") if date else None
+        geo = self._geocode(location, api_key)
+        if not geo:
+            return None
+
+        country = geo.get('country', '')
+        city_name = geo['name']
+        # Utiliser l'API gratuite
+        weather_data, summary = self._get_weather(geo['lat'], geo['lon'], city_name, country, target_date, api_key)
+        return (f"{city_name}, {country}" if country else city_name), weather_data, summary
 
-    def _get_weather(self, lat: float, lon: float, city_name: str, country: str, target_date: Optional[datetime], api_key: str) -> str:
-        """Utilise l'API gratuite 2.5"""
+    def coordinates(self, location: str) -> Optional[tuple]:
+        """(lat, lon) d'une localisation, None si introuvable ou en cas d'erreur (cf. tools/airports.py)"""
+        try:
+            geo = self._geocode(location, self.api_key)
+        except cancellation.Cancelled:
+            raise
+        except Exception:
+            return None
+        return (geo['lat'], geo['lon']) if geo else None
+
+    def _geocode(self, location: str, api_key: str) -> Optional[dict]:
+        """Obtient les coordonnées d'une localisation via l'API de géocodage (mémorisées par localisation)"""
+        key = " ".join(location.lower().split())
+        with _geocoded_lock:
+            if key in _geocoded:
+                _geocoded.move_to_end(key)
+                return _geocoded[key]
+        geo = self._geocode_api(location, api_key)
+        if geo:
+            with _geocoded_lock:
+                _geocoded[key] = geo
+                while len(_geocoded) > _GEOCODE_CACHE_SIZE:
+                    _geocoded.popitem(last=False)
+        return geo
+
+    def _geocode_api(self, location: str, api_key: str) -> Optional[dict]:
+        """Obtient les coordonnées d'une localisation via l'API de géocodage"""
+        geo_url = f"http://api.openweathermap.org/geo/1.0/direct"
+        geo_params = {
+            'q': location,
+            'limit': 1,
+            'appid': api_key
+        }
+        
+        geo_response = resilience.get_provider("openweathermap").get(geo_url, params=geo_params, timeout=10)
+        geo_response.raise_for_status()
+        geo_data = geo_response.json()
+        return geo_data[0] if geo_data else None
+
+    def _get_weather(self, lat: float, lon: float, city_name: str, country: str, target_date: Optional[datetime], api_key: str) -> tuple:
+        """Utilise l'API gratuite 2.5 et renvoie (texte formaté, résumé structuré ou None)"""
         
         if not target_date or target_date.date() == datetime.now().date():
             # Météo actuelle
@@ -114,11 +187,11 @@ class WeatherTool(Tool):
                 'lang': 'fr'
             }
             
-            response = requests.get(weather_url, params=params, timeout=10)
+            response = resilience.get_provider("openweathermap").get(weather_url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
-            return self._format_current_weather(data, city_name, country)
+            return self._format_current_weather(data, city_name, country), self._summarize_current(data)
             
         elif target_date and target_date <= datetime.now() + timedelta(days=5):
             # Prévisions sur 5 jours
@@ -131,13 +204,13 @@ class WeatherTool(Tool):
                 'lang': 'fr'
             }
             
-            response = requests.get(forecast_url, params=params, timeout=10)
+            response = resilience.get_provider("openweathermap").get(forecast_url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
-            return self._format_forecast_weather(data, city_name, country, target_date)
+            return self._format_forecast_weather(data, city_name, country, target_date), self._summarize_forecast(data, target_date)
         else:
-            return "Erreur: Les prévisions ne sont disponibles que pour les 5 prochains jours maximum."
+            return "Les prévisions ne sont disponibles que pour les 5 prochains jours maximum.", None
 
     def _format_current_weather(self, data: dict, city_name: str, country: str) -> str:
         """Formate les données météo actuelles"""
@@ -164,7 +237,7 @@ class WeatherTool(Tool):
             return result
             
         except KeyError as e:
-            return f"Erreur lors du formatage des données météo: {str(e)}"
+            return f"Données météo incomplètes (champ manquant: {str(e)})"
 
     def _format_forecast_weather(self, data: dict, city_name: str, country: str, target_date: datetime) -> str:
         """Formate les prévisions météo pour une date spécifique"""
@@ -206,7 +279,47 @@ class WeatherTool(Tool):
             return result
             
         except KeyError as e:
-            return f"Erreur lors du formatage des prévisions: {str(e)}"
+            return f"Prévisions incomplètes (champ manquant: {str(e)})"
+
+    def _summarize_current(self, data: dict) -> Optional[dict]:
+        """Extrait les champs clés de la météo actuelle pour comparaison"""
+        try:
+            main = data['main']
+            return {
+                'conditions': data['weather'][0]['description'],
+                'condition_ids': [w['id'] for w in data['weather']],
+                'temp_min': main['temp'],
+                'temp_max': main['temp'],
+                'feels_like': main['feels_like'],
+                'humidity': main['humidity'],
+                'wind_max': data.get('wind', {}).get('speed', 0),
+                'rain_mm': data.get('rain', {}).get('1h', 0) + data.get('snow', {}).get('1h', 0),
+            }
+        except (KeyError, IndexError):
+            return None
+
+    def _summarize_forecast(self, data: dict, target_date: datetime) -> Optional[dict]:
+        """Agrège les prévisions d'une journée en champs clés pour comparaison"""
+        try:
+            target_date_str = target_date.strftime("%Y-%m-%d")
+            forecasts = [f for f in data['list'] if datetime.fromtimestamp(f['dt']).strftime("%Y-%m-%d") == target_date_str]
+            if not forecasts:
+                return None
+            
+            temps = [f['main']['temp'] for f in forecasts]
+            descriptions = [f['weather'][0]['description'] for f in forecasts]
+            return {
+                'conditions': max(set(descriptions), key=descriptions.count),
+                'condition_ids': sorted({w['id'] for f in forecasts for w in f['weather']}),
+                'temp_min': min(temps),
+                'temp_max': max(temps),
+                'feels_like': sum(f['main']['feels_like'] for f in forecasts) / len(forecasts),
+                'humidity': round(sum(f['main']['humidity'] for f in forecasts) / len(forecasts)),
+                'wind_max': max(f.get('wind', {}).get('speed', 0) for f in forecasts),
+                'rain_mm': sum(f.get('rain', {}).get('3h', 0) + f.get('snow', {}).get('3h', 0) for f in forecasts),
+            }
+        except (KeyError, IndexError):
+            return None
 
     def _wind_direction(self, degrees: float) -> str:
         """Convertit les degrés en direction du vent"""
@@ -215,6 +328,13 @@ class WeatherTool(Tool):
         index = round(degrees / 22.5) % 16
         return directions[index]
 
+    def _get_recommendation(self, weather_data: str, summary: dict, activity_type: str, location: str, target_date: Optional[datetime]) -> Optional[str]:
+        """Tranche via le moteur de règles si possible, sinon escalade à Claude"""
+        rule_result = weather_rules.evaluate(activity_type, summary)
+        if rule_result:
+            return weather_rules.format_recommendation(*rule_result)
+        return self._get_intelligent_recommendation(weather_data, activity_type, location, target_date)
+
     def _get_intelligent_recommendation(self, weather_data: str, activity_type: str, location: str, target_date: Optional[datetime]) -> Optional[str]:
         """Utilise Claude pour générer des recommandations intelligentes basées sur la météo et l'activité"""
         try:
@@ -248,7 +368,8 @@ Format de réponse :
 🎯 **RECOMMANDATION VOYAGE**
 [Votre analyse et conseil]"""
 
-            response = self.claude_client.messages.create(
+            response = resilience.get_provider("anthropic").call(
+                self.claude_client.messages.create,
                 model="claude-3-opus-20240229",
                 max_tokens=200,
                 temperature=0.2,
@@ -265,21 +386,42 @@ Format de réponse :
 
     def _detect_activity_from_location(self, location: str) -> Optional[str]:
         """Détecte automatiquement le type d'activité probable basé sur la localisation"""
-        location_lower = location.lower()
-        
-        # Stations balnéaires et plages
-        beach_keywords = ['nice', 'cannes', 'saint-tropez', 'biarritz', 'deauville', 'miami', 'maldives', 'ibiza', 'mykonos', 'cancun', 'phuket', 'bali']
-        if any(keyword in location_lower for keyword in beach_keywords):
-            return "plage"
-        
-        # Stations de ski
-        ski_keywords = ['chamonix', 'val d\'isère', 'courchevel', 'méribel', 'aspen', 'zermatt', 'st moritz', 'verbier']
-        if any(keyword in location_lower for keyword in ski_keywords):
-            return "ski"
+        return activity_gazetteer.detect_activity(location)
+
+class WeatherBatchTool(WeatherTool):
+    name = "weather_forecast_batch"
+    description = "Compare en un seul appel la météo de plusieurs destinations (requêtes parallèles) et renvoie un tableau comparatif avec recommandations."
+    inputs = {
+        'locations': {'type': 'array', 'description': 'Liste des villes ou pays à comparer (ex: ["Nice", "Lisbon", "Split"])'},
+        'dates': {'type': 'array', 'description': 'Dates au format YYYY-MM-DD, une par localisation ou une seule pour toutes (optionnel, par défaut aujourd\'hui)', 'nullable': True},
+        'activity_type': {'type': 'string', 'description': 'Type d\'activité commun: "plage", "ski", "ville", "randonnee", "camping", "festival" (optionnel)', 'nullable': True},
+        'api_key': {'type': 'string', 'description': 'Clé API OpenWeatherMap (optionnel si définie dans les variables d\'environnement)', 'nullable': True}
+    }
+    output_type = "object"
+    observation_budget = 700
+
+    def __init__(self, api_key: Optional[str] = None, max_workers: int = 8):
+        super().__init__(api_key=api_key)
+        self.max_workers = max_workers
+
+    def forward(self, locations: list, dates: Optional[list] = None, activity_type: Optional[str] = None, api_key: Optional[str] = None) -> WeatherComparison:
+        if not locations:
+            return WeatherComparison([], error="Au moins une localisation est requise.")
         
-        # Destinations de randonnée
-        hiking_keywords = ['mont blanc', 'everest', 'kilimanjaro', 'patagonie', 'himalaya', 'alpes', 'pyrénées']
-        if any(keyword in location_lower for keyword in hiking_keywords):
-            return "randonnee"
+        dates = list(dates or [])
+        if len(dates) == 1:
+            dates = dates * len(locations)
+        elif dates and len(dates) != len(locations):
+            return WeatherComparison([], error="Fournissez une date par localisation, ou une seule date pour toutes.")
+        if not dates:
+            dates = [None] * len(locations)
+
+        # Chaque localisation (géocodage, météo, recommandation) est traitée en parallèle
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(locations))) as executor:
+            entries = list(executor.map(
+                cancellation.wrap(lambda args: self.collect(args[0], args[1], activity_type, api_key)),
+                zip(locations, dates)
+            ))
         
-        return None 
\ No newline at end of file
+        # Tableau comparatif et détail par destination : WeatherComparison.render()
+        return WeatherComparison(entries)
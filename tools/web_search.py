@@ -1,27 +1,107 @@
 from typing import Any, Optional
 from smolagents.tools import Tool
-import duckduckgo_search
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+from tools import cancellation, search_cache
+
+
+def _url_key(url: str) -> str:
+    """URL identity used to merge results: case-insensitive host, no fragment or trailing slash."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
 
 class DuckDuckGoSearchTool(Tool):
     name = "web_search"
     description = "Performs a duckduckgo web search based on your query (think a Google search) then returns the top search results."
     inputs = {'query': {'type': 'string', 'description': 'The search query to perform.'}}
     output_type = "string"
+    observation_budget = 800
 
-    def __init__(self, max_results=10, **kwargs):
+    def __init__(self, max_results=10, cache: Optional[search_cache.SearchCache] = None, use_cache: bool = True, **kwargs):
         super().__init__()
         self.max_results = max_results
-        try:
-            from duckduckgo_search import DDGS
-        except ImportError as e:
-            raise ImportError(
-                "You must install package `duckduckgo_search` to run this tool: for instance run `pip install duckduckgo-search`."
-            ) from e
-        self.ddgs = DDGS(**kwargs)
+        self.cache = (cache or search_cache.shared) if use_cache else None
+        self.ddgs_kwargs = kwargs
+        self._local = threading.local()
+
+    @property
+    def ddgs(self):
+        """DDGS client, imported and built on first search (one per thread, for batch searches)"""
+        ddgs = getattr(self._local, "ddgs", None)
+        if ddgs is None:
+            try:
+                from duckduckgo_search import DDGS
+            except ImportError as e:
+                raise ImportError(
+                    "You must install package `duckduckgo_search` to run this tool: for instance run `pip install duckduckgo-search`."
+                ) from e
+            ddgs = self._local.ddgs = DDGS(**self.ddgs_kwargs)
+        return ddgs
+
+    def search(self, query: str) -> list:
+        """Raw results (dicts with title, href and body), from the cache when possible."""
+        if self.cache is None:
+            return self.ddgs.text(query, max_results=self.max_results)
+        return self.cache.get(query, self.max_results, lambda: self.ddgs.text(query, max_results=self.max_results),
+                              options=self.ddgs_kwargs)
 
     def forward(self, query: str) -> str:
-        results = self.ddgs.text(query, max_results=self.max_results)
+        results = self.search(query)
         if len(results) == 0:
             raise Exception("No results found! Try a less restrictive/shorter query.")
         postprocessed_results = [f"[{result['title']}]({result['href']})\n{result['body']}" for result in results]
-        return "## Search Results\n\n" + "\n\n".join(postprocessed_results)
\ No newline at end of file
+        return "## Search Results\n\n" + "\n\n".join(postprocessed_results)
+
+
+class WebSearchBatchTool(DuckDuckGoSearchTool):
+    name = "web_search_batch"
+    description = "Performs several duckduckgo web searches at once (in parallel) and returns their merged results, without duplicates. Use this instead of several web_search calls, e.g. one query per destination."
+    inputs = {'queries': {'type': 'array', 'description': 'The search queries to perform.'}}
+    output_type = "string"
+    observation_budget = 1500
+
+    def __init__(self, max_results=10, max_workers: int = 4, **kwargs):
+        super().__init__(max_results=max_results, **kwargs)
+        self.max_workers = max_workers
+
+    def forward(self, queries: list) -> str:
+        queries = list(dict.fromkeys(query.strip() for query in queries or [] if query and query.strip()))
+        if not queries:
+            raise Exception("At least one query is required.")
+
+        def search(query: str):
+            try:
+                return self.search(query), None
+            except cancellation.Cancelled:
+                raise
+            except Exception as e:
+                return [], e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as executor:
+            outcomes = list(executor.map(cancellation.wrap(search), queries))
+
+        # Interleave the rankings so every query keeps its best results near the top
+        merged: dict[str, dict] = {}
+        for rank in range(max((len(results) for results, _ in outcomes), default=0)):
+            for query, (results, _) in zip(queries, outcomes):
+                if rank >= len(results):
+                    continue
+                result = results[rank]
+                entry = merged.setdefault(_url_key(result['href']), {**result, 'queries': []})
+                if query not in entry['queries']:
+                    entry['queries'].append(query)
+
+        if not merged:
+            errors = [f"{query}: {error}" for query, (_, error) in zip(queries, outcomes) if error]
+            raise Exception("No results found! Try less restrictive/shorter queries." + (f" Errors: {'; '.join(errors)}" if errors else ""))
+
+        postprocessed_results = [
+            f"[{result['title']}]({result['href']})\n{result['body']}\n_Queries: {', '.join(result['queries'])}_"
+            for result in merged.values()
+        ]
+        failed = [query for query, (_, error) in zip(queries, outcomes) if error]
+        footer = f"\n\n_Failed queries: {', '.join(failed)}_" if failed else ""
+        return "## Search Results\n\n" + "\n\n".join(postprocessed_results) + footer